@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+코 임베딩 인덱스 종류별 recall@k / 지연 시간 벤치마크 (flat 기준)
+
+각 인덱스 종류를 같은 벡터로 구성한 뒤, flat(전수 비교) 결과를 정답으로 recall@k와
+질의 한 건당 지연 시간(p50/p95), 구성 시간, 메모리 사용량을 비교합니다.
+
+사용법:
+    python benchmark_index.py                                # 합성 임베딩 (2만, 10만 개)
+    python benchmark_index.py --sizes 50000 --types flat,hnsw
+    python benchmark_index.py --index-dir ./nose_index       # 저장된 실제 임베딩으로 측정
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import faiss
+
+from config import Config
+from index_factory import INDEX_TYPES, IndexParams, build_index, index_memory_bytes
+
+
+def synthetic_embeddings(num_vectors, dim, num_queries, seed=0):
+    """
+    ResNet 평균 풀링 출력처럼 0 이상이고 군집을 이루는 합성 임베딩
+
+    질의는 등록 벡터에 잡음을 더해 만듭니다 (같은 강아지의 다른 사진).
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.gamma(2.0, 0.5, (max(1, num_vectors // 50), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), num_vectors)]
+    vectors = np.maximum(vectors + rng.normal(0, 0.3, vectors.shape).astype(np.float32), 0)
+    queries = vectors[rng.choice(num_vectors, num_queries, replace=False)]
+    queries = np.maximum(queries + rng.normal(0, 0.1, queries.shape).astype(np.float32), 0)
+    return vectors, queries
+
+
+def stored_embeddings(index_dir, num_queries, seed=0):
+    """저장된 인덱스 스냅샷의 임베딩 (질의는 그중 일부에 잡음 추가)"""
+    from vector_index import PersistentNoseIndex
+
+    index = PersistentNoseIndex(index_dir, dim=Config.EMBEDDING_DIM, snapshot_interval_s=0, index_type="flat")
+    ids = np.fromiter(index.id_to_uid.keys(), dtype=np.int64, count=len(index))
+    vectors = index.index.reconstruct_batch(ids)
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), min(num_queries, len(vectors)), replace=False)]
+    queries = queries + rng.normal(0, 0.01, queries.shape).astype(np.float32)
+    return vectors, queries
+
+
+def measure(index_type, vectors, queries, ground_truth, k, params):
+    start = time.perf_counter()
+    index = build_index(index_type, vectors.shape[1], vectors, params)
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+    build_s = time.perf_counter() - start
+
+    # 질의 한 건씩 (API 요청과 같은 조건)
+    timings = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None], k)
+        timings.append((time.perf_counter() - start) * 1000.0)
+        found.append(ids[0])
+
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, ground_truth)])
+    return {
+        'index_type': index_type,
+        'vectors': len(vectors),
+        'build_s': round(build_s, 3),
+        f'recall@{k}': round(float(recall), 4),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'memory_mb': round(index_memory_bytes(index) / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='코 임베딩 인덱스 recall@k / 지연 시간 벤치마크')
+    parser.add_argument('--sizes', default='20000,100000', help='합성 임베딩 수 (쉼표 구분)')
+    parser.add_argument('--types', default=','.join(INDEX_TYPES), help='측정할 인덱스 종류 (쉼표 구분)')
+    parser.add_argument('--index-dir', help='저장된 인덱스 경로 (지정하면 합성 대신 실제 임베딩 사용)')
+    parser.add_argument('--queries', type=int, default=500, help='질의 수')
+    parser.add_argument('--k', type=int, default=10, help='recall@k의 k')
+    parser.add_argument('--threads', type=int, default=1, help='FAISS OpenMP 스레드 수')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    params = IndexParams.from_config(Config)
+    types = [t for t in args.types.split(',') if t]
+
+    if args.index_dir:
+        datasets = [stored_embeddings(args.index_dir, args.queries)]
+    else:
+        datasets = [synthetic_embeddings(int(size), Config.EMBEDDING_DIM, args.queries)
+                    for size in args.sizes.split(',')]
+
+    reports = []
+    for vectors, queries in datasets:
+        # flat 전수 비교 결과를 정답으로 사용
+        exact = faiss.IndexFlatL2(vectors.shape[1])
+        exact.add(vectors)
+        _, ground_truth = exact.search(queries, args.k)
+        for index_type in types:
+            try:
+                reports.append(measure(index_type, vectors, queries, ground_truth, args.k, params))
+            except Exception as e:
+                reports.append({'index_type': index_type, 'vectors': len(vectors), 'error': str(e)})
+
+    recall_key = f'recall@{args.k}'
+    print(f"{'type':<9} {'vectors':>8} {'build(s)':>9} {recall_key:>10} {'p50(ms)':>8} {'p95(ms)':>8} {'mem(MB)':>8}")
+    for r in reports:
+        if 'error' in r:
+            print(f"{r['index_type']:<9} {r['vectors']:>8} error: {r['error']}")
+            continue
+        print(f"{r['index_type']:<9} {r['vectors']:>8} {r['build_s']:>9.2f} {r[recall_key]:>10.4f} "
+              f"{r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['memory_mb']:>8.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'params': params.to_dict(), 'k': args.k, 'results': reports}, f, indent=2)
+        print(f"결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+코 임베딩 인덱스 동시 처리량 벤치마크 (잠금 직접 호출 vs 배치 쓰기 + 스냅샷 읽기)
+
+동시 클라이언트 수(기본 1, 4, 16)별로 검색/등록이 섞인 부하를 일정 시간 보내고
+초당 처리 수와 검색/등록 지연 시간(p50/p95)을 비교합니다.
+
+    locked   PersistentNoseIndex를 직접 호출 (검색/등록이 하나의 잠금으로 직렬화, 등록마다 디스크 동기화)
+    service  NoseIndexService (등록은 모아서 한 번에 기록, 검색은 잠금 없는 스냅샷)
+
+사용법:
+    python benchmark_index_service.py
+    python benchmark_index_service.py --vectors 100000 --clients 1,4,16 --write-ratio 0.1
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import faiss
+
+from vector_index import PersistentNoseIndex
+from index_service import NoseIndexService
+
+
+def run_clients(search_fn, add_fn, queries, vectors, clients, duration, write_ratio, k, seed=0):
+    """clients개 스레드가 duration초 동안 검색/등록을 반복"""
+    search_ms, write_ms = [], []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def client(client_id):
+        rng = np.random.default_rng(seed + client_id)
+        local_search, local_write = [], []
+        n = 0
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            if rng.random() < write_ratio:
+                add_fn(f"bench-{client_id}-{n}", vectors[rng.integers(len(vectors))])
+                local_write.append((time.perf_counter() - start) * 1000.0)
+            else:
+                search_fn(queries[rng.integers(len(queries))][None], k)
+                local_search.append((time.perf_counter() - start) * 1000.0)
+            n += 1
+        with lock:
+            search_ms.extend(local_search)
+            write_ms.extend(local_write)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    def pct(values, q):
+        return round(float(np.percentile(values, q)), 3) if values else None
+
+    return {
+        'clients': clients,
+        'ops_per_s': round((len(search_ms) + len(write_ms)) / elapsed, 1),
+        'searches': len(search_ms),
+        'writes': len(write_ms),
+        'search_p50_ms': pct(search_ms, 50),
+        'search_p95_ms': pct(search_ms, 95),
+        'write_p50_ms': pct(write_ms, 50),
+        'write_p95_ms': pct(write_ms, 95),
+    }
+
+
+def build_store(directory, vectors, dim, fsync, index_type):
+    store = PersistentNoseIndex(directory, dim=dim, snapshot_every=0, snapshot_interval_s=0,
+                                fsync=fsync, index_type=index_type)
+    store.add([f"dog-{i}" for i in range(len(vectors))], vectors)
+    if store.index_type != store.target_type():
+        store.migrate()
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='코 임베딩 인덱스 동시 처리량 벤치마크')
+    parser.add_argument('--vectors', type=int, default=20000, help='미리 등록할 임베딩 수')
+    parser.add_argument('--dim', type=int, default=512, help='임베딩 차원')
+    parser.add_argument('--index-type', default='flat', help='인덱스 종류 (flat / hnsw / ivf_flat / ivf_pq)')
+    parser.add_argument('--clients', default='1,4,16', help='동시 클라이언트 수 (쉼표 구분)')
+    parser.add_argument('--duration', type=float, default=5.0, help='클라이언트 수별 측정 시간 (초)')
+    parser.add_argument('--write-ratio', type=float, default=0.05, help='요청 중 등록 비율')
+    parser.add_argument('--k', type=int, default=10, help='검색 결과 수')
+    parser.add_argument('--no-fsync', action='store_true', help='로그 디스크 동기화 생략')
+    parser.add_argument('--threads', type=int, default=1, help='FAISS OpenMP 스레드 수 (검색 한 건당)')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    rng = np.random.default_rng(0)
+    vectors = rng.random((args.vectors, args.dim), dtype=np.float32)
+    queries = vectors[rng.choice(args.vectors, 1000)] + rng.normal(0, 0.01, (1000, args.dim)).astype(np.float32)
+
+    reports = []
+    for mode in ('locked', 'service'):
+        for clients in (int(c) for c in args.clients.split(',')):
+            directory = tempfile.mkdtemp(prefix='nose-index-bench-')
+            try:
+                store = build_store(directory, vectors, args.dim, not args.no_fsync, args.index_type)
+                if mode == 'service':
+                    service = NoseIndexService(store)
+                    result = run_clients(service.search, service.add, queries, vectors, clients,
+                                         args.duration, args.write_ratio, args.k)
+                    result['avg_write_batch'] = service.stats()['avg_batch']
+                    service.close()
+                else:
+                    result = run_clients(store.search, store.add, queries, vectors, clients,
+                                         args.duration, args.write_ratio, args.k)
+                store.close()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            reports.append(dict(mode=mode, **result))
+
+    print(f"{'mode':<8} {'clients':>7} {'ops/s':>9} {'search p50':>11} {'search p95':>11} "
+          f"{'write p50':>10} {'write p95':>10}")
+    for r in reports:
+        print(f"{r['mode']:<8} {r['clients']:>7} {r['ops_per_s']:>9.1f} {r['search_p50_ms']:>11} "
+              f"{r['search_p95_ms']:>11} {str(r['write_p50_ms']):>10} {str(r['write_p95_ms']):>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(args), 'results': reports}, f, indent=2)
+        print(f"결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
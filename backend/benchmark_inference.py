@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+종 분류 + 코 임베딩 추론 CPU 벤치마크 (기존 방식 vs 추론 엔진)
+
+요청 한 건(강아지 crop + 코 crop)과 일괄 요청(crop N쌍)의 지연 시간(p50/p95)과
+최대 메모리 사용량(RSS) 증가량을 비교합니다. 메모리를 정확히 재기 위해 방식마다 별도 프로세스에서 실행합니다.
+
+    before          기존 main.py 방식 (모델 두 개를 각각 실행, autograd 그래프 생성, 기본 메모리 형식)
+    engine          InferenceEngine (inference mode + channels_last, 몸통 두 개)
+    engine-shared   InferenceEngine, 두 몸통의 가중치가 같을 때 (강아지/코 crop을 한 번의 forward로)
+
+--graph torchscript / compile을 주면 engine 방식을 해당 그래프로도 측정합니다.
+가중치는 기본으로 무작위 초기화 (지연 시간/메모리는 가중치 값과 무관), --species-weights로 실제 체크포인트 사용 가능.
+
+사용법:
+    python benchmark_inference.py
+    python benchmark_inference.py --batch 16 --iterations 50 --graph torchscript --threads 4
+"""
+
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+import numpy as np
+
+
+def build_models(species_weights=None, shared=False):
+    import torch
+    from torchvision import models
+
+    species_model = models.resnet18()
+    species_model.fc = torch.nn.Linear(species_model.fc.in_features, 119)
+    if species_weights:
+        species_model.load_state_dict(torch.load(species_weights, map_location="cpu"))
+    embed_model = models.resnet18()
+    if shared:
+        # 종 분류 모델의 몸통 가중치를 그대로 복사 (몸통 공유가 가능한 경우)
+        embed_model.load_state_dict({k: v for k, v in species_model.state_dict().items() if not k.startswith("fc.")},
+                                    strict=False)
+    embed_trunk = torch.nn.Sequential(*list(embed_model.children())[:-1])
+    return species_model, embed_trunk
+
+
+def sample_crops(count, seed=0):
+    """강아지 crop(대략 300x260)과 코 crop(대략 80x64) 크기의 무작위 이미지"""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    dogs = [Image.fromarray(rng.integers(0, 256, (300, 260, 3), dtype=np.uint8)) for _ in range(count)]
+    noses = [Image.fromarray(rng.integers(0, 256, (64, 80, 3), dtype=np.uint8)) for _ in range(count)]
+    return dogs, noses
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_worker(args):
+    """한 방식을 측정해 결과 JSON을 표준 출력으로 출력 (하위 프로세스)"""
+    import torch
+    from torchvision import transforms
+
+    from inference import InferenceEngine
+
+    torch.set_num_threads(args.threads)
+    transform = transforms.Compose([transforms.Resize((224, 224)), transforms.ToTensor()])
+    mode, graph = args.worker.split(":")
+    species_model, embed_trunk = build_models(args.species_weights, shared=mode == "engine-shared")
+
+    if mode == "before":
+        species_model.eval()
+        embed_trunk.eval()
+
+        def run(dogs, noses):
+            # 기존 classify_and_embed와 같은 코드 경로
+            species_tensor = torch.stack([transform(c) for c in dogs])
+            species = species_model(species_tensor).argmax(1).tolist()
+            nose_tensor = torch.stack([transform(c) for c in noses])
+            embs = embed_trunk(nose_tensor).flatten(1).detach().cpu().numpy()
+            return species, embs
+        info = {"shared_backbone": False, "graph": "eager", "channels_last": False}
+    else:
+        engine = InferenceEngine(species_model, embed_trunk, transform, "cpu", graph=graph)
+        run = engine.classify_and_embed
+        info = engine.stats()
+
+    loaded_mb = peak_rss_mb()
+    report = {"mode": mode, **info, "threads": args.threads}
+    for batch in sorted({1, args.batch}):
+        dogs, noses = sample_crops(batch)
+        for _ in range(args.warmup):
+            run(dogs, noses)
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            run(dogs, noses)
+            timings.append((time.perf_counter() - start) * 1000.0)
+        report[f"batch{batch}_p50_ms"] = round(float(np.percentile(timings, 50)), 2)
+        report[f"batch{batch}_p95_ms"] = round(float(np.percentile(timings, 95)), 2)
+    report["model_rss_mb"] = round(loaded_mb, 1)
+    report["peak_rss_increase_mb"] = round(peak_rss_mb() - loaded_mb, 1)
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='종 분류 + 코 임베딩 추론 CPU 벤치마크')
+    parser.add_argument('--batch', type=int, default=8, help='일괄 요청 crop 쌍 수 (요청 한 건은 항상 측정)')
+    parser.add_argument('--iterations', type=int, default=30, help='측정 반복 수')
+    parser.add_argument('--warmup', type=int, default=3, help='측정 전 반복 수')
+    parser.add_argument('--threads', type=int, default=1, help='torch CPU 스레드 수')
+    parser.add_argument('--graph', default='eager', help='engine 방식 그래프 (eager / torchscript / compile, 쉼표 구분)')
+    parser.add_argument('--species-weights', help='종 분류 모델 체크포인트 (dog_species_classifier.pt)')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    runs = ["before:eager"]
+    for graph in (g for g in args.graph.split(',') if g):
+        runs += [f"engine:{graph}", f"engine-shared:{graph}"]
+
+    passthrough = ['--batch', str(args.batch), '--iterations', str(args.iterations),
+                   '--warmup', str(args.warmup), '--threads', str(args.threads)]
+    if args.species_weights:
+        passthrough += ['--species-weights', args.species_weights]
+
+    reports = []
+    for run in runs:
+        proc = subprocess.run([sys.executable, __file__, '--worker', run, *passthrough],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            reports.append({'mode': run, 'error': proc.stderr.strip().splitlines()[-1:]})
+            continue
+        reports.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    batch = args.batch
+    print(f"{'mode':<14} {'graph':<12} {'1 p50(ms)':>10} {'1 p95(ms)':>10} "
+          f"{f'{batch} p50(ms)':>11} {f'{batch} p95(ms)':>11} {'model(MB)':>10} {'+peak(MB)':>10}")
+    for r in reports:
+        if 'error' in r:
+            print(f"{r['mode']:<27} error: {r['error']}")
+            continue
+        print(f"{r['mode']:<14} {r['graph']:<12} {r['batch1_p50_ms']:>10.2f} {r['batch1_p95_ms']:>10.2f} "
+              f"{r[f'batch{batch}_p50_ms']:>11.2f} {r[f'batch{batch}_p95_ms']:>11.2f} "
+              f"{r['model_rss_mb']:>10.1f} {r['peak_rss_increase_mb']:>10.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': {k: v for k, v in vars(args).items() if k != 'worker'}, 'results': reports},
+                      f, indent=2)
+        print(f"결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import os
+import json
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes")
+
+
+class Config:
+    # 코 임베딩 인덱스 저장소 (스냅샷 + 쓰기 전 로그)
+    INDEX_DIR = os.getenv("INDEX_DIR", "./nose_index")
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))
+    INDEX_SNAPSHOT_EVERY = int(os.getenv("INDEX_SNAPSHOT_EVERY", "1000"))        # 이 수만큼 로그가 쌓이면 스냅샷
+    INDEX_SNAPSHOT_INTERVAL_S = float(os.getenv("INDEX_SNAPSHOT_INTERVAL_S", "300"))  # 변경이 있으면 주기적으로 스냅샷 (0이면 끔)
+    INDEX_FSYNC = _env_bool("INDEX_FSYNC", True)                                 # 로그 기록마다 디스크 동기화
+
+    # 인덱스 종류 ("auto": 등록 수에 따라 INDEX_TIERS로 자동 전환, 또는 flat / hnsw / ivf_flat / ivf_pq 고정)
+    INDEX_TYPE = os.getenv("INDEX_TYPE", "auto").strip().lower()
+    # 자동 전환 구간 (JSON, [최소 벡터 수, 인덱스 종류] 목록)
+    INDEX_TIERS = json.loads(os.getenv("INDEX_TIERS", '[[0, "flat"], [20000, "ivf_flat"], [500000, "ivf_pq"]]'))
+    INDEX_NLIST = int(os.getenv("INDEX_NLIST", "0"))                       # IVF 클러스터 수 (0이면 4 * sqrt(N))
+    INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", "16"))                    # IVF 검색 시 살펴볼 클러스터 수
+    INDEX_PQ_M = int(os.getenv("INDEX_PQ_M", "64"))                        # IVF-PQ 하위 양자화기 수
+    INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", "32"))
+    INDEX_HNSW_EF_CONSTRUCTION = int(os.getenv("INDEX_HNSW_EF_CONSTRUCTION", "200"))
+    INDEX_HNSW_EF_SEARCH = int(os.getenv("INDEX_HNSW_EF_SEARCH", "64"))
+    INDEX_REBUILD_TOMBSTONE_RATIO = float(os.getenv("INDEX_REBUILD_TOMBSTONE_RATIO", "0.2"))  # HNSW 삭제 비율 재구성 기준
+
+    # 일괄 분석(/analyze_batch) 요청당 최대 이미지 수
+    ANALYZE_BATCH_MAX_IMAGES = int(os.getenv("ANALYZE_BATCH_MAX_IMAGES", "64"))
+
+    # Firebase 설정
+    FIREBASE_KEY_PATH = os.getenv("FIREBASE_KEY_PATH", "firebase_key.json")
+    FIREBASE_BUCKET = os.getenv("FIREBASE_BUCKET", "your-bucket-name.appspot.com")
+
+    # 강아지 메타데이터 저장소 ("firebase" 또는 "local": Firestore 대역, 테스트/로컬 개발용)
+    FIRESTORE_BACKEND = os.getenv("FIRESTORE_BACKEND", "firebase").strip().lower()
+    LOCAL_FIRESTORE_PATH = os.getenv("LOCAL_FIRESTORE_PATH", "./local_firestore.json")  # 비우면 메모리에만 보관
+
+    # crop 이미지 저장소 ("firebase" 또는 "local": 파일 시스템 버킷, 테스트/로컬 개발용)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firebase").strip().lower()
+    LOCAL_BUCKET_DIR = os.getenv("LOCAL_BUCKET_DIR", "./local_bucket")
+    LOCAL_BUCKET_URL = os.getenv("LOCAL_BUCKET_URL", "/files")                  # 로컬 버킷 공개 URL 경로
+
+    # 백그라운드 업로드 대기열
+    UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", "256"))              # 대기 중인 업로드 작업 최대 수
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+    UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "5"))
+    UPLOAD_RETRY_BACKOFF_S = float(os.getenv("UPLOAD_RETRY_BACKOFF_S", "0.5"))  # 재시도마다 2배
+    UPLOAD_DRAIN_TIMEOUT_S = float(os.getenv("UPLOAD_DRAIN_TIMEOUT_S", "30"))   # 종료 시 남은 업로드 대기 시간
+
+    # 인덱스 동시성 계층 (등록/삭제 배치 기록, 검색 스냅샷)
+    INDEX_FLUSH_MAX = int(os.getenv("INDEX_FLUSH_MAX", "256"))                  # 한 번에 기록할 최대 작업 수
+    INDEX_FLUSH_INTERVAL_MS = float(os.getenv("INDEX_FLUSH_INTERVAL_MS", "2"))  # 첫 작업 이후 더 모을 시간
+    INDEX_COMPACT_THRESHOLD = int(os.getenv("INDEX_COMPACT_THRESHOLD", "4096"))  # 스냅샷 변경이 이 수를 넘으면 재복제
+
+    # 유실견 검색 (/match): 코 crop 임베딩으로 인덱스 검색
+    MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "3"))                            # 반환할 후보 수
+    MATCH_MAX_K = int(os.getenv("MATCH_MAX_K", "200"))                          # 요청 k의 최대값
+
+    # 종 분류 + 코 임베딩 추론
+    INFERENCE_GRAPH = os.getenv("INFERENCE_GRAPH", "eager").strip().lower()            # eager / torchscript / compile
+    INFERENCE_CHANNELS_LAST = _env_bool("INFERENCE_CHANNELS_LAST", True)
+    INFERENCE_SHARE_BACKBONE = os.getenv("INFERENCE_SHARE_BACKBONE", "auto").strip().lower()  # auto: 가중치가 같을 때만 공유 / off
+
+    # /admin/list 커서 페이지 + 메타데이터 캐시
+    ADMIN_LIST_PAGE_SIZE = int(os.getenv("ADMIN_LIST_PAGE_SIZE", "100"))
+    ADMIN_LIST_MAX_PAGE_SIZE = int(os.getenv("ADMIN_LIST_MAX_PAGE_SIZE", "500"))
+    DOG_CACHE_TTL_S = float(os.getenv("DOG_CACHE_TTL_S", "60"))                 # 다른 인스턴스 변경 반영 지연 (0이면 캐시 끔)
+    DOG_CACHE_MAX_PAGES = int(os.getenv("DOG_CACHE_MAX_PAGES", "1024"))
+    DOG_CACHE_MAX_DOCS = int(os.getenv("DOG_CACHE_MAX_DOCS", "50000"))
@@ -0,0 +1,156 @@
+"""
+등록 강아지 메타데이터 조회 (커서 페이지 + 읽기 캐시)
+
+/admin/list는 문서 ID 순서의 커서 페이지로 조회합니다 (다음 페이지는 이전 페이지 마지막 uid 이후부터).
+조회한 페이지와 문서는 로컬 캐시에 보관해 같은 페이지를 다시 읽을 때 Firestore를 호출하지 않습니다.
+
+캐시 무효화: 등록/삭제/상태 변경 시 invalidate(uid)를 호출하면 해당 uid가 들어갈 수 있는 페이지만 버립니다.
+커서 페이지는 "커서 이후 uid limit개"이므로, 커서보다 크고 페이지 마지막 uid 이하인 uid
+(또는 마지막 페이지라면 커서보다 큰 모든 uid)가 바뀔 때만 내용이 달라집니다.
+다른 서버 인스턴스가 쓴 변경은 TTL이 지나면 반영됩니다.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+DOCUMENT_ID = "__name__"
+
+
+class DogCatalog:
+    def __init__(self, db, collection="dogs", page_size=100, max_page_size=500,
+                 ttl_s=60, max_pages=1024, max_docs=50000):
+        """
+        Args:
+            db: firestore.Client 또는 LocalFirestore
+            collection: 강아지 컬렉션 이름
+            page_size: 기본 페이지 크기
+            max_page_size: 최대 페이지 크기 (요청한 limit은 이 값으로 제한)
+            ttl_s: 캐시 유효 시간 (다른 인스턴스의 변경 반영 지연, 0이면 캐시 사용 안 함)
+            max_pages / max_docs: 캐시에 보관할 최대 페이지/문서 수 (오래 안 쓴 것부터 제거)
+        """
+        self.db = db
+        self.collection = collection
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.ttl_s = ttl_s
+        self.max_pages = max_pages
+        self.max_docs = max_docs
+
+        self._pages = OrderedDict()   # (커서, limit) -> (문서 [(uid, data)], 다음 페이지 존재 여부, 만료 시각)
+        self._docs = OrderedDict()    # uid -> (data, 만료 시각)
+        self._version = 0             # 무효화마다 증가 (조회 중 무효화된 결과는 캐시에 넣지 않음)
+        self._lock = threading.Lock()
+        self.counts = {"page_hits": 0, "page_misses": 0, "doc_hits": 0, "doc_misses": 0, "invalidations": 0}
+
+    def _put(self, cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def _fetch_page(self, cursor, limit):
+        collection = self.db.collection(self.collection)
+        # 다음 페이지가 있는지 알기 위해 하나 더 조회
+        query = collection.order_by(DOCUMENT_ID).limit(limit + 1)
+        if cursor:
+            query = query.start_after({DOCUMENT_ID: collection.document(cursor)})
+        docs = [(doc.id, doc.to_dict()) for doc in query.stream()]
+        return docs[:limit], len(docs) > limit
+
+    def page(self, cursor=None, limit=None, fields=None):
+        """
+        커서 페이지 조회
+
+        Args:
+            cursor: 이전 페이지의 next_cursor (None이면 처음부터)
+            limit: 페이지 크기 (1 ~ max_page_size)
+            fields: 응답에 포함할 필드 목록 (None이면 전체, uid는 항상 포함)
+
+        Returns:
+            {"items": [...], "next_cursor": 다음 페이지 커서 또는 None}
+        """
+        limit = min(max(1, limit or self.page_size), self.max_page_size)
+        key = (cursor or "", limit)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None and entry[2] > now:
+                self._pages.move_to_end(key)
+                self.counts["page_hits"] += 1
+                docs, has_more = entry[0], entry[1]
+            else:
+                entry = None
+                self.counts["page_misses"] += 1
+            version = self._version
+
+        if entry is None:
+            docs, has_more = self._fetch_page(cursor, limit)
+            if self.ttl_s > 0:
+                expires = time.monotonic() + self.ttl_s
+                with self._lock:
+                    if version == self._version:
+                        self._put(self._pages, key, (docs, has_more, expires), self.max_pages)
+                        for uid, data in docs:
+                            self._put(self._docs, uid, (data, expires), self.max_docs)
+
+        items = []
+        for uid, data in docs:
+            if fields is not None:
+                data = {k: v for k, v in data.items() if k in fields}
+            items.append({**data, "uid": uid})
+        return {"items": items, "next_cursor": docs[-1][0] if has_more and docs else None}
+
+    def get(self, uid):
+        """uid의 메타데이터 (없으면 None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._docs.get(uid)
+            if entry is not None and entry[1] > now:
+                self._docs.move_to_end(uid)
+                self.counts["doc_hits"] += 1
+                return dict(entry[0])
+            self.counts["doc_misses"] += 1
+            version = self._version
+
+        doc = self.db.collection(self.collection).document(uid).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        if self.ttl_s > 0:
+            with self._lock:
+                if version == self._version:
+                    self._put(self._docs, uid, (data, time.monotonic() + self.ttl_s), self.max_docs)
+        return dict(data)
+
+    def get_many(self, uids):
+        """uid별 메타데이터 {uid: data} (없는 uid는 제외)"""
+        found = {}
+        for uid in uids:
+            data = self.get(uid)
+            if data is not None:
+                found[uid] = data
+        return found
+
+    def invalidate(self, *uids):
+        """변경된 uid의 문서와, 그 uid가 들어갈 수 있는 페이지를 캐시에서 제거"""
+        with self._lock:
+            self._version += 1
+            self.counts["invalidations"] += len(uids)
+            for uid in uids:
+                self._docs.pop(uid, None)
+            stale = [key for key, (docs, has_more, _) in self._pages.items()
+                     if any(uid > key[0] and (not has_more or not docs or uid <= docs[-1][0]) for uid in uids)]
+            for key in stale:
+                del self._pages[key]
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._pages.clear()
+            self._docs.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, cached_pages=len(self._pages), cached_docs=len(self._docs), ttl_s=self.ttl_s)
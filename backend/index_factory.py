@@ -0,0 +1,132 @@
+"""
+코 임베딩 인덱스 종류별 생성/검색 설정 (flat, IVF-Flat, IVF-PQ, HNSW)
+
+등록된 강아지 수가 늘어나면 전수 비교(flat) 대신 근사 최근접 탐색 인덱스로 옮겨
+/match 지연 시간이 등록 수에 비례해 늘어나지 않도록 합니다.
+
+    flat      전수 비교 (정확, 작은 갤러리)
+    hnsw      그래프 탐색 (학습 불필요, 삭제는 검색 시 제외 후 재구성 때 정리)
+    ivf_flat  클러스터 단위 탐색 (학습 필요, 벡터 원본 저장)
+    ivf_pq    클러스터 + 곱 양자화 (학습 필요, 벡터를 압축 저장해 메모리 절약)
+"""
+
+import math
+
+import numpy as np
+import faiss
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# 학습이 필요한 인덱스를 만들기 위한 최소 벡터 수 (이보다 적으면 flat 유지)
+MIN_TRAIN_VECTORS = {"flat": 0, "hnsw": 0, "ivf_flat": 1000, "ivf_pq": 10000}
+
+# 학습에 사용할 최대 벡터 수 (클러스터 수 x 이 값 이상은 품질 향상이 거의 없음)
+MAX_TRAIN_PER_LIST = 256
+
+
+class IndexParams:
+    def __init__(self, nlist=0, nprobe=16, pq_m=64, hnsw_m=32, hnsw_ef_construction=200, hnsw_ef_search=64):
+        """
+        Args:
+            nlist: IVF 클러스터 수 (0이면 벡터 수에 맞춰 4 * sqrt(N))
+            nprobe: IVF 검색 시 살펴볼 클러스터 수
+            pq_m: IVF-PQ 하위 양자화기 수 (임베딩 차원의 약수)
+            hnsw_m: HNSW 노드당 이웃 수
+            hnsw_ef_construction / hnsw_ef_search: HNSW 생성/검색 시 후보 목록 크기
+        """
+        self.nlist = int(nlist)
+        self.nprobe = int(nprobe)
+        self.pq_m = int(pq_m)
+        self.hnsw_m = int(hnsw_m)
+        self.hnsw_ef_construction = int(hnsw_ef_construction)
+        self.hnsw_ef_search = int(hnsw_ef_search)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(nlist=config.INDEX_NLIST, nprobe=config.INDEX_NPROBE, pq_m=config.INDEX_PQ_M,
+                   hnsw_m=config.INDEX_HNSW_M, hnsw_ef_construction=config.INDEX_HNSW_EF_CONSTRUCTION,
+                   hnsw_ef_search=config.INDEX_HNSW_EF_SEARCH)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def auto_nlist(num_vectors):
+    """벡터 수에 맞춘 IVF 클러스터 수 (클러스터당 학습 벡터가 39개 이상 되도록 제한)"""
+    return max(1, min(int(4 * math.sqrt(max(num_vectors, 1))), num_vectors // 39))
+
+
+def target_index_type(num_vectors, index_type="auto", tiers=()):
+    """
+    벡터 수에 맞는 인덱스 종류
+
+    Args:
+        index_type: "auto"면 tiers에서 선택, 그 외에는 고정 (학습할 벡터가 부족하면 flat)
+        tiers: [(최소 벡터 수, 인덱스 종류), ...]
+    """
+    if index_type == "auto":
+        index_type = "flat"
+        for min_vectors, kind in sorted(tiers, key=lambda tier: tier[0]):
+            if num_vectors >= min_vectors:
+                index_type = kind
+    if num_vectors < MIN_TRAIN_VECTORS[index_type]:
+        return "flat"
+    return index_type
+
+
+def supports_remove(index_type):
+    """remove_ids로 즉시 삭제할 수 있는 인덱스인지 (HNSW는 검색 시 제외만 가능)"""
+    return index_type != "hnsw"
+
+
+def build_index(index_type, dim, vectors, params=None, seed=1234):
+    """
+    빈 인덱스를 만들고 필요하면 vectors로 학습 (벡터 추가는 호출자가 add_with_ids로 수행)
+
+    모든 종류가 정수 ID 추가(add_with_ids)와 ID 기준 복원(reconstruct)을 지원하도록 구성합니다.
+    """
+    params = params or IndexParams()
+    if index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+
+    if index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, params.hnsw_m)
+        hnsw.hnsw.efConstruction = params.hnsw_ef_construction
+        index = faiss.IndexIDMap2(hnsw)
+        configure_search(index, index_type, params)
+        return index
+
+    nlist = params.nlist or auto_nlist(len(vectors))
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    elif index_type == "ivf_pq":
+        if dim % params.pq_m:
+            raise ValueError(f"pq_m ({params.pq_m}) must divide the embedding dimension ({dim})")
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, params.pq_m, 8)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    # 학습 벡터는 클러스터당 MAX_TRAIN_PER_LIST개까지만 무작위 추출
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    limit = nlist * MAX_TRAIN_PER_LIST
+    if len(vectors) > limit:
+        vectors = vectors[np.random.default_rng(seed).choice(len(vectors), limit, replace=False)]
+    index.train(vectors)
+    # ID로 복원/삭제할 수 있도록 해시 테이블 직접 매핑 사용
+    index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    configure_search(index, index_type, params)
+    return index
+
+
+def configure_search(index, index_type, params):
+    """검색 파라미터 적용 (스냅샷에서 읽은 인덱스에도 다시 적용)"""
+    if index_type in ("ivf_flat", "ivf_pq"):
+        faiss.extract_index_ivf(index).nprobe = params.nprobe
+    elif index_type == "hnsw":
+        faiss.downcast_index(index.index).hnsw.efSearch = params.hnsw_ef_search
+
+
+def index_memory_bytes(index):
+    """직렬화 크기 기준 인덱스 메모리 사용량"""
+    return int(faiss.serialize_index(index).nbytes)
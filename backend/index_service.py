@@ -0,0 +1,225 @@
+"""
+코 임베딩 인덱스 동시성 계층 (배치 쓰기 + 잠금 없는 스냅샷 읽기)
+
+FastAPI 핸들러와 스레드 풀의 여러 스레드에서 동시에 호출할 수 있습니다.
+
+쓰기: add/remove는 버퍼에 쌓이고, 플러시 스레드가 모아서 PersistentNoseIndex.write_batch로
+      한 번에 기록합니다 (로그 기록/디스크 동기화 한 번). 호출자는 자기 작업이 기록될 때까지 기다립니다.
+읽기: 검색은 플러시 때마다 새로 만들어 교체하는 불변 스냅샷에서 잠금 없이 수행합니다.
+      스냅샷 = 읽기 전용 기본 인덱스(복제본) + 이후 추가된 벡터(작은 numpy 배열) + 이후 삭제된 ID 집합.
+      벡터 ID -> UID 매핑도 스냅샷이 가짐 (복제 시점 매핑 복사본 + 이후 추가분, 플러시 스레드가 바꾸는
+      PersistentNoseIndex.id_to_uid는 읽지 않음).
+      추가/삭제가 쌓이면 기본 인덱스를 다시 복제해 합칩니다 (그동안의 검색은 이전 스냅샷으로 처리).
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import faiss
+
+logger = logging.getLogger(__name__)
+
+
+class ReadSnapshot:
+    def __init__(self, base, base_stale, base_uids, delta_ids, delta_uids, delta_vectors, removed, generation):
+        """
+        검색 전용 불변 스냅샷 (만든 뒤에는 어떤 필드도 바꾸지 않음)
+
+        Args:
+            base: 읽기 전용 FAISS 인덱스 복제본
+            base_stale: base 안에 남아 있는 삭제된 벡터 수 (HNSW 삭제 표시)
+            base_uids: base를 복제한 시점의 벡터 ID -> UID 매핑 (이 스냅샷 전용 복사본, 스냅샷 간 공유)
+            delta_ids / delta_uids / delta_vectors: base 이후 추가된 벡터와 그 UID 매핑
+            removed: base 이후 삭제된 base의 벡터 ID
+            generation: base를 복제한 원본 인덱스의 세대
+        """
+        self.base = base
+        self.base_stale = base_stale
+        self.base_uids = base_uids
+        self.delta_ids = delta_ids
+        self.delta_uids = delta_uids
+        self.delta_vectors = delta_vectors
+        self.removed = removed
+        self.generation = generation
+
+    def with_changes(self, added_ids, added_uids, added_vectors, removed_ids):
+        """변경을 반영한 새 스냅샷 (delta 배열/매핑은 복사본, base와 base_uids는 공유)"""
+        removed_ids = set(removed_ids)
+        keep = [i for i, vector_id in enumerate(self.delta_ids.tolist()) if vector_id not in removed_ids]
+        delta_uids = {vector_id: uid for vector_id, uid in self.delta_uids.items() if vector_id not in removed_ids}
+        delta_uids.update(zip(added_ids, added_uids))
+        delta_ids = np.concatenate([self.delta_ids[keep], np.asarray(added_ids, dtype=np.int64)])
+        delta_vectors = np.concatenate([self.delta_vectors[keep],
+                                        np.asarray(added_vectors, dtype=np.float32).reshape(
+                                            len(added_ids), self.delta_vectors.shape[1])])
+        in_delta = set(self.delta_ids.tolist())
+        removed = self.removed | frozenset(i for i in removed_ids if i not in in_delta)
+        return ReadSnapshot(self.base, self.base_stale, self.base_uids, delta_ids, delta_uids, delta_vectors,
+                            removed, self.generation)
+
+    def uid(self, vector_id):
+        """이 스냅샷 시점의 벡터 ID -> UID (삭제되었거나 없으면 None)"""
+        if vector_id in self.removed:
+            return None
+        uid = self.delta_uids.get(vector_id)
+        return uid if uid is not None else self.base_uids.get(vector_id)
+
+    def search(self, queries, k):
+        """
+        질의별 [(UID, L2 거리 제곱), ...] (한 강아지의 여러 벡터는 가장 가까운 것 하나만)
+        """
+        candidates = [[] for _ in range(len(queries))]
+
+        if self.base.ntotal:
+            # 삭제된 벡터가 결과를 채우지 않도록 그만큼 더 가져옴
+            fetch = min(k + self.base_stale + len(self.removed), self.base.ntotal)
+            distances, ids = self.base.search(queries, fetch)
+            for row in range(len(queries)):
+                candidates[row].extend(zip(distances[row].tolist(), ids[row].tolist()))
+
+        if len(self.delta_ids):
+            # 추가된 지 얼마 안 된 벡터는 전수 비교 (플러시 사이 벡터 수는 작음)
+            distances = faiss.pairwise_distances(queries, self.delta_vectors)
+            top = np.argsort(distances, axis=1)[:, :k]
+            for row in range(len(queries)):
+                candidates[row].extend((float(distances[row, j]), int(self.delta_ids[j])) for j in top[row])
+
+        results = []
+        for row_candidates in candidates:
+            hits, seen = [], set()
+            for distance, vector_id in sorted(row_candidates):
+                if vector_id < 0:
+                    continue
+                uid = self.uid(vector_id)
+                if uid is None or uid in seen:
+                    continue
+                seen.add(uid)
+                hits.append((uid, distance))
+                if len(hits) == k:
+                    break
+            results.append(hits)
+        return results
+
+
+class NoseIndexService:
+    def __init__(self, store, flush_max=256, flush_interval_ms=2, compact_threshold=4096):
+        """
+        Args:
+            store: PersistentNoseIndex (로그/스냅샷/인덱스 종류 전환 담당)
+            flush_max: 한 번에 기록할 최대 작업 수
+            flush_interval_ms: 첫 작업 이후 더 모을 시간
+            compact_threshold: 스냅샷의 추가/삭제가 이 수를 넘으면 기본 인덱스 다시 복제
+        """
+        self.store = store
+        self.flush_max = max(1, flush_max)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.compact_threshold = compact_threshold
+
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self.counts = {"flushes": 0, "ops": 0, "compactions": 0}
+
+        self._snapshot = self._compact()
+        self._flusher = threading.Thread(target=self._flush_loop, name="index-flush", daemon=True)
+        self._flusher.start()
+
+    def _compact(self):
+        """원본 인덱스를 복제해 변경이 없는 새 스냅샷 생성 (쓰기는 잠시 대기, 읽기는 이전 스냅샷 사용)"""
+        base, base_stale, base_uids, generation = self.store.clone_for_reading()
+        self.counts["compactions"] += 1
+        return ReadSnapshot(base, base_stale, base_uids, np.zeros(0, dtype=np.int64), {},
+                            np.zeros((0, self.store.dim), dtype=np.float32), frozenset(), generation)
+
+    def _submit(self, op):
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Index service is closed")
+            self._pending.append((op, future))
+            self._cond.notify()
+        return future
+
+    def add(self, uids, vectors, timeout=30):
+        """임베딩 추가 (기록되어 검색에 반영될 때까지 대기), 부여된 벡터 ID 리스트 반환"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.store.dim)
+        return self._submit(("add", uids, vectors)).result(timeout)
+
+    def remove(self, uid, timeout=30):
+        """UID의 모든 벡터 삭제 (기록될 때까지 대기), 삭제된 벡터 수 반환"""
+        return len(self._submit(("delete", uid)).result(timeout))
+
+    def search(self, queries, k):
+        """현재 스냅샷에서 잠금 없이 검색"""
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.store.dim)
+        return self._snapshot.search(queries, k)
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+            # 첫 작업 이후 잠시 더 모음
+            if self.flush_interval > 0:
+                time.sleep(self.flush_interval)
+            with self._cond:
+                batch = self._pending[:self.flush_max]
+                del self._pending[:self.flush_max]
+            self._flush(batch)
+
+    def _flush(self, batch):
+        ops = [op for op, _ in batch]
+        try:
+            results = self.store.write_batch(ops)
+        except Exception as e:
+            logger.error(f"Error flushing {len(ops)} index writes: {str(e)}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        added_ids, added_uids, added_vectors, removed_ids = [], [], [], []
+        for (op, _), ids in zip(batch, results):
+            if op[0] == "add":
+                added_ids.extend(ids)
+                added_uids.extend([op[1]] * len(ids) if isinstance(op[1], str) else op[1])
+                added_vectors.append(op[2])
+            else:
+                removed_ids.extend(ids)
+
+        snapshot = self._snapshot
+        if (snapshot.generation != self.store.generation
+                or len(snapshot.delta_ids) + len(added_ids) > self.compact_threshold
+                or len(snapshot.removed) + len(removed_ids) > self.compact_threshold):
+            snapshot = self._compact()
+        else:
+            vectors = (np.concatenate(added_vectors) if added_vectors
+                       else np.zeros((0, self.store.dim), dtype=np.float32))
+            snapshot = snapshot.with_changes(added_ids, added_uids, vectors, removed_ids)
+        # 참조 교체는 원자적이므로 검색 중인 스레드는 이전 스냅샷을 끝까지 사용
+        self._snapshot = snapshot
+        self.counts["flushes"] += 1
+        self.counts["ops"] += len(batch)
+
+        for (_, future), ids in zip(batch, results):
+            future.set_result(ids)
+
+    def close(self):
+        """남은 쓰기를 모두 기록하고 플러시 스레드 종료"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._flusher.join()
+
+    def stats(self):
+        snapshot = self._snapshot
+        return dict(self.counts,
+                    pending=len(self._pending),
+                    snapshot_base_vectors=snapshot.base.ntotal,
+                    snapshot_delta_vectors=len(snapshot.delta_ids),
+                    snapshot_removed=len(snapshot.removed),
+                    avg_batch=round(self.counts["ops"] / self.counts["flushes"], 2) if self.counts["flushes"] else 0.0)
@@ -0,0 +1,129 @@
+"""
+종 분류 + 코 임베딩 추론 엔진
+
+종 분류 모델(ResNet18 + 119 클래스 fc)과 임베딩 모델(ResNet18 평균 풀링 출력)은 같은 구조의 몸통을 사용합니다.
+
+- 모든 추론은 torch.inference_mode에서 실행 (요청마다 autograd 그래프를 만들지 않음)
+- 입력은 channels_last 메모리 형식 (CPU oneDNN 합성곱이 더 빠름)
+- 두 몸통의 가중치가 같으면 몸통 하나만 남기고, 강아지 crop과 코 crop을 한 배치로 묶어 한 번에 실행
+  (강아지 특징 -> 종 분류 fc, 코 특징 -> 임베딩). 가중치가 다르면 몸통별로 한 번씩 실행
+- 선택적으로 TorchScript(trace) 또는 torch.compile 그래프로 변환 (실패하면 eager로 실행)
+
+종 분류 모델은 fine-tuning된 가중치이므로 보통 임베딩 모델과 가중치가 다릅니다.
+임베딩 몸통을 바꾸면 이미 등록된 임베딩과 호환되지 않으므로, 가중치가 같을 때만 몸통을 공유합니다.
+"""
+
+import logging
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+GRAPH_MODES = ("eager", "torchscript", "compile")
+
+
+def resnet_trunk(model):
+    """ResNet에서 마지막 fc를 뺀 몸통 (평균 풀링까지)"""
+    return torch.nn.Sequential(*list(model.children())[:-1])
+
+
+def same_weights(a, b):
+    """두 모듈의 파라미터/버퍼가 모두 같은지 확인"""
+    state_a, state_b = a.state_dict(), b.state_dict()
+    if state_a.keys() != state_b.keys():
+        return False
+    return all(state_a[k].shape == state_b[k].shape and torch.equal(state_a[k], state_b[k].to(state_a[k].device))
+               for k in state_a)
+
+
+class InferenceEngine:
+    def __init__(self, species_model, embed_trunk, transform, device, graph="eager",
+                 channels_last=True, share_backbone="auto"):
+        """
+        Args:
+            species_model: 종 분류 ResNet (마지막 모듈이 fc)
+            embed_trunk: 임베딩 몸통 (입력 -> [N, 512, 1, 1])
+            transform: PIL 이미지 -> 텐서 전처리
+            device: 실행 디바이스
+            graph: "eager" / "torchscript" / "compile"
+            channels_last: channels_last 메모리 형식 사용 여부
+            share_backbone: "auto" (가중치가 같을 때만 공유) / "off"
+        """
+        if graph not in GRAPH_MODES:
+            raise ValueError(f"Unknown graph mode: {graph} (expected one of {', '.join(GRAPH_MODES)})")
+        self.transform = transform
+        self.device = torch.device(device)
+        self.memory_format = torch.channels_last if channels_last else torch.contiguous_format
+
+        species_trunk = resnet_trunk(species_model)
+        self.shared = share_backbone == "auto" and same_weights(species_trunk, embed_trunk)
+        self.species_head = self._prepare(species_model.fc)
+        self.species_trunk = self._prepare(species_trunk)
+        self.embed_trunk = self.species_trunk if self.shared else self._prepare(embed_trunk)
+
+        self.graph = "eager"
+        if graph != "eager":
+            try:
+                self.species_trunk = self._to_graph(self.species_trunk, graph)
+                self.embed_trunk = self.species_trunk if self.shared else self._to_graph(self.embed_trunk, graph)
+                self.graph = graph
+            except Exception as e:
+                logger.warning(f"Could not build {graph} graph, falling back to eager: {str(e)}")
+
+        logger.info(f"Inference engine ready (shared_backbone={self.shared}, graph={self.graph}, "
+                    f"channels_last={channels_last}, device={self.device})")
+
+    def _prepare(self, module):
+        module = module.to(self.device).eval()
+        for param in module.parameters():
+            param.requires_grad_(False)
+        return module.to(memory_format=self.memory_format)
+
+    def _example_input(self):
+        return torch.zeros(1, 3, 224, 224, device=self.device).to(memory_format=self.memory_format)
+
+    def _to_graph(self, module, graph):
+        if graph == "torchscript":
+            with torch.no_grad():
+                traced = torch.jit.trace(module, self._example_input(), check_trace=False)
+            return torch.jit.freeze(traced)
+        compiled = torch.compile(module)
+        # 첫 요청이 컴파일 시간을 떠안지 않도록 미리 한 번 실행
+        with torch.inference_mode():
+            compiled(self._example_input())
+        return compiled
+
+    def _batch(self, images):
+        batch = torch.stack([self.transform(image) for image in images]).to(self.device)
+        return batch.contiguous(memory_format=self.memory_format)
+
+    def forward(self, dog_batch, nose_batch):
+        """
+        전처리된 배치로 (종 클래스 인덱스 리스트, 코 임베딩 텐서) 계산
+
+        몸통을 공유하면 강아지/코 crop을 한 배치로 묶어 한 번만 실행합니다.
+        """
+        with torch.inference_mode():
+            if self.shared:
+                features = self.species_trunk(torch.cat([dog_batch, nose_batch])).flatten(1)
+                dog_features, embeddings = features[:len(dog_batch)], features[len(dog_batch):]
+            else:
+                dog_features = self.species_trunk(dog_batch).flatten(1)
+                embeddings = self.embed_trunk(nose_batch).flatten(1)
+            classes = self.species_head(dog_features).argmax(1).tolist()
+        return classes, embeddings
+
+    def classify_and_embed(self, dog_crops, nose_crops):
+        """강아지 crop 리스트 -> 종 클래스 인덱스 리스트, 코 crop 리스트 -> 임베딩 (numpy float32)"""
+        classes, embeddings = self.forward(self._batch(dog_crops), self._batch(nose_crops))
+        return classes, embeddings.float().cpu().numpy()
+
+    def embed(self, images):
+        """이미지 리스트 -> 임베딩 (numpy float32)"""
+        with torch.inference_mode():
+            embeddings = self.embed_trunk(self._batch(images)).flatten(1)
+        return embeddings.float().cpu().numpy()
+
+    def stats(self):
+        return {"shared_backbone": self.shared, "graph": self.graph,
+                "channels_last": self.memory_format == torch.channels_last, "device": str(self.device)}
@@ -0,0 +1,208 @@
+"""
+Firestore 대역 (테스트/로컬 개발용, FIRESTORE_BACKEND=local)
+
+main.py와 DogCatalog가 사용하는 firestore.Client 기능만 같은 모양으로 제공합니다.
+
+    db.collection(name).document(id).set / update / delete / get
+    db.collection(name).stream()
+    db.collection(name).order_by(field).start_after(...).limit(n).stream()
+    db.batch().set / update / delete / commit
+
+문서는 메모리에 보관하고, 경로를 주면 변경할 때마다 JSON 파일로 저장합니다 (재시작 후에도 유지).
+"""
+
+import json
+import uuid
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_ID = "__name__"
+
+
+class NotFound(Exception):
+    """없는 문서를 update함 (google.api_core.exceptions.NotFound 대역)"""
+    pass
+
+
+class LocalDocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field) if self._data is not None else None
+
+
+class LocalDocumentReference:
+    def __init__(self, client, collection, doc_id):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self):
+        return LocalDocumentSnapshot(self, self._client._read(self._collection, self.id))
+
+    def set(self, data, merge=False):
+        self._client._write([("set", self._collection, self.id, dict(data), merge)])
+
+    def update(self, data):
+        self._client._write([("update", self._collection, self.id, dict(data), True)])
+
+    def delete(self):
+        self._client._write([("delete", self._collection, self.id, None, False)])
+
+
+class LocalQuery:
+    def __init__(self, client, collection, order=DOCUMENT_ID, descending=False, cursor=None, count=None, fields=None):
+        self._client = client
+        self._collection = collection
+        self._order = order
+        self._descending = descending
+        self._cursor = cursor
+        self._count = count
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = dict(order=self._order, descending=self._descending, cursor=self._cursor,
+                     count=self._count, fields=self._fields)
+        state.update(changes)
+        return LocalQuery(self._client, self._collection, **state)
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(order=str(field), descending=direction == "DESCENDING")
+
+    def start_after(self, cursor):
+        """cursor: 문서 스냅샷 또는 {정렬 필드: 값} (문서 ID는 문자열 또는 문서 참조)"""
+        if isinstance(cursor, LocalDocumentSnapshot):
+            value = cursor.id if self._order == DOCUMENT_ID else cursor.get(self._order)
+        else:
+            value = cursor[self._order]
+            if isinstance(value, LocalDocumentReference):
+                value = value.id
+        return self._copy(cursor=value)
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def stream(self):
+        # Firestore와 같이 정렬 필드가 없는 문서는 제외
+        rows = []
+        for doc_id, data in self._client._documents(self._collection).items():
+            if self._order == DOCUMENT_ID:
+                rows.append((doc_id, doc_id, data))
+            elif data.get(self._order) is not None:
+                rows.append((data[self._order], doc_id, data))
+        rows.sort(key=lambda row: (row[0], row[1]), reverse=self._descending)
+        if self._cursor is not None:
+            rows = [row for row in rows if (row[0] < self._cursor if self._descending else row[0] > self._cursor)]
+        if self._count is not None:
+            rows = rows[:self._count]
+        with self._client._lock:
+            self._client.counts["reads"] += len(rows)
+        for _, doc_id, data in rows:
+            if self._fields is not None:
+                data = {k: v for k, v in data.items() if k in self._fields}
+            yield LocalDocumentSnapshot(LocalDocumentReference(self._client, self._collection, doc_id), data)
+
+
+class LocalCollection(LocalQuery):
+    def __init__(self, client, name):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, doc_id=None):
+        return LocalDocumentReference(self._client, self.id, doc_id or uuid.uuid4().hex)
+
+
+class LocalWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(("set", reference._collection, reference.id, dict(data), merge))
+
+    def update(self, reference, data):
+        self._ops.append(("update", reference._collection, reference.id, dict(data), True))
+
+    def delete(self, reference):
+        self._ops.append(("delete", reference._collection, reference.id, None, False))
+
+    def commit(self):
+        """모든 쓰기를 한 번에 적용 (하나라도 실패하면 아무것도 적용하지 않음)"""
+        self._client._write(self._ops)
+        self._ops = []
+
+
+class LocalFirestore:
+    def __init__(self, path=None):
+        """
+        Args:
+            path: 저장할 JSON 파일 경로 (None이면 메모리에만 보관)
+        """
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._collections = {}
+        self.counts = {"reads": 0, "writes": 0}   # 읽은/쓴 문서 수 (캐시 동작 확인용)
+        if self.path is not None and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._collections = json.load(f)
+            logger.info(f"Loaded local Firestore from {self.path}")
+
+    def collection(self, name):
+        return LocalCollection(self, name)
+
+    def batch(self):
+        return LocalWriteBatch(self)
+
+    def _read(self, collection, doc_id):
+        with self._lock:
+            self.counts["reads"] += 1
+            data = self._collections.get(collection, {}).get(doc_id)
+            return dict(data) if data is not None else None
+
+    def _documents(self, collection):
+        with self._lock:
+            return {doc_id: dict(data) for doc_id, data in self._collections.get(collection, {}).items()}
+
+    def _write(self, ops):
+        with self._lock:
+            existing = {c: set(docs) for c, docs in self._collections.items()}
+            for op, collection, doc_id, _, _ in ops:
+                ids = existing.setdefault(collection, set())
+                if op == "update" and doc_id not in ids:
+                    raise NotFound(f"No document to update: {collection}/{doc_id}")
+                (ids.discard if op == "delete" else ids.add)(doc_id)
+            for op, collection, doc_id, data, merge in ops:
+                docs = self._collections.setdefault(collection, {})
+                if op == "delete":
+                    docs.pop(doc_id, None)
+                elif merge and doc_id in docs:
+                    docs[doc_id].update(data)
+                else:
+                    docs[doc_id] = data
+            self.counts["writes"] += len(ops)
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._collections, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
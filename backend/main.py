@@ -1,13 +1,26 @@
 # ✅ main.py (최종 버전: 종 분류 + 코 임베딩 저장/검색)
 
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from PIL import Image
-import io, torch, uuid, numpy as np
+import io, time, torch, uuid, logging, numpy as np
+from typing import List, Optional
 from torchvision import models, transforms
 from ultralytics import YOLO
 from firebase_admin import credentials, initialize_app, storage, firestore
-import faiss
+
+from config import Config
+from vector_index import PersistentNoseIndex
+from index_service import NoseIndexService
+from index_factory import IndexParams, INDEX_TYPES
+from uploads import UploadQueue, UploadQueueFull, FirebaseBucket, LocalBucket, encode_jpeg
+from inference import InferenceEngine
+from local_firestore import LocalFirestore
+from dog_catalog import DogCatalog
+
+logger = logging.getLogger(__name__)
 
 # 앱 및 미들웨어 초기화
 app = FastAPI()
@@ -19,10 +32,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Firebase 초기화
-cred = credentials.Certificate("firebase_key.json")
-initialize_app(cred, {"storageBucket": "your-bucket-name.appspot.com"})
-db = firestore.client()
+# Firebase 초기화 (Firestore/Storage 모두 local이면 생략)
+if Config.FIRESTORE_BACKEND != "local" or Config.STORAGE_BACKEND != "local":
+    cred = credentials.Certificate(Config.FIREBASE_KEY_PATH)
+    initialize_app(cred, {"storageBucket": Config.FIREBASE_BUCKET})
+db = LocalFirestore(Config.LOCAL_FIRESTORE_PATH) if Config.FIRESTORE_BACKEND == "local" else firestore.client()
+
+# 강아지 메타데이터 커서 페이지 조회 + 읽기 캐시 (쓰기 후 dog_catalog.invalidate(uid) 필수)
+dog_catalog = DogCatalog(db, "dogs", page_size=Config.ADMIN_LIST_PAGE_SIZE,
+                         max_page_size=Config.ADMIN_LIST_MAX_PAGE_SIZE, ttl_s=Config.DOG_CACHE_TTL_S,
+                         max_pages=Config.DOG_CACHE_MAX_PAGES, max_docs=Config.DOG_CACHE_MAX_DOCS)
+
+# crop 업로드 대기열 (요청은 업로드를 기다리지 않음, STORAGE_BACKEND=local이면 파일 시스템에 저장)
+if Config.STORAGE_BACKEND == "local":
+    bucket = LocalBucket(Config.LOCAL_BUCKET_DIR, Config.LOCAL_BUCKET_URL)
+    app.mount(Config.LOCAL_BUCKET_URL, StaticFiles(directory=Config.LOCAL_BUCKET_DIR), name="local_bucket")
+else:
+    bucket = FirebaseBucket(storage.bucket())
+upload_queue = UploadQueue(bucket, max_size=Config.UPLOAD_QUEUE_SIZE, workers=Config.UPLOAD_WORKERS,
+                           max_retries=Config.UPLOAD_MAX_RETRIES, retry_backoff_s=Config.UPLOAD_RETRY_BACKOFF_S)
 
 # 모델 및 디바이스 설정
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -30,7 +58,6 @@ yolo_model = YOLO("yolov8n.pt")
 species_model = models.resnet18()
 species_model.fc = torch.nn.Linear(species_model.fc.in_features, 119)  # 119 클래스 기준으로 수정
 species_model.load_state_dict(torch.load("dog_species_classifier.pt", map_location=device))
-species_model.eval().to(device)
 
 # 클래스 목록 불러오기
 with open("class_names.txt", "r") as f:
@@ -52,23 +79,37 @@ class Embedder(torch.nn.Module):
         x = self.feature(x)
         return x.view(x.size(0), -1)
 
-embedder = Embedder().to(device).eval()
+embedder = Embedder()
 
-# FAISS 설정
-index = faiss.IndexFlatL2(512)
-embedding_map = {}  # idx -> UID 매핑
+# 추론 엔진 (inference mode + channels_last, 두 몸통의 가중치가 같으면 한 번의 forward로 처리)
+engine = InferenceEngine(species_model, embedder.feature, transform, device,
+                         graph=Config.INFERENCE_GRAPH, channels_last=Config.INFERENCE_CHANNELS_LAST,
+                         share_backbone=Config.INFERENCE_SHARE_BACKBONE)
 
-# 🐶 분석 엔드포인트
-@app.post("/analyze")
-async def analyze_dog(file: UploadFile = File(...)):
-    img_bytes = await file.read()
-    image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-    np_img = np.array(image)
+# FAISS 설정 (스냅샷 + 쓰기 전 로그로 재시작 후에도 유지, UID 단위 삭제 지원)
+nose_index = PersistentNoseIndex(Config.INDEX_DIR, dim=Config.EMBEDDING_DIM,
+                                 snapshot_every=Config.INDEX_SNAPSHOT_EVERY,
+                                 snapshot_interval_s=Config.INDEX_SNAPSHOT_INTERVAL_S,
+                                 fsync=Config.INDEX_FSYNC,
+                                 index_type=Config.INDEX_TYPE, tiers=Config.INDEX_TIERS,
+                                 params=IndexParams.from_config(Config),
+                                 rebuild_tombstone_ratio=Config.INDEX_REBUILD_TOMBSTONE_RATIO)
+# 핸들러에서는 이 계층만 사용 (등록/삭제는 모아서 기록, 검색은 잠금 없는 스냅샷에서 스레드 풀로 실행)
+index_service = NoseIndexService(nose_index, flush_max=Config.INDEX_FLUSH_MAX,
+                                 flush_interval_ms=Config.INDEX_FLUSH_INTERVAL_MS,
+                                 compact_threshold=Config.INDEX_COMPACT_THRESHOLD)
 
-    results = yolo_model(np_img)
-    boxes = [b for b in results[0].boxes if int(b.cls[0]) == 16]  # class 16 = dog
+@app.on_event("shutdown")
+def save_index():
+    upload_queue.drain(Config.UPLOAD_DRAIN_TIMEOUT_S)
+    index_service.close()
+    nose_index.close()
+
+# 🐶 강아지/코 영역 crop (YOLO 결과 한 장 기준)
+def crop_dog_and_nose(image, result):
+    boxes = [b for b in result.boxes if int(b.cls[0]) == 16]  # class 16 = dog
     if len(boxes) != 1:
-        return {"error": f"강아지 수: {len(boxes)}. 1마리만 포함된 이미지를 업로드해주세요."}
+        return None, None, f"강아지 수: {len(boxes)}. 1마리만 포함된 이미지를 업로드해주세요."
 
     x1, y1, x2, y2 = map(int, boxes[0].xyxy[0].tolist())
     w, h = x2 - x1, y2 - y1
@@ -82,59 +123,256 @@ async def analyze_dog(file: UploadFile = File(...)):
     nose_side = int(min(w, h) * 0.2)
     nose_box = [max(0, nose_cx - nose_side//2), max(0, nose_cy - nose_side//2), min(image.width, nose_cx + nose_side//2), min(image.height, nose_cy + nose_side//2)]
     nose_crop = image.crop(nose_box)
+    return dog_crop, nose_crop, None
+
+# Firebase 업로드 (메모리에서 JPEG 인코딩 후 대기열에 넣고 업로드될 URL을 바로 반환)
+def crop_blob_names(uid):
+    return f"cropped/{uid}_dog.jpg", f"cropped/{uid}_nose.jpg"
+
+def upload_crops(uid, dog_crop, nose_crop):
+    dog_name, nose_name = crop_blob_names(uid)
+    upload_queue.submit(uid, [(dog_name, encode_jpeg(dog_crop)), (nose_name, encode_jpeg(nose_crop))],
+                        on_done=mark_uploaded)
+    return upload_queue.public_url(dog_name), upload_queue.public_url(nose_name)
+
+def mark_uploaded(uid, ok, error):
+    try:
+        db.collection("dogs").document(uid).update({"upload_status": "done" if ok else "failed"})
+    except Exception as e:  # 업로드 중 삭제된 강아지
+        logger.warning(f"업로드 상태 갱신 실패 ({uid}): {e}")
+    dog_catalog.invalidate(uid)
+
+async def rollback_dog(uid):
+    # 인덱스에서 먼저 제거 (Firestore가 실패 중이어도 문서 없는 uid가 검색되지 않도록)
+    await run_in_threadpool(index_service.remove, uid)
+    try:
+        await run_in_threadpool(db.collection("dogs").document(uid).delete)
+    except Exception as e:
+        logger.warning(f"등록 취소 중 문서 삭제 실패 ({uid}): {e}")
+    dog_catalog.invalidate(uid)
+
+# 종 분류 + 코 임베딩 (crop 여러 장을 한 번의 forward로 처리)
+def classify_and_embed(dog_crops, nose_crops):
+    classes, embs = engine.classify_and_embed(dog_crops, nose_crops)
+    return [target_classes[i] for i in classes], embs
+
+# 🐶 분석 엔드포인트
+# YOLO/종 분류 forward, Firestore 쓰기, JPEG 인코딩은 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+@app.post("/analyze")
+async def analyze_dog(file: UploadFile = File(...)):
+    img_bytes = await file.read()
+    image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    np_img = np.array(image)
+
+    results = await run_in_threadpool(yolo_model, np_img)
+    dog_crop, nose_crop, error = crop_dog_and_nose(image, results[0])
+    if error:
+        return {"error": error}
 
     uid = str(uuid.uuid4())
-    dog_crop.save("tmp_dog.jpg")
-    nose_crop.save("tmp_nose.jpg")
-
-    # Firebase 업로드
-    bucket = storage.bucket()
-    blob1 = bucket.blob(f"cropped/{uid}_dog.jpg")
-    blob1.upload_from_filename("tmp_dog.jpg")
-    blob2 = bucket.blob(f"cropped/{uid}_nose.jpg")
-    blob2.upload_from_filename("tmp_nose.jpg")
-
-    # 종 분류
-    species_tensor = transform(dog_crop).unsqueeze(0).to(device)
-    species = target_classes[species_model(species_tensor).argmax(1).item()]
-
-    # 코 임베딩 저장
-    nose_tensor = transform(nose_crop).unsqueeze(0).to(device)
-    emb = embedder(nose_tensor).cpu().numpy()
-    index.add(emb)
-    embedding_map[index.ntotal - 1] = uid
-
-    db.collection("dogs").document(uid).set({
-        "species": species,
-        "dog_img_url": blob1.public_url,
-        "nose_img_url": blob2.public_url
-    })
+    dog_name, nose_name = crop_blob_names(uid)
+    dog_img_url, nose_img_url = upload_queue.public_url(dog_name), upload_queue.public_url(nose_name)
+
+    # 종 분류 + 코 임베딩 저장
+    species, emb = await run_in_threadpool(classify_and_embed, [dog_crop], [nose_crop])
+    species = species[0]
+    await run_in_threadpool(index_service.add, uid, emb)
+
+    # 문서 쓰기가 실패하면 인덱스에서도 제거 (문서 없는 uid가 /match에 나오지 않도록)
+    try:
+        await run_in_threadpool(db.collection("dogs").document(uid).set, {
+            "species": species,
+            "dog_img_url": dog_img_url,
+            "nose_img_url": nose_img_url,
+            "upload_status": "pending"
+        })
+    except Exception:
+        await rollback_dog(uid)
+        raise
+    dog_catalog.invalidate(uid)
+
+    # crop 업로드는 백그라운드로 (대기열이 가득 차면 등록 취소)
+    try:
+        await run_in_threadpool(upload_crops, uid, dog_crop, nose_crop)
+    except UploadQueueFull as e:
+        await rollback_dog(uid)
+        raise HTTPException(status_code=503, detail=str(e))
 
     return {
         "uid": uid,
         "species": species,
-        "dog_img_url": blob1.public_url,
-        "nose_img_url": blob2.public_url
+        "dog_img_url": dog_img_url,
+        "nose_img_url": nose_img_url,
+        "upload_status": "pending"
     }
 
+# 🐶🐶 여러 장 일괄 분석 (보호소 등 대량 등록)
+@app.post("/analyze_batch")
+async def analyze_dog_batch(files: List[UploadFile] = File(...)):
+    if len(files) > Config.ANALYZE_BATCH_MAX_IMAGES:
+        return {"error": f"한 번에 최대 {Config.ANALYZE_BATCH_MAX_IMAGES}장까지 업로드할 수 있습니다."}
+
+    results = [{"index": i, "filename": f.filename} for i, f in enumerate(files)]
+    images = {}
+    for i, f in enumerate(files):
+        try:
+            images[i] = Image.open(io.BytesIO(await f.read())).convert("RGB")
+        except Exception as e:
+            results[i]["error"] = f"이미지를 읽을 수 없습니다: {e}"
+
+    # YOLO는 모든 이미지를 한 번에 추론
+    valid = list(images)
+    crops = {}
+    if valid:
+        detections = await run_in_threadpool(yolo_model, [np.array(images[i]) for i in valid])
+        for i, result in zip(valid, detections):
+            dog_crop, nose_crop, error = crop_dog_and_nose(images[i], result)
+            if error:
+                results[i]["error"] = error
+            else:
+                crops[i] = (dog_crop, nose_crop)
+
+    ok = list(crops)
+    if not ok:
+        return {"results": results, "registered": 0}
+
+    # 종 분류/코 임베딩은 crop 전체를 한 번의 forward로, 인덱스에는 한 번에 추가
+    species, embs = await run_in_threadpool(classify_and_embed, [crops[i][0] for i in ok], [crops[i][1] for i in ok])
+    uids = {i: str(uuid.uuid4()) for i in ok}
+    await run_in_threadpool(index_service.add, [uids[i] for i in ok], embs)
+
+    batch = db.batch()
+    for row, i in enumerate(ok):
+        uid = uids[i]
+        dog_img_url, nose_img_url = (upload_queue.public_url(name) for name in crop_blob_names(uid))
+        batch.set(db.collection("dogs").document(uid), {
+            "species": species[row],
+            "dog_img_url": dog_img_url,
+            "nose_img_url": nose_img_url,
+            "upload_status": "pending"
+        })
+        results[i].update({
+            "uid": uid,
+            "species": species[row],
+            "dog_img_url": dog_img_url,
+            "nose_img_url": nose_img_url,
+            "upload_status": "pending"
+        })
+    try:
+        await run_in_threadpool(batch.commit)
+    except Exception:
+        for uid in uids.values():
+            await rollback_dog(uid)
+        raise
+    dog_catalog.invalidate(*uids.values())
+
+    # crop 업로드는 백그라운드로 (대기열이 가득 차면 해당 이미지만 등록 취소)
+    for i in ok:
+        try:
+            await run_in_threadpool(upload_crops, uids[i], *crops[i])
+        except UploadQueueFull as e:
+            await rollback_dog(uids[i])
+            for key in ("uid", "species", "dog_img_url", "nose_img_url", "upload_status"):
+                results[i].pop(key)
+            results[i]["error"] = str(e)
+
+    return {"results": results, "registered": sum(1 for r in results if "uid" in r)}
+
 # 🔍 유실견 검색
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000.0, 2)
+
 @app.post("/match")
-async def match_dog(file: UploadFile = File(...)):
+async def match_dog(file: UploadFile = File(...), k: Optional[int] = None):
+    # k: 반환할 후보 수
+    started = time.perf_counter()
+    timings = {}
     img_bytes = await file.read()
     image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-    tensor = transform(image).unsqueeze(0).to(device)
-    query_emb = embedder(tensor).cpu().numpy()
-    D, I = index.search(query_emb, 3)
-    matches = [embedding_map[i] for i in I[0] if i in embedding_map]
-    return {"matches": matches}
+
+    # /analyze와 같은 YOLO 검출 + 코 crop
+    start = time.perf_counter()
+    results = await run_in_threadpool(yolo_model, np.array(image))
+    dog_crop, nose_crop, error = crop_dog_and_nose(image, results[0])
+    timings["detect_ms"] = elapsed_ms(start)
+    if error:
+        return {"error": error, "matches": [], "candidates": [], "timings_ms": timings}
+
+    k = min(max(1, k or Config.MATCH_TOP_K), Config.MATCH_MAX_K)
+
+    # 코 crop 임베딩으로 인덱스에서 가까운 강아지 검색 (/analyze가 저장하는 임베딩과 같은 입력)
+    start = time.perf_counter()
+    query_emb = await run_in_threadpool(engine.embed, [nose_crop])
+    timings["embed_ms"] = elapsed_ms(start)
+
+    start = time.perf_counter()
+    hits = (await run_in_threadpool(index_service.search, query_emb, k))[0]
+    timings["search_ms"] = elapsed_ms(start)
+    candidates = [{"uid": uid, "distance": round(float(distance), 4)} for uid, distance in hits]
+
+    start = time.perf_counter()
+    details = await run_in_threadpool(dog_catalog.get_many, [c["uid"] for c in candidates])
+    for c in candidates:
+        dog = details.get(c["uid"], {})
+        c.update(species=dog.get("species"), dog_img_url=dog.get("dog_img_url"), nose_img_url=dog.get("nose_img_url"))
+    timings["details_ms"] = elapsed_ms(start)
+    timings["total_ms"] = elapsed_ms(started)
+
+    return {
+        "matches": [c["uid"] for c in candidates],
+        "candidates": candidates,
+        "timings_ms": timings
+    }
 
 # 🔧 관리자 API
 @app.get("/admin/list")
-def list_dogs():
-    docs = db.collection("dogs").stream()
-    return [{**doc.to_dict(), "uid": doc.id} for doc in docs]
+def list_dogs(cursor: Optional[str] = None, limit: Optional[int] = None, fields: Optional[str] = None):
+    # uid 순서 커서 페이지 (fields: 쉼표로 구분한 응답 필드, uid는 항상 포함)
+    if limit is not None and not 1 <= limit <= Config.ADMIN_LIST_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit은 1 ~ {Config.ADMIN_LIST_MAX_PAGE_SIZE} 사이여야 합니다.")
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    return dog_catalog.page(cursor, limit, field_list)
 
 @app.delete("/admin/delete/{uid}")
 def delete_dog(uid: str):
     db.collection("dogs").document(uid).delete()
-    return {"deleted": uid}
+    dog_catalog.invalidate(uid)
+    removed = index_service.remove(uid)
+    return {"deleted": uid, "vectors_removed": removed}
+
+@app.get("/uploads/{uid}")
+def upload_status(uid: str):
+    status = upload_queue.status(uid)
+    if status is None:
+        dog = dog_catalog.get(uid)
+        if dog is None:
+            raise HTTPException(status_code=404, detail="등록되지 않은 uid입니다.")
+        return {"uid": uid, "status": dog.get("upload_status", "done")}
+    return {"uid": uid, **status}
+
+@app.get("/admin/uploads")
+def upload_stats():
+    return upload_queue.stats()
+
+@app.get("/admin/index")
+def index_stats():
+    return {**nose_index.stats(), "service": index_service.stats()}
+
+@app.get("/admin/catalog")
+def catalog_stats():
+    return dog_catalog.stats()
+
+@app.get("/admin/inference")
+def inference_stats():
+    return engine.stats()
+
+@app.post("/admin/index/migrate")
+def migrate_index(index_type: str = "auto"):
+    if index_type != "auto" and index_type not in INDEX_TYPES:
+        return {"error": f"index_type은 auto 또는 {', '.join(INDEX_TYPES)} 중 하나여야 합니다."}
+    target = nose_index.target_type() if index_type == "auto" else index_type
+    try:
+        migrated = nose_index.migrate(target)
+    except RuntimeError as e:
+        return {"error": str(e)}
+    return {"migrated": migrated, **nose_index.stats()}
@@ -0,0 +1,191 @@
+"""
+crop 이미지 백그라운드 업로드 (요청 경로에서 Firebase Storage 업로드 제거)
+
+crop은 메모리에서 JPEG로 인코딩해 제한된 크기의 업로드 대기열에 넣고, 워커 스레드가 재시도하며 업로드합니다.
+blob 이름은 uid로 정해지므로 재시도해도 같은 blob을 덮어쓸 뿐 중복 파일이 생기지 않고,
+공개 URL도 업로드 전에 미리 알 수 있어 응답은 업로드를 기다리지 않고 바로 반환합니다.
+
+테스트/로컬 개발용으로 Firebase 대신 파일 시스템에 저장하는 LocalBucket을 제공합니다.
+"""
+
+import io
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class UploadQueueFull(Exception):
+    """업로드 대기열이 가득 참"""
+    pass
+
+
+def encode_jpeg(image, quality=90):
+    """PIL 이미지를 JPEG 바이트로 인코딩 (임시 파일 없이)"""
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+class FirebaseBucket:
+    def __init__(self, bucket):
+        """firebase_admin.storage 버킷 래퍼"""
+        self.bucket = bucket
+
+    def public_url(self, name):
+        return self.bucket.blob(name).public_url
+
+    def upload(self, name, data, content_type="image/jpeg"):
+        from google.api_core.exceptions import PreconditionFailed
+
+        try:
+            # 아직 없는 blob만 생성 (응답을 못 받은 업로드를 재시도할 때 이미 올라간 경우 성공으로 처리)
+            self.bucket.blob(name).upload_from_string(data, content_type=content_type, if_generation_match=0)
+        except PreconditionFailed:
+            logger.info(f"Blob {name} already uploaded")
+
+
+class LocalBucket:
+    def __init__(self, root, base_url=""):
+        """
+        파일 시스템 버킷 (Firebase Storage 대역)
+
+        Args:
+            root: 저장 경로
+            base_url: 공개 URL 접두사 (비우면 file:// URL)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+
+    def public_url(self, name):
+        if self.base_url:
+            return f"{self.base_url}/{name}"
+        return (self.root / name).resolve().as_uri()
+
+    def upload(self, name, data, content_type="image/jpeg"):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+
+class UploadQueue:
+    def __init__(self, bucket, max_size=256, workers=4, max_retries=5, retry_backoff_s=0.5, history=10000):
+        """
+        Args:
+            bucket: upload(name, data) / public_url(name)을 제공하는 버킷
+            max_size: 대기 중인 업로드 작업 최대 수 (초과 시 UploadQueueFull)
+            workers: 업로드 워커 스레드 수
+            max_retries: blob별 최대 재시도 횟수
+            retry_backoff_s: 재시도 대기 시간 (시도마다 2배)
+            history: 상태를 보관할 최근 작업 수
+        """
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self.history = history
+        self._queue = queue.Queue(maxsize=max_size)
+        self._status = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"submitted": 0, "done": 0, "failed": 0, "retries": 0, "rejected": 0}
+        self._workers = [threading.Thread(target=self._worker, name=f"upload-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for worker in self._workers:
+            worker.start()
+
+    def public_url(self, name):
+        return self.bucket.public_url(name)
+
+    def submit(self, key, blobs, on_done=None):
+        """
+        업로드 작업 추가 (대기열이 가득 차면 UploadQueueFull)
+
+        Args:
+            key: 작업 키 (uid)
+            blobs: [(blob 이름, 바이트), ...]
+            on_done: 완료 시 호출할 콜백 on_done(key, 성공 여부, 에러)
+        """
+        blobs = list(blobs)
+        # 워커가 바로 끝내도 done/failed가 pending으로 덮이지 않도록 대기열에 넣기 전에 상태 기록
+        pending = {"status": "pending", "blobs": [name for name, _ in blobs]}
+        with self._lock:
+            previous = self._status.get(key)
+            self._set_status(key, pending)
+        try:
+            self._queue.put_nowait((key, blobs, on_done))
+        except queue.Full:
+            with self._lock:
+                self.counts["rejected"] += 1
+                if self._status.get(key) is pending:
+                    if previous is None:
+                        del self._status[key]
+                    else:
+                        self._set_status(key, previous)
+            raise UploadQueueFull(f"Upload queue is full ({self._queue.maxsize} pending)")
+        with self._lock:
+            self.counts["submitted"] += 1
+
+    def _set_status(self, key, status):
+        self._status[key] = status
+        self._status.move_to_end(key)
+        while len(self._status) > self.history:
+            self._status.popitem(last=False)
+
+    def status(self, key):
+        with self._lock:
+            status = self._status.get(key)
+            return dict(status) if status is not None else None
+
+    def _upload_with_retry(self, name, data):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.bucket.upload(name, data)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.counts["retries"] += 1
+                delay = self.retry_backoff_s * (2 ** attempt)
+                logger.warning(f"Upload of {name} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _worker(self):
+        while True:
+            key, blobs, on_done = self._queue.get()
+            error = None
+            try:
+                for name, data in blobs:
+                    self._upload_with_retry(name, data)
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Upload of {key} failed: {error}")
+            with self._lock:
+                self.counts["failed" if error else "done"] += 1
+                self._set_status(key, {"status": "failed" if error else "done",
+                                       "blobs": [name for name, _ in blobs], "error": error})
+            if on_done is not None:
+                try:
+                    on_done(key, error is None, error)
+                except Exception as e:
+                    logger.error(f"Upload callback for {key} failed: {str(e)}")
+            self._queue.task_done()
+
+    def drain(self, timeout=30):
+        """대기 중인 업로드가 끝날 때까지 대기 (종료 시), 모두 끝났으면 True"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, pending=self._queue.unfinished_tasks, max_size=self._queue.maxsize)
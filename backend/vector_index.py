@@ -0,0 +1,458 @@
+"""
+코 임베딩 FAISS 인덱스 (재시작/비정상 종료에도 유지되는 저장소)
+
+벡터는 정수 ID로 인덱스에 저장하고, ID <-> 강아지 UID 매핑을 함께 관리합니다.
+모든 추가/삭제는 먼저 쓰기 전 로그(WAL)에 기록한 뒤 인덱스에 반영하며, 로그가 쌓이면 인덱스 전체를
+스냅샷으로 저장하고 로그를 비웁니다. 시작 시에는 스냅샷을 읽고 그 이후의 로그만 다시 적용하므로
+저장된 이미지를 다시 임베딩하지 않습니다.
+
+등록 수가 설정된 구간을 넘으면 백그라운드에서 더 큰 규모에 맞는 인덱스(index_factory.py)를 학습/구성하고,
+그동안의 검색은 기존 인덱스로 계속 처리한 뒤 준비가 끝나면 교체합니다.
+
+저장 파일 (index_dir):
+    index.faiss      스냅샷 인덱스
+    index_meta.json  스냅샷 시점의 ID -> UID 매핑과 다음 ID
+    wal.log          스냅샷 이후의 추가/삭제 기록 (레코드마다 CRC32)
+"""
+
+import os
+import json
+import time
+import struct
+import zlib
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+from index_factory import (IndexParams, build_index, configure_search, supports_remove,
+                           target_index_type, index_memory_bytes)
+
+logger = logging.getLogger(__name__)
+
+# WAL 레코드: 헤더(작업, 벡터 ID, 본문 길이) + 본문(UID 길이, UID, float32 벡터) + CRC32
+_HEADER = struct.Struct("<cqI")
+_UID_LEN = struct.Struct("<H")
+_CRC = struct.Struct("<I")
+OP_ADD = b"A"
+OP_DELETE = b"D"
+
+
+class WriteAheadLog:
+    def __init__(self, path, fsync=True):
+        """추가 전용 로그 파일 (마지막 레코드가 잘린 경우 읽을 때 잘라냄)"""
+        self.path = Path(path)
+        self.fsync = fsync
+        self.records = 0
+        self._file = None
+
+    def replay(self, dim):
+        """
+        로그의 유효한 레코드를 순서대로 반환하고, 손상된 꼬리는 잘라낸 뒤 추가 모드로 엶
+
+        Returns:
+            [(작업, 벡터 ID, UID, 벡터 또는 None), ...]
+        """
+        records = []
+        good_offset = 0
+        if self.path.exists():
+            data = self.path.read_bytes()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                op, vector_id, length = _HEADER.unpack_from(data, offset)
+                end = offset + _HEADER.size + length + _CRC.size
+                if end > len(data):
+                    break
+                body = data[offset + _HEADER.size:end - _CRC.size]
+                (crc,) = _CRC.unpack_from(data, end - _CRC.size)
+                if crc != zlib.crc32(data[offset:end - _CRC.size]):
+                    break
+                (uid_len,) = _UID_LEN.unpack_from(body)
+                uid = body[_UID_LEN.size:_UID_LEN.size + uid_len].decode("utf-8")
+                vector = None
+                if op == OP_ADD:
+                    vector = np.frombuffer(body, dtype=np.float32, offset=_UID_LEN.size + uid_len).copy()
+                    if vector.size != dim:
+                        break
+                records.append((op, vector_id, uid, vector))
+                offset = good_offset = end
+            if good_offset < len(data):
+                logger.warning(f"Truncating {len(data) - good_offset} corrupt bytes at the end of {self.path}")
+                with open(self.path, "r+b") as f:
+                    f.truncate(good_offset)
+
+        self.records = len(records)
+        self._file = open(self.path, "ab")
+        return records
+
+    def append(self, entries):
+        """[(작업, 벡터 ID, UID, 벡터 또는 None), ...]를 한 번의 쓰기로 기록"""
+        chunks = []
+        for op, vector_id, uid, vector in entries:
+            uid_bytes = uid.encode("utf-8")
+            body = _UID_LEN.pack(len(uid_bytes)) + uid_bytes
+            if vector is not None:
+                body += np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+            record = _HEADER.pack(op, vector_id, len(body)) + body
+            chunks.append(record + _CRC.pack(zlib.crc32(record)))
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records += len(entries)
+
+    def reset(self):
+        """스냅샷 저장 후 로그 비우기"""
+        self._file.close()
+        self._file = open(self.path, "wb")
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class PersistentNoseIndex:
+    def __init__(self, index_dir, dim=512, snapshot_every=1000, snapshot_interval_s=300, fsync=True,
+                 index_type="auto", tiers=(), params=None, rebuild_tombstone_ratio=0.2):
+        """
+        Args:
+            index_dir: 스냅샷/로그 저장 경로
+            dim: 임베딩 차원
+            snapshot_every: 로그 레코드가 이 수 이상 쌓이면 스냅샷 저장
+            snapshot_interval_s: 변경이 있으면 이 주기로 스냅샷 저장 (0이면 끔)
+            fsync: 로그 기록마다 디스크 동기화 여부
+            index_type: "auto"(tiers에 따라 자동 전환) 또는 고정 인덱스 종류
+            tiers: [(최소 벡터 수, 인덱스 종류), ...]
+            params: IndexParams (IVF/PQ/HNSW 파라미터)
+            rebuild_tombstone_ratio: 즉시 삭제가 안 되는 인덱스(HNSW)에서 삭제된 벡터 비율이
+                이 값을 넘으면 재구성
+        """
+        self.dir = Path(index_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.snapshot_every = snapshot_every
+        self.configured_type = index_type
+        self.tiers = [tuple(tier) for tier in tiers]
+        self.params = params or IndexParams()
+        self.rebuild_tombstone_ratio = rebuild_tombstone_ratio
+        self.index_type = "flat"
+        # 백그라운드 전환 중에 들어온 추가/삭제 (새 인덱스에 다시 적용)
+        self._migrating = False
+        self._migration_ops = None
+        self.migrations = []
+        # 인덱스 객체가 교체될 때마다 증가 (읽기 복제본 갱신 기준)
+        self.generation = 0
+        self.index_path = self.dir / "index.faiss"
+        self.meta_path = self.dir / "index_meta.json"
+
+        self._lock = threading.RLock()
+        self.id_to_uid = {}
+        self.uid_to_ids = {}
+        self.next_id = 0
+        self.last_snapshot_at = None
+
+        start = time.perf_counter()
+        self.index = self._load_snapshot()
+        self.wal = WriteAheadLog(self.dir / "wal.log", fsync=fsync)
+        replayed = self.wal.replay(dim)
+        for op, vector_id, uid, vector in replayed:
+            if op == OP_ADD:
+                self._apply_add([vector_id], [uid], vector[None])
+            else:
+                self._apply_delete([vector_id])
+        self.load_time = round(time.perf_counter() - start, 3)
+        logger.info(f"Loaded nose index from {self.dir}: {len(self)} vectors "
+                    f"({len(replayed)} log records replayed, {self.load_time}s)")
+
+        self._stop = threading.Event()
+        if snapshot_interval_s > 0:
+            threading.Thread(target=self._snapshot_loop, args=(snapshot_interval_s,),
+                             name="index-snapshot", daemon=True).start()
+        # 설정이 바뀌었거나 로그 재적용으로 구간을 넘었으면 시작 직후 전환
+        self._maybe_migrate()
+
+    def _load_snapshot(self):
+        if not (self.index_path.exists() and self.meta_path.exists()):
+            return build_index("flat", self.dim, None)
+        index = faiss.read_index(str(self.index_path))
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.index_type = meta.get("index_type", "flat")
+        configure_search(index, self.index_type, self.params)
+        self.next_id = meta["next_id"]
+        self.id_to_uid = {int(vector_id): uid for vector_id, uid in meta["ids"].items()}
+        for vector_id, uid in self.id_to_uid.items():
+            self.uid_to_ids.setdefault(uid, []).append(vector_id)
+        self.last_snapshot_at = meta.get("saved_at")
+        return index
+
+    def _apply_add(self, ids, uids, vectors):
+        # 로그 재적용이 스냅샷과 겹쳐도 같은 ID를 두 번 넣지 않음
+        keep = [i for i, vector_id in enumerate(ids) if vector_id not in self.id_to_uid]
+        if not keep:
+            return
+        kept_ids = np.asarray([ids[i] for i in keep], dtype=np.int64)
+        self.index.add_with_ids(vectors[keep], kept_ids)
+        if self._migration_ops is not None:
+            self._migration_ops.append(("add", kept_ids, vectors[keep]))
+        for i in keep:
+            self.id_to_uid[ids[i]] = uids[i]
+            self.uid_to_ids.setdefault(uids[i], []).append(ids[i])
+        self.next_id = max(self.next_id, max(ids[i] for i in keep) + 1)
+
+    def _apply_delete(self, ids):
+        ids = [vector_id for vector_id in ids if vector_id in self.id_to_uid]
+        if not ids:
+            return
+        # HNSW는 벡터를 남겨 두고 매핑에서만 제거 (검색 결과에서 제외, 재구성 때 정리)
+        if supports_remove(self.index_type):
+            self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+        if self._migration_ops is not None:
+            self._migration_ops.append(("delete", np.asarray(ids, dtype=np.int64), None))
+        for vector_id in ids:
+            uid = self.id_to_uid.pop(vector_id)
+            remaining = [i for i in self.uid_to_ids.get(uid, []) if i != vector_id]
+            if remaining:
+                self.uid_to_ids[uid] = remaining
+            else:
+                self.uid_to_ids.pop(uid, None)
+
+    def add(self, uids, vectors):
+        """
+        UID별 임베딩 추가 (로그 기록 후 인덱스 반영)
+
+        Args:
+            uids: 벡터마다의 강아지 UID (문자열 하나면 모든 벡터에 적용)
+            vectors: (N, dim) 임베딩
+
+        Returns:
+            부여된 벡터 ID 리스트
+        """
+        return self.write_batch([("add", uids, vectors)])[0]
+
+    def remove(self, uid):
+        """UID의 모든 벡터 삭제 (검색 결과에서도 제외), 삭제된 벡터 수 반환"""
+        return len(self.write_batch([("delete", uid)])[0])
+
+    def write_batch(self, ops):
+        """
+        여러 추가/삭제를 한 번의 로그 기록(디스크 동기화 한 번)으로 순서대로 반영
+
+        Args:
+            ops: [("add", uids, vectors) 또는 ("delete", uid), ...]
+
+        Returns:
+            작업별 벡터 ID 리스트 (추가: 부여된 ID, 삭제: 삭제된 ID)
+        """
+        with self._lock:
+            entries, plan, results = [], [], []
+            next_id = self.next_id
+            added, deleted = {}, set()
+            for op in ops:
+                if op[0] == "add":
+                    _, uids, vectors = op
+                    vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+                    uids = [uids] * len(vectors) if isinstance(uids, str) else list(uids)
+                    ids = list(range(next_id, next_id + len(vectors)))
+                    next_id += len(vectors)
+                    entries.extend((OP_ADD, vector_id, uid, vector)
+                                   for vector_id, uid, vector in zip(ids, uids, vectors))
+                    for vector_id, uid in zip(ids, uids):
+                        added.setdefault(uid, []).append(vector_id)
+                    plan.append(("add", ids, uids, vectors))
+                else:
+                    _, uid = op
+                    # 같은 배치에서 먼저 추가된 벡터도 삭제 대상
+                    ids = [vector_id for vector_id in self.uid_to_ids.get(uid, []) + added.pop(uid, [])
+                           if vector_id not in deleted]
+                    deleted.update(ids)
+                    entries.extend((OP_DELETE, vector_id, uid, None) for vector_id in ids)
+                    plan.append(("delete", ids, None, None))
+                results.append(ids)
+
+            if entries:
+                self.wal.append(entries)
+            for op, ids, uids, vectors in plan:
+                if op == "add":
+                    self._apply_add(ids, uids, vectors)
+                else:
+                    self._apply_delete(ids)
+            self._maybe_snapshot()
+        self._maybe_migrate()
+        return results
+
+    def search(self, queries, k):
+        """
+        질의별 가까운 강아지 검색 (한 강아지의 여러 벡터는 가장 가까운 것 하나만)
+
+        Returns:
+            질의별 [(UID, L2 거리 제곱), ...] (거리 오름차순)
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            if self.index.ntotal == 0:
+                return [[] for _ in range(len(queries))]
+            # 삭제 표시만 된 벡터(HNSW)가 결과를 채우지 않도록 그만큼 더 가져옴
+            tombstones = self.index.ntotal - len(self.id_to_uid)
+            distances, ids = self.index.search(queries, min(k + tombstones, self.index.ntotal))
+            id_to_uid = self.id_to_uid
+            results = []
+            for row_distances, row_ids in zip(distances, ids):
+                hits, seen = [], set()
+                for distance, vector_id in zip(row_distances, row_ids):
+                    uid = id_to_uid.get(int(vector_id))
+                    if uid is None or uid in seen:
+                        continue
+                    seen.add(uid)
+                    hits.append((uid, float(distance)))
+                    if len(hits) == k:
+                        break
+                results.append(hits)
+        return results
+
+    def clone_for_reading(self):
+        """
+        검색 전용 인덱스 복제본 (index_service.py의 읽기 스냅샷용)
+
+        Returns:
+            (복제본, 복제본 안의 삭제된 벡터 수, 복제 시점의 벡터 ID -> UID 매핑 복사본, 인덱스 세대)
+        """
+        with self._lock:
+            clone = faiss.clone_index(self.index)
+            return clone, clone.ntotal - len(self.id_to_uid), dict(self.id_to_uid), self.generation
+
+    def _maybe_snapshot(self):
+        if self.snapshot_every > 0 and self.wal.records >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self, force=False):
+        """인덱스와 ID 매핑을 임시 파일에 저장한 뒤 원자적으로 교체하고 로그 비우기"""
+        with self._lock:
+            if not force and self.wal.records == 0 and self.index_path.exists():
+                return
+            tmp_index = self.index_path.with_suffix(".faiss.tmp")
+            tmp_meta = self.meta_path.with_suffix(".json.tmp")
+            faiss.write_index(self.index, str(tmp_index))
+            saved_at = time.time()
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump({"next_id": self.next_id, "saved_at": saved_at, "index_type": self.index_type,
+                           "ids": {str(vector_id): uid for vector_id, uid in self.id_to_uid.items()}}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # 인덱스와 메타를 교체한 뒤 로그를 비움 (그 사이에 종료되어도 로그 재적용은 중복 ID를 건너뜀)
+            os.replace(tmp_index, self.index_path)
+            os.replace(tmp_meta, self.meta_path)
+            self.wal.reset()
+            self.last_snapshot_at = saved_at
+            logger.info(f"Saved nose index snapshot ({len(self)} vectors)")
+
+    def target_type(self):
+        """현재 벡터 수에 맞는 인덱스 종류"""
+        return target_index_type(len(self.id_to_uid), self.configured_type, self.tiers)
+
+    def _needs_rebuild(self):
+        ntotal = self.index.ntotal
+        return ntotal > 0 and (ntotal - len(self.id_to_uid)) / ntotal > self.rebuild_tombstone_ratio
+
+    def _maybe_migrate(self):
+        with self._lock:
+            if self._migrating:
+                return
+            target = self.target_type()
+            if target == self.index_type and not self._needs_rebuild():
+                return
+            self._migrating = True
+        threading.Thread(target=self._migrate, args=(target,), name="index-migration", daemon=True).start()
+
+    def migrate(self, target=None):
+        """인덱스를 target 종류로 다시 구성 (기본값: 현재 벡터 수에 맞는 종류), 동기 실행"""
+        with self._lock:
+            if self._migrating:
+                raise RuntimeError("Index migration already in progress")
+            target = target or self.target_type()
+            self._migrating = True
+        return self._migrate(target)
+
+    def _migrate(self, target):
+        """
+        현재 벡터로 새 인덱스를 학습/구성한 뒤 교체
+
+        학습/추가는 잠금 없이 수행하므로 그동안 검색은 기존 인덱스로 처리되고,
+        그 사이의 추가/삭제는 기록해 두었다가 교체 직전에 새 인덱스에도 적용합니다.
+        """
+        source_type = self.index_type
+        try:
+            start = time.perf_counter()
+            with self._lock:
+                ids = np.fromiter(self.id_to_uid.keys(), dtype=np.int64, count=len(self.id_to_uid))
+                vectors = (self.index.reconstruct_batch(ids) if len(ids)
+                           else np.zeros((0, self.dim), dtype=np.float32))
+                self._migration_ops = []
+
+            index = build_index(target, self.dim, vectors, self.params)
+            if len(ids):
+                index.add_with_ids(vectors, ids)
+
+            with self._lock:
+                for op, op_ids, op_vectors in self._migration_ops:
+                    if op == "add":
+                        index.add_with_ids(op_vectors, op_ids)
+                    elif supports_remove(target):
+                        index.remove_ids(op_ids)
+                self.index, self.index_type = index, target
+                self.generation += 1
+                self._migration_ops = None
+                self._migrating = False
+                elapsed = round(time.perf_counter() - start, 3)
+                self.migrations.append({"from": source_type, "to": target, "vectors": len(self),
+                                        "seconds": elapsed, "finished_at": time.time()})
+                logger.info(f"Migrated nose index {source_type} -> {target} ({len(self)} vectors, {elapsed}s)")
+                # 새 종류로 스냅샷을 저장해 재시작 시 다시 전환하지 않음
+                self.snapshot(force=True)
+            return True
+        except Exception as e:
+            logger.error(f"Error migrating nose index to {target}: {str(e)}")
+            with self._lock:
+                self._migration_ops = None
+                self._migrating = False
+            return False
+
+    def _snapshot_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                logger.error(f"Error saving nose index snapshot: {str(e)}")
+
+    def close(self):
+        """종료 시 스냅샷 저장 후 로그 닫기"""
+        self._stop.set()
+        with self._lock:
+            self.snapshot()
+            self.wal.close()
+
+    def __len__(self):
+        return len(self.id_to_uid)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "vectors": len(self.id_to_uid),
+                "dogs": len(self.uid_to_ids),
+                "index_type": self.index_type,
+                "target_index_type": self.target_type(),
+                "migrating": self._migrating,
+                "migrations": list(self.migrations),
+                "index_ntotal": self.index.ntotal,
+                "index_memory_mb": round(index_memory_bytes(self.index) / 1024 / 1024, 2),
+                "params": self.params.to_dict(),
+                "pending_log_records": self.wal.records,
+                "last_snapshot_at": self.last_snapshot_at,
+                "load_time_s": self.load_time,
+            }
@@ -1,16 +1,31 @@
 import os
 import cv2
 import numpy as np
-import torch
-import tensorflow as tf
-from flask import Flask, request, jsonify
-from PIL import Image
-import io
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+import json
 import base64
 import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
 
+from config import Config
+from batching import MicroBatcher, BatchQueueFull
+from gallery import NoseGallery
+from siamese import split_siamese_model, image_content_hash, EmbeddingCache, preprocess_nose_image
+from backends import load_onnx_siamese, onnx_model_paths
+from model_registry import SiameseModelRegistry, load_yolo_local
+from encoding import negotiate_format, binary_response
+from imaging import decode_image
+from bulk import iter_uploaded_images, chunked
+from detection import detections_to_numpy, crop_candidates
+from quality import QualityThresholds, assess_nose_quality, QUALITY_MODES
+from model_host import ModelHostClient, ModelHostError, RemoteModel, RemoteYolo
+from metrics import create_service_metrics
+from result_cache import ResultCache, upload_digest, file_fingerprint
+
 # Flask 앱 초기화
 app = Flask(__name__)
 
@@ -18,66 +33,206 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Siamese 모델 변형 (앙상블 순서)
+SIAMESE_VARIANTS = ['original', 'canny', 'laplacian', 'sobel']
+
+# 같은 업로드에 대해 항상 같은 결과가 나오는 크롭 실패 (결과 캐시에 저장)
+CACHEABLE_CROP_ERRORS = ("Failed to process image", "No dog nose detected", "No valid dog nose box",
+                         "Nose crop rejected by quality gate")
+
 class DogNoseAIService:
     def __init__(self):
         """AI 모델 초기화"""
         self.yolo_model = None
-        self.siamese_model = None
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.current_siamese_model = None
+        
+        # 원격 모드에서는 모델을 로드하지 않고 model_host.py 프로세스에 추론 위임
+        self.model_host = None
+        self.remote_available = []
+        if Config.MODEL_HOST_MODE == 'remote':
+            self.model_host = ModelHostClient(Config.MODEL_HOST_ADDRESS, Config.MODEL_HOST_AUTHKEY,
+                                              shm_size_mb=Config.MODEL_HOST_SHM_MB,
+                                              max_channels=Config.MODEL_HOST_CHANNELS)
+            self.device = 'model-host'
+        else:
+            import torch
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         logger.info(f"Using device: {self.device}")
         
-        # 모델 로드
-        self.load_models()
+        # 단계별 지연 시간/요청 수 메트릭
+        self.metrics = create_service_metrics()
+        
+        # 이미지 내용 해시 기준 임베딩 캐시
+        self.embedding_cache = EmbeddingCache(Config.EMBEDDING_CACHE_SIZE)
+        
+        # 업로드 바이트 해시 기준 결과 캐시 (크롭/특징/비교, 모델 파일과 크롭 설정 버전별 키)
+        self.result_cache = None
+        if Config.RESULT_CACHE_ENABLED:
+            self.result_cache = ResultCache(Config.RESULT_CACHE_SIZE, Config.RESULT_CACHE_TTL_S,
+                                            disk_dir=Config.RESULT_CACHE_DIR or None,
+                                            disk_max_mb=Config.RESULT_CACHE_DISK_MB,
+                                            metrics=self.metrics)
+        self.yolo_version = None
+        self.model_versions = {}
+        
+        # Siamese 모델 레지스트리 (첫 사용 시 로드, 메모리 예산 초과 시 LRU 해제)
+        self.siamese_registry = SiameseModelRegistry(
+            self.load_remote_siamese_model if self.model_host is not None else self.load_siamese_model,
+            {name: os.path.join(Config.MODELS_DIR, f'siamese_{name}.h5') for name in SIAMESE_VARIANTS},
+            memory_budget_mb=Config.SIAMESE_MEMORY_BUDGET_MB)
+        for name in SIAMESE_VARIANTS:
+            if self.model_host is not None:
+                self.siamese_registry.register_availability_check(
+                    name, lambda name=name: name in self.remote_available)
+            else:
+                self.siamese_registry.register_availability_check(
+                    name, lambda name=name: Config.SIAMESE_BACKEND == 'onnx' and any(
+                        onnx_model_paths(Config.MODELS_DIR, name, precision)['full'].exists()
+                        for precision in ('fp32', Config.SIAMESE_PRECISION)))
+        
+        # 준비 상태 (liveness와 별개로 모델 로드 완료 여부)
+        self.ready = threading.Event()
+        self.yolo_load_time = None
+        
+        # 마이크로 배치 스케줄러 (YOLO는 하나, Siamese는 작업/모델별로 지연 생성)
+        self.batchers = {}
+        self._batcher_lock = threading.Lock()
+        self.yolo_batcher = None
+        if Config.BATCHING_ENABLED:
+            self.yolo_batcher = self._create_batcher('yolo', self.crop_dog_noses)
+        
+        # 앙상블 모드에서 Siamese 변형들을 병렬로 실행하는 스레드 풀
+        self.ensemble_executor = ThreadPoolExecutor(max_workers=len(SIAMESE_VARIANTS),
+                                                    thread_name_prefix='ensemble')
+        
+        # 코 크롭 품질 게이트
+        self.quality_mode = Config.QUALITY_GATE_MODE if Config.QUALITY_GATE_MODE in QUALITY_MODES else 'flag'
+        self.quality_thresholds = QualityThresholds.from_config(Config)
+        
+        # 여러 업로드 이미지를 병렬로 디코딩하는 스레드 풀 (cv2.imdecode는 GIL을 해제)
+        self.decode_executor = ThreadPoolExecutor(max_workers=max(1, Config.DECODE_WORKERS),
+                                                  thread_name_prefix='decode')
+        
+        # 1:N 식별용 임베딩 갤러리 (모델 타입별)
+        self.galleries = {}
+        self._gallery_lock = threading.Lock()
+        
+        # 모델 로드 (백그라운드 로드 시 서버는 바로 응답하고 /ready로 준비 상태 확인)
+        if Config.BACKGROUND_MODEL_LOAD:
+            threading.Thread(target=self.load_models, name='model-loader', daemon=True).start()
+        else:
+            self.load_models()
     
     def load_models(self):
-        """YOLOv5와 Siamese 모델 로드"""
+        """YOLOv5 로드 및 기본 Siamese 모델 선택/예열"""
+        if self.model_host is not None:
+            return self.connect_model_host()
+        
         try:
-            # YOLOv5 모델 로드 (강아지 코 탐지)
-            model_path = './models/yolo_best.pt'
+            # YOLOv5 모델 로드 (강아지 코 탐지) - 저장소 내 yolov05 코드 사용, 네트워크 접근 없음
+            model_path = os.path.join(Config.MODELS_DIR, 'yolo_best.pt')
             if os.path.exists(model_path):
-                self.yolo_model = torch.hub.load('ultralytics/yolov5', 'custom', 
-                                               path=model_path, device=self.device)
+                start = time.perf_counter()
+                self.yolo_model = load_yolo_local(model_path, Config.YOLOV5_REPO_DIR, self.device)
                 self.yolo_model.conf = 0.25  # 신뢰도 임계값
                 self.yolo_model.iou = 0.45   # NMS IoU 임계값
+                self.yolo_load_time = round(time.perf_counter() - start, 3)
+                self.yolo_version = file_fingerprint(model_path, extra='yolov5')
                 logger.info("YOLOv5 model loaded successfully")
             else:
                 logger.warning(f"YOLOv5 model not found at {model_path}")
             
-            # Siamese Neural Network 모델 로드 (비문 인식)
-            # 사용 가능한 Siamese 모델들 확인
-            siamese_models = {
-                'original': './models/siamese_original.h5',
-                'canny': './models/siamese_canny.h5', 
-                'laplacian': './models/siamese_laplacian.h5',
-                'sobel': './models/siamese_sobel.h5'
-            }
-            
-            self.available_siamese_models = {}
-            
-            for model_name, model_path in siamese_models.items():
-                if os.path.exists(model_path):
-                    try:
-                        model = tf.keras.models.load_model(model_path)
-                        self.available_siamese_models[model_name] = model
-                        logger.info(f"Siamese model '{model_name}' loaded successfully")
-                    except Exception as e:
-                        logger.warning(f"Failed to load Siamese model '{model_name}': {str(e)}")
-                else:
-                    logger.warning(f"Siamese model '{model_name}' not found at {model_path}")
-            
             # 기본 모델 설정 (우선순위: original > canny > laplacian > sobel)
-            for preferred_model in ['original', 'canny', 'laplacian', 'sobel']:
-                if preferred_model in self.available_siamese_models:
-                    self.siamese_model = self.available_siamese_models[preferred_model]
+            available = self.siamese_registry.available()
+            for preferred_model in SIAMESE_VARIANTS:
+                if preferred_model in available:
                     self.current_siamese_model = preferred_model
                     logger.info(f"Using '{preferred_model}' as default Siamese model")
                     break
             
-            if not hasattr(self, 'siamese_model'):
-                logger.error("No Siamese models could be loaded")
+            if self.current_siamese_model is None:
+                logger.error("No Siamese models could be found")
+            
+            # 지정된 변형만 미리 로드 (나머지는 첫 사용 시 로드)
+            for model_type in Config.SIAMESE_PRELOAD:
+                if model_type == 'default':
+                    model_type = self.current_siamese_model
+                if model_type in available:
+                    self.siamese_registry.get(model_type)
                 
         except Exception as e:
             logger.error(f"Error loading models: {str(e)}")
+        finally:
+            self.ready.set()
+    
+    def connect_model_host(self):
+        """모델 호스트가 준비될 때까지 기다린 뒤 원격 YOLOv5/Siamese 모델 연결"""
+        try:
+            status = self.model_host.wait_until_ready(Config.MODEL_HOST_WAIT_S)
+            self.remote_available = list(status['available'])
+            if status['yolo_loaded']:
+                self.yolo_model = RemoteYolo(self.model_host)
+                self.yolo_version = status.get('yolo_version')
+            self.current_siamese_model = status['default_model']
+            logger.info(f"Connected to model host at {Config.MODEL_HOST_ADDRESS} "
+                        f"(available Siamese models: {self.remote_available})")
+        except ModelHostError as e:
+            logger.error(f"Error connecting to model host: {str(e)}")
+        finally:
+            self.ready.set()
+    
+    def load_remote_siamese_model(self, model_name, model_path):
+        """모델 호스트에 변형 로드를 요청하고 predict 프록시 반환 (워커 메모리에는 모델 없음)"""
+        info = self.model_host.call('load', model_name)
+        if info is None:
+            return None
+        self.model_versions[model_name] = info.get('version')
+        parts = None
+        if info['split']:
+            parts = (RemoteModel(self.model_host, model_name, 'tower'),
+                     RemoteModel(self.model_host, model_name, 'head'))
+        return RemoteModel(self.model_host, model_name, 'model'), parts, f"remote:{info['backend']}"
+    
+    def is_ready(self):
+        """준비 상태: 로드 완료 + YOLOv5 로드 + Siamese 변형 하나 이상 사용 가능"""
+        return (self.ready.is_set() and self.yolo_model is not None
+                and self.current_siamese_model is not None)
+    
+    def load_siamese_model(self, model_name, model_path):
+        """
+        설정된 백엔드로 Siamese 모델 하나 로드
+        
+        ONNX 백엔드가 선택되었지만 변환된 파일이 없으면 Keras로 대체합니다.
+        
+        Returns:
+            (모델, (타워, 헤드) 또는 None, 백엔드 이름) / 모델 파일이 없으면 None
+        """
+        if Config.SIAMESE_BACKEND == 'onnx':
+            # INT8 양자화 모델이 요청되었으면 먼저 시도하고, 없으면 FP32 ONNX로 대체
+            precisions = ['int8', 'fp32'] if Config.SIAMESE_PRECISION == 'int8' else ['fp32']
+            for precision in precisions:
+                loaded = load_onnx_siamese(Config.MODELS_DIR, model_name,
+                                           intra_op_threads=Config.ORT_INTRA_OP_THREADS,
+                                           inter_op_threads=Config.ORT_INTER_OP_THREADS,
+                                           precision=precision)
+                if loaded is not None:
+                    model, parts = loaded
+                    backend = 'onnx' if precision == 'fp32' else f'onnx-{precision}'
+                    self.model_versions[model_name] = file_fingerprint(
+                        *onnx_model_paths(Config.MODELS_DIR, model_name, precision).values(), extra=backend)
+                    return model, parts, backend
+                logger.warning(f"ONNX {precision} model for '{model_name}' not found")
+            logger.warning(f"Falling back to Keras for '{model_name}'")
+        
+        if not os.path.exists(model_path):
+            return None
+        
+        # TensorFlow는 Keras 백엔드를 사용할 때만 로드
+        import tensorflow as tf
+        
+        model = tf.keras.models.load_model(model_path)
+        self.model_versions[model_name] = file_fingerprint(model_path, extra='keras')
+        return model, split_siamese_model(model), 'keras'
     
     def preprocess_image(self, image_data):
         """이미지 전처리"""
@@ -90,12 +245,9 @@ class DogNoseAIService:
                 # 바이너리 데이터인 경우
                 image_bytes = image_data
             
-            # PIL Image로 변환
-            image = Image.open(io.BytesIO(image_bytes))
-            image = image.convert('RGB')
-            
-            # OpenCV 형식으로 변환
-            opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            # cv2로 바로 BGR 디코딩 (큰 JPEG는 축소 디코딩, EXIF 방향 적용)
+            with self.metrics.timer('decode'):
+                opencv_image, _ = decode_image(image_bytes, min_side=Config.DECODE_MIN_SIDE)
             
             return opencv_image
             
@@ -104,150 +256,769 @@ class DogNoseAIService:
             return None
     
     def crop_dog_nose(self, image):
-        """YOLOv5를 사용하여 강아지 코 영역 크롭"""
+        """YOLOv5를 사용하여 강아지 코 영역 크롭 (크롭, 에러, 품질 평가)"""
+        if self.yolo_batcher is not None:
+            return self.yolo_batcher.submit(image, timeout=Config.BATCH_TIMEOUT_S)
+        return self.crop_dog_noses([image])[0]
+    
+    def crop_dog_noses(self, images):
+        """여러 이미지의 강아지 코 영역을 한 번의 YOLOv5 호출로 크롭 (이미지별 최고 신뢰도 후보)"""
+        outputs = []
+        for candidates, error in self.detect_nose_candidates(images, top_k=1):
+            if not candidates:
+                outputs.append((None, error, None))
+                continue
+            kept, error = self.apply_quality_gate(candidates)
+            best = kept[0] if kept else candidates[0]
+            outputs.append((best['crop'] if kept else None, error, best.get('quality')))
+        return outputs
+    
+    def apply_quality_gate(self, candidates):
+        """
+        품질 기준 미달 후보 제외 (reject 모드에서만, 그 외에는 점수만 기록)
+        
+        Returns:
+            (남은 후보 리스트, 모두 제외되었을 때의 에러 메시지)
+        """
+        if self.quality_mode != 'reject':
+            return candidates, None
+        kept = [c for c in candidates if c['quality']['passed']]
+        if kept:
+            return kept, None
+        self.metrics.inc('nose_quality_rejections_total', len(candidates))
+        reasons = ', '.join(candidates[0]['quality']['reasons'])
+        return [], f"Nose crop rejected by quality gate ({reasons})"
+    
+    def detect_nose_candidates(self, images, top_k=1, padding=None):
+        """
+        여러 이미지의 코 후보를 한 번의 YOLOv5 호출로 검출하여 크롭
+        
+        pandas 변환 없이 results.xyxy 텐서를 배치 전체에 대해 한 번에 numpy로 옮겨 처리합니다.
+        
+        Returns:
+            이미지별 (후보 리스트, 에러 메시지), 후보는 crop/box/confidence dict (신뢰도 내림차순)
+        """
+        padding = Config.NOSE_CROP_PADDING if padding is None else padding
         try:
             if self.yolo_model is None:
-                return None, "YOLOv5 model not loaded"
-            
-            # YOLOv5로 추론
-            results = self.yolo_model(image)
+                return [([], "YOLOv5 model not loaded")] * len(images)
             
-            # 결과 파싱
-            detections = results.pandas().xyxy[0]
-            
-            if len(detections) == 0:
-                return None, "No dog nose detected"
-            
-            # 가장 높은 신뢰도의 탐지 결과 선택
-            best_detection = detections.loc[detections['confidence'].idxmax()]
-            
-            # 바운딩 박스 좌표
-            x1, y1, x2, y2 = int(best_detection['xmin']), int(best_detection['ymin']), \
-                           int(best_detection['xmax']), int(best_detection['ymax'])
-            
-            # 코 영역 크롭
-            cropped_nose = image[y1:y2, x1:x2]
-            
-            # 96x96으로 리사이즈 (Siamese 모델 입력 크기)
-            cropped_nose = cv2.resize(cropped_nose, (96, 96))
-            
-            return cropped_nose, None
+            # YOLOv5로 배치 추론
+            with self.metrics.timer('detect'):
+                results = self.yolo_model(list(images))
+            self.metrics.inc('nose_model_requests_total', len(images), model='yolo')
             
+            # 이미지별 (N, 6) 검출 텐서 [xmin, ymin, xmax, ymax, confidence, class]
+            all_detections = [detections_to_numpy(d) for d in results.xyxy]
         except Exception as e:
             logger.error(f"Error cropping dog nose: {str(e)}")
-            return None, str(e)
+            return [([], str(e))] * len(images)
+        
+        outputs = []
+        for image, detections in zip(images, all_detections):
+            try:
+                if len(detections) == 0:
+                    outputs.append(([], "No dog nose detected"))
+                    continue
+                
+                # 신뢰도 상위 후보를 여백 추가 + 경계 클리핑 후 96x96으로 리사이즈 (Siamese 모델 입력 크기)
+                with self.metrics.timer('crop_resize'):
+                    candidates = crop_candidates(image, detections, top_k=top_k, padding=padding)
+                
+                # Siamese 추론 전에 크롭 품질 평가
+                if self.quality_mode != 'off':
+                    with self.metrics.timer('quality'):
+                        for candidate in candidates:
+                            candidate['quality'] = assess_nose_quality(
+                                candidate['crop'], candidate['box'], candidate['confidence'],
+                                self.quality_thresholds)
+                
+                outputs.append((candidates, None if candidates else "No valid dog nose box"))
+                
+            except Exception as e:
+                logger.error(f"Error cropping dog nose: {str(e)}")
+                outputs.append(([], str(e)))
+        
+        return outputs
     
-    def preprocess_for_siamese(self, image, model_type='original'):
-        """Siamese 모델을 위한 이미지 전처리"""
+    def to_grayscale(self, image):
+        """Siamese 전처리용 그레이스케일 변환"""
+        if len(image.shape) == 3:
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+    
+    def preprocess_for_siamese(self, image, model_type='original', gray_image=None):
+        """Siamese 모델을 위한 이미지 전처리 (gray_image가 주어지면 변환 생략)"""
+        with self.metrics.timer('siamese_preprocess', model=model_type):
+            return self._apply_siamese_preprocessing(image, model_type, gray_image)
+    
+    def _apply_siamese_preprocessing(self, image, model_type, gray_image):
         try:
             # 그레이스케일 변환
-            if len(image.shape) == 3:
-                gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray_image = image
-            
-            # 모델 타입에 따른 전처리 적용
-            if model_type == 'canny':
-                # Canny 에지 검출
-                processed_image = cv2.Canny(gray_image, 50, 150)
-            elif model_type == 'laplacian':
-                # Laplacian 에지 검출
-                processed_image = cv2.Laplacian(gray_image, cv2.CV_64F)
-                processed_image = np.absolute(processed_image)
-                processed_image = np.uint8(processed_image)
-            elif model_type == 'sobel':
-                # Sobel 에지 검출
-                sobelx = cv2.Sobel(gray_image, cv2.CV_64F, 1, 0, ksize=3)
-                sobely = cv2.Sobel(gray_image, cv2.CV_64F, 0, 1, ksize=3)
-                processed_image = np.sqrt(sobelx**2 + sobely**2)
-                processed_image = np.uint8(processed_image)
-            else:  # original
-                # 원본 그레이스케일 이미지 사용
-                processed_image = gray_image
-            
-            # 가우시안 블러 적용 (노이즈 제거)
-            processed_image = cv2.GaussianBlur(processed_image, (3, 3), 0)
-            
-            # 정규화 (0-255 -> 0-1)
-            normalized = processed_image.astype(np.float32) / 255.0
-            
-            # 차원 추가 (batch dimension)
-            processed = np.expand_dims(normalized, axis=0)
-            
-            return processed
+            if gray_image is None:
+                gray_image = self.to_grayscale(image)
+            
+            # 모델 타입에 따른 에지 검출, 블러, 정규화
+            return preprocess_nose_image(gray_image, model_type)
             
         except Exception as e:
             logger.error(f"Error preprocessing for Siamese ({model_type}): {str(e)}")
             return None
     
+    def resolve_model_type(self, model_type):
+        """요청된 모델 타입이 없으면 기본 모델 타입으로 대체"""
+        if model_type in self.siamese_registry.available():
+            return model_type
+        return self.current_siamese_model
+    
+    def select_siamese_model(self, model_type):
+        """요청된 타입의 Siamese 모델 선택 (없으면 기본 모델, 필요 시 로드)"""
+        entry = self.siamese_registry.get(self.resolve_model_type(model_type))
+        return entry.model if entry is not None else None
+    
+    def select_siamese_parts(self, model_type):
+        """요청된 타입의 (임베딩 타워, 점수 헤드) 선택 (분리되지 않은 모델이면 None)"""
+        entry = self.siamese_registry.get(self.resolve_model_type(model_type))
+        return entry.parts if entry is not None else None
+    
+    def embed_noses(self, nose_images, model_type='original', processed_images=None):
+        """
+        임베딩 타워로 비문 임베딩 계산
+        
+        캐시에 없는 이미지만 모아 타워를 한 번 호출합니다.
+        processed_images가 주어지면 전처리를 다시 하지 않고 그대로 사용합니다.
+        전처리에 실패한 이미지는 None으로 반환됩니다.
+        
+        캐시 키는 실제로 사용하는 모델 타입과 그 파일 버전 기준입니다 (요청한 모델이 없어 기본 모델로
+        대체되거나 /switch_model 이후에도 다른 타워의 임베딩이 섞이지 않도록).
+        """
+        model_type = self.resolve_model_type(model_type)
+        tower, _ = self.select_siamese_parts(model_type)
+        version = self.siamese_version(model_type)
+        
+        keys = [f"{version}:{image_content_hash(image)}" for image in nose_images]
+        embeddings = [self.embedding_cache.get(key) for key in keys]
+        
+        # 같은 이미지가 여러 번 들어온 경우 한 번만 계산
+        missing = {}
+        for i, (key, embedding) in enumerate(zip(keys, embeddings)):
+            if embedding is None:
+                missing.setdefault(key, []).append(i)
+        
+        if processed_images is None:
+            processed = {key: self.preprocess_for_siamese(nose_images[indices[0]], model_type)
+                         for key, indices in missing.items()}
+        else:
+            processed = {key: processed_images[indices[0]] for key, indices in missing.items()}
+        processed = {key: p for key, p in processed.items() if p is not None}
+        
+        if processed:
+            with self.metrics.timer('embed', model=model_type):
+                computed = tower.predict(np.concatenate(list(processed.values())), verbose=0)
+            self.metrics.inc('nose_model_requests_total', len(processed), model=f'siamese_{model_type}')
+            for key, embedding in zip(processed.keys(), computed):
+                self.embedding_cache.put(key, embedding)
+                for i in missing[key]:
+                    embeddings[i] = embedding
+        
+        return embeddings
+    
+    def siamese_batcher(self, operation, model_type):
+        """
+        (작업, 실제 사용할 모델 타입)별 Siamese 배치 스케줄러 반환 (지연 생성)
+        
+        요청 값 그대로 키를 만들면 임의의 model_type마다 종료되지 않는 배치 스레드가 생기므로
+        resolve_model_type으로 알려진 모델 타입에 맞춘 뒤 키를 만듭니다.
+        """
+        if not Config.BATCHING_ENABLED:
+            return None
+        
+        model_type = self.resolve_model_type(model_type)
+        if model_type is None:
+            return None
+        
+        key = f"siamese_{operation}_{model_type}"
+        with self._batcher_lock:
+            batcher = self.batchers.get(key)
+            if batcher is None:
+                if operation == 'features':
+                    batch_fn = lambda images: self.extract_nose_features_batch(images, model_type)
+                else:
+                    batch_fn = lambda pairs: self.compare_noses_batch(pairs, model_type)
+                batcher = self._create_batcher(key, batch_fn)
+            return batcher
+    
+    def _create_batcher(self, key, batch_fn):
+        batcher = MicroBatcher(key, batch_fn,
+                               max_batch_size=Config.BATCH_MAX_SIZE,
+                               max_wait_ms=Config.BATCH_MAX_WAIT_MS,
+                               max_queue_size=Config.BATCH_MAX_QUEUE)
+        self.batchers[key] = batcher
+        return batcher
+    
     def extract_nose_features(self, nose_image, model_type='original'):
         """비문 특징 추출"""
+        batcher = self.siamese_batcher('features', model_type)
+        if batcher is not None:
+            return batcher.submit(nose_image, timeout=Config.BATCH_TIMEOUT_S)
+        return self.extract_nose_features_batch([nose_image], model_type)[0]
+    
+    def extract_nose_features_batch(self, nose_images, model_type='original'):
+        """여러 비문 이미지의 특징을 한 번의 모델 호출로 추출"""
         try:
-            # 모델 선택
-            if hasattr(self, 'available_siamese_models') and model_type in self.available_siamese_models:
-                selected_model = self.available_siamese_models[model_type]
-            elif self.siamese_model is not None:
-                selected_model = self.siamese_model
-            else:
-                return None, "No Siamese model available"
+            # 모델 선택 (타워/전처리/캐시가 같은 모델을 보도록 한 번만 결정)
+            model_type = self.resolve_model_type(model_type)
+            selected_model = self.select_siamese_model(model_type)
+            if selected_model is None:
+                return [(None, "No Siamese model available")] * len(nose_images)
+            
+            # 분리된 모델이면 임베딩 타워 출력을 특징으로 사용
+            if self.select_siamese_parts(model_type) is not None:
+                embeddings = self.embed_noses(nose_images, model_type)
+                return [(embedding.flatten(), None) if embedding is not None
+                        else (None, "Failed to preprocess image")
+                        for embedding in embeddings]
             
             # 전처리 (모델 타입에 따라 다른 전처리 적용)
-            processed_image = self.preprocess_for_siamese(nose_image, model_type)
-            if processed_image is None:
-                return None, "Failed to preprocess image"
+            processed = [self.preprocess_for_siamese(image, model_type) for image in nose_images]
+            valid = [i for i, p in enumerate(processed) if p is not None]
+            
+            outputs = [(None, "Failed to preprocess image")] * len(nose_images)
+            if not valid:
+                return outputs
             
             # Siamese 모델에서 특징 추출
-            features = selected_model.predict(processed_image)
+            with self.metrics.timer('embed', model=model_type):
+                features = selected_model.predict(np.concatenate([processed[i] for i in valid]), verbose=0)
+            self.metrics.inc('nose_model_requests_total', len(valid), model=f'siamese_{model_type}')
+            features = features.reshape(len(valid), -1)
             
-            return features.flatten(), None
+            for row, i in enumerate(valid):
+                outputs[i] = (features[row], None)
+            return outputs
             
         except Exception as e:
             logger.error(f"Error extracting nose features: {str(e)}")
-            return None, str(e)
+            return [(None, str(e))] * len(nose_images)
     
     def compare_noses(self, nose_image1, nose_image2, model_type='original'):
         """두 비문 이미지 비교"""
+        batcher = self.siamese_batcher('compare', model_type)
+        if batcher is not None:
+            return batcher.submit((nose_image1, nose_image2), timeout=Config.BATCH_TIMEOUT_S)
+        return self.compare_noses_batch([(nose_image1, nose_image2)], model_type)[0]
+    
+    def compare_noses_batch(self, pairs, model_type='original'):
+        """여러 비문 이미지 쌍을 한 번의 모델 호출로 비교"""
         try:
-            # 모델 선택
-            if hasattr(self, 'available_siamese_models') and model_type in self.available_siamese_models:
-                selected_model = self.available_siamese_models[model_type]
-            elif self.siamese_model is not None:
-                selected_model = self.siamese_model
-            else:
-                return None, "No Siamese model available"
+            # 모델 선택 (타워와 점수 헤드가 같은 모델이 되도록 한 번만 결정)
+            model_type = self.resolve_model_type(model_type)
+            selected_model = self.select_siamese_model(model_type)
+            if selected_model is None:
+                return [(None, "No Siamese model available")] * len(pairs)
+            
+            # 분리된 모델이면 캐시된 임베딩으로 점수 헤드만 평가
+            parts = self.select_siamese_parts(model_type)
+            if parts is not None:
+                return self._compare_embeddings_batch(pairs, model_type, parts[1])
             
             # 전처리
-            processed1 = self.preprocess_for_siamese(nose_image1, model_type)
-            processed2 = self.preprocess_for_siamese(nose_image2, model_type)
+            processed = [(self.preprocess_for_siamese(image1, model_type),
+                          self.preprocess_for_siamese(image2, model_type))
+                         for image1, image2 in pairs]
+            valid = [i for i, (p1, p2) in enumerate(processed) if p1 is not None and p2 is not None]
             
-            if processed1 is None or processed2 is None:
-                return None, "Failed to preprocess images"
+            outputs = [(None, "Failed to preprocess images")] * len(pairs)
+            if not valid:
+                return outputs
             
             # Siamese 모델로 유사도 계산
-            similarity = selected_model.predict([processed1, processed2])
+            left = np.concatenate([processed[i][0] for i in valid])
+            right = np.concatenate([processed[i][1] for i in valid])
+            with self.metrics.timer('compare', model=model_type):
+                similarity = selected_model.predict([left, right], verbose=0)
+            self.metrics.inc('nose_model_requests_total', len(valid), model=f'siamese_{model_type}')
             
-            return float(similarity[0][0]), None
+            for row, i in enumerate(valid):
+                outputs[i] = (float(similarity[row][0]), None)
+            return outputs
             
         except Exception as e:
             logger.error(f"Error comparing noses: {str(e)}")
-            return None, str(e)
+            return [(None, str(e))] * len(pairs)
+    
+    def _compare_embeddings_batch(self, pairs, model_type, head):
+        """임베딩 쌍을 점수 헤드에 한 번에 넣어 유사도 계산"""
+        embeddings = self.embed_noses([image for pair in pairs for image in pair], model_type)
+        
+        outputs = [(None, "Failed to preprocess images")] * len(pairs)
+        valid = [i for i in range(len(pairs))
+                 if embeddings[2 * i] is not None and embeddings[2 * i + 1] is not None]
+        if not valid:
+            return outputs
+        
+        left = np.stack([embeddings[2 * i] for i in valid])
+        right = np.stack([embeddings[2 * i + 1] for i in valid])
+        with self.metrics.timer('compare', model=model_type):
+            similarity = head.predict([left, right], verbose=0)
+        self.metrics.inc('nose_model_requests_total', len(valid), model=f'siamese_{model_type}_head')
+        
+        for row, i in enumerate(valid):
+            outputs[i] = (float(similarity[row][0]), None)
+        return outputs
+    
+    def compare_noses_ensemble(self, nose_image1, nose_image2):
+        """
+        사용 가능한 모든 Siamese 변형으로 두 비문을 동시에 비교
+        
+        그레이스케일 변환은 이미지당 한 번만 수행하고, 변형별 전처리 결과를
+        스레드 풀에서 각 모델에 병렬로 넣습니다.
+        
+        Returns:
+            ({'similarity': 융합 점수, 'per_variant': {...}, 'errors': {...}}, error)
+        """
+        variants = self.siamese_registry.available()
+        if not variants:
+            return None, "No Siamese model available"
+        
+        gray1 = self.to_grayscale(nose_image1)
+        gray2 = self.to_grayscale(nose_image2)
+        
+        def score(model_type):
+            processed1 = self.preprocess_for_siamese(nose_image1, model_type, gray_image=gray1)
+            processed2 = self.preprocess_for_siamese(nose_image2, model_type, gray_image=gray2)
+            if processed1 is None or processed2 is None:
+                raise ValueError("Failed to preprocess images")
+            
+            entry = self.siamese_registry.get(model_type)
+            if entry is None:
+                raise ValueError(f"Siamese model '{model_type}' could not be loaded")
+            
+            parts = entry.parts
+            if parts is not None:
+                embedding1, embedding2 = self.embed_noses([nose_image1, nose_image2], model_type,
+                                                          processed_images=[processed1, processed2])
+                with self.metrics.timer('compare', model=model_type):
+                    similarity = parts[1].predict([embedding1[None], embedding2[None]], verbose=0)
+                self.metrics.inc('nose_model_requests_total', model=f'siamese_{model_type}_head')
+            else:
+                with self.metrics.timer('compare', model=model_type):
+                    similarity = entry.model.predict([processed1, processed2], verbose=0)
+                self.metrics.inc('nose_model_requests_total', model=f'siamese_{model_type}')
+            return float(similarity[0][0])
+        
+        futures = {v: self.ensemble_executor.submit(score, v) for v in variants}
+        
+        per_variant, errors = {}, {}
+        for model_type, future in futures.items():
+            try:
+                per_variant[model_type] = future.result(timeout=Config.BATCH_TIMEOUT_S)
+            except Exception as e:
+                logger.error(f"Error in ensemble variant '{model_type}': {str(e)}")
+                errors[model_type] = str(e)
+        
+        if not per_variant:
+            return None, f"All ensemble variants failed: {errors}"
+        
+        # 변형별 점수의 가중 평균으로 융합
+        weights = {v: Config.ENSEMBLE_WEIGHTS.get(v, 1.0) for v in per_variant}
+        total_weight = sum(weights.values()) or 1.0
+        fused = sum(per_variant[v] * weights[v] for v in per_variant) / total_weight
+        
+        return {
+            'similarity': float(fused),
+            'per_variant': per_variant,
+            'votes_same': sum(1 for value in per_variant.values() if value > 0.5),
+            'errors': errors
+        }, None
+    
+    def crop_version(self):
+        """크롭 결과에 영향을 주는 YOLOv5 가중치와 디코딩/검출/품질 설정의 버전 문자열"""
+        settings = json.dumps([Config.DECODE_MIN_SIDE, Config.NOSE_CROP_PADDING,
+                               getattr(self.yolo_model, 'conf', None), getattr(self.yolo_model, 'iou', None),
+                               self.quality_mode, self.quality_thresholds.to_dict()], sort_keys=True)
+        return f"{self.yolo_version}:{file_fingerprint(extra=settings)}"
+    
+    def siamese_version(self, model_type):
+        """요청된 타입이 실제로 사용할 Siamese 모델과 그 파일 버전 (결과 캐시 키용, 필요 시 로드)"""
+        model_type = self.resolve_model_type(model_type)
+        if model_type not in self.model_versions:
+            self.siamese_registry.get(model_type)
+        return f"{model_type}:{self.model_versions.get(model_type)}"
+    
+    def upload_digest(self, image_bytes):
+        """결과 캐시 키용 업로드 해시 (캐시가 꺼져 있으면 None)"""
+        if self.result_cache is None or image_bytes is None:
+            return None
+        return upload_digest(image_bytes)
+    
+    def _cache_get(self, kind, key):
+        if self.result_cache is None or key is None:
+            return None
+        return self.result_cache.get(kind, key)
+    
+    def _cache_put(self, kind, key, value):
+        if self.result_cache is not None and key is not None:
+            self.result_cache.put(kind, key, value)
+    
+    def crop_cache_key(self, digest):
+        if digest is None or self.result_cache is None or self.yolo_model is None:
+            return None
+        return ResultCache.make_key('crop', digest, self.crop_version())
+    
+    def cache_crop_result(self, key, result):
+        """같은 업로드에서 항상 같은 결과(성공 또는 검출/품질 실패)만 결과 캐시에 저장"""
+        _, error, _ = result
+        if error is None or error.startswith(CACHEABLE_CROP_ERRORS):
+            self._cache_put('crop', key, result)
+    
+    def crop_nose_from_bytes(self, image_bytes, digest=None):
+        """
+        업로드 이미지 바이트 하나를 디코딩하고 코 영역 크롭 (결과 캐시 사용)
+        
+        Returns:
+            (크롭, 에러, 품질 평가) - crop_dog_nose와 같은 형식
+        """
+        key = self.crop_cache_key(digest)
+        cached = self._cache_get('crop', key)
+        if cached is not None:
+            return cached
+        
+        image = self.preprocess_image(image_bytes)
+        result = (None, "Failed to process image", None) if image is None else self.crop_dog_nose(image)
+        self.cache_crop_result(key, result)
+        return result
+    
+    def cached_nose_features(self, nose_image, model_type='original', digest=None):
+        """업로드 해시 + 모델 버전 기준으로 캐시된 비문 특징 (없으면 extract_nose_features)"""
+        key = None
+        if digest is not None and self.result_cache is not None:
+            key = ResultCache.make_key('features', digest, self.crop_version(), self.siamese_version(model_type))
+        cached = self._cache_get('features', key)
+        if cached is not None:
+            return cached, None
+        
+        features, error = self.extract_nose_features(nose_image, model_type)
+        if error is None:
+            self._cache_put('features', key, features)
+        return features, error
+    
+    def cached_compare(self, nose_image1, nose_image2, model_type='original', digest1=None, digest2=None):
+        """
+        업로드 해시 쌍 + 모델 버전 기준으로 캐시된 비교 결과
+        
+        ensemble이면 사용 가능한 모든 변형의 버전과 가중치가 키에 들어갑니다.
+        
+        Returns:
+            (유사도 또는 앙상블 결과 dict, 에러)
+        """
+        key = None
+        if digest1 is not None and digest2 is not None and self.result_cache is not None:
+            if model_type == 'ensemble':
+                versions = [self.siamese_version(v) for v in self.siamese_registry.available()]
+                versions.append(json.dumps(Config.ENSEMBLE_WEIGHTS, sort_keys=True))
+            else:
+                versions = [self.siamese_version(model_type)]
+            key = ResultCache.make_key('compare', digest1, digest2, self.crop_version(), *versions)
+        cached = self._cache_get('compare', key)
+        if cached is not None:
+            return cached, None
+        
+        if model_type == 'ensemble':
+            result, error = self.compare_noses_ensemble(nose_image1, nose_image2)
+            # 일부 변형이 실패한 결과는 저장하지 않음
+            cacheable = error is None and not result['errors']
+        else:
+            result, error = self.compare_noses(nose_image1, nose_image2, model_type)
+            cacheable = error is None
+        if cacheable:
+            self._cache_put('compare', key, result)
+        return result, error
+    
+    def crop_noses_from_bytes(self, images_data):
+        """여러 업로드 이미지를 병렬 디코딩하고 한 번의 YOLOv5 호출로 코 영역 크롭 (결과 캐시에 있으면 생략)"""
+        keys = [self.crop_cache_key(self.upload_digest(data)) for data in images_data]
+        results = [self._cache_get('crop', key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        images = list(self.decode_executor.map(
+            lambda i: self.preprocess_image(images_data[i]) if images_data[i] is not None else None, missing))
+        valid = [i for i, image in zip(missing, images) if image is not None]
+        for i in missing:
+            results[i] = (None, "Failed to process image", None)
+        if valid:
+            decoded = dict(zip(missing, images))
+            for i, result in zip(valid, self.crop_dog_noses([decoded[i] for i in valid])):
+                results[i] = result
+        for i in missing:
+            self.cache_crop_result(keys[i], results[i])
+        
+        noses, errors, qualities = (list(column) for column in zip(*results)) if results else ([], [], [])
+        return noses, errors, qualities
+    
+    def process_image_stream(self, named_images, model_type='original', include_crop=False):
+        """
+        (이름, 이미지 바이트) 스트림을 청크 단위로 크롭 + 특징 추출
+        
+        다음 청크의 디코딩/YOLOv5 검출을 백그라운드에서 미리 수행하는 동안 현재 청크를 임베딩하고,
+        청크가 끝날 때마다 이미지별 결과를 바로 생성합니다.
+        
+        Yields:
+            이미지별 결과 dict (index, name, success, features 또는 error)
+        """
+        def crop_chunk(chunk):
+            noses, errors, qualities = self.crop_noses_from_bytes([data for _, data in chunk])
+            return chunk, noses, errors, qualities
+        
+        chunks = chunked(named_images, max(1, Config.PROCESS_BATCH_CHUNK))
+        index = 0
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='process-batch') as prefetch:
+            # 업로드 스트림은 요청 스레드에서 읽고 디코딩/검출만 백그라운드로 넘김
+            chunk = next(chunks, None)
+            pending = prefetch.submit(crop_chunk, chunk) if chunk else None
+            while pending is not None:
+                current, noses, errors, qualities = pending.result()
+                chunk = next(chunks, None)
+                pending = prefetch.submit(crop_chunk, chunk) if chunk else None
+                
+                valid = [i for i, nose in enumerate(noses) if nose is not None]
+                features = [(None, None)] * len(noses)
+                if valid:
+                    for i, result in zip(valid, self.extract_nose_features_batch([noses[i] for i in valid],
+                                                                                  model_type)):
+                        features[i] = result
+                
+                for i, (name, _) in enumerate(current):
+                    feature, error = features[i]
+                    error = errors[i] or error
+                    if error or feature is None:
+                        result = {'index': index, 'name': name, 'success': False,
+                                  'error': error or 'Failed to extract features'}
+                    else:
+                        result = {'index': index, 'name': name, 'success': True,
+                                  'features': feature.tolist(), 'feature_size': len(feature),
+                                  'crop_size': noses[i].shape}
+                        if include_crop:
+                            _, buffer = cv2.imencode('.jpg', noses[i])
+                            result['cropped_nose'] = base64.b64encode(buffer).decode('utf-8')
+                    if qualities[i] is not None:
+                        result['quality'] = qualities[i]
+                    index += 1
+                    yield result
+    
+    def similarity_rows(self, noses_a, noses_b, model_type='original'):
+        """
+        비문 크롭 집합 A x B의 유사도 행렬을 행 단위로 생성
+        
+        각 이미지는 한 번만 임베딩하고, 여러 행을 묶어 점수 헤드를 한 번에 평가합니다.
+        크롭에 실패한 이미지(None)가 포함된 칸은 None입니다.
+        
+        Yields:
+            (행 번호, 유사도 리스트)
+        """
+        model_type = self.resolve_model_type(model_type)
+        parts = self.select_siamese_parts(model_type)
+        cols = [j for j, nose in enumerate(noses_b) if nose is not None]
+        
+        if parts is None:
+            # 분리되지 않은 모델은 행마다 쌍 배치로 비교
+            for i, nose_a in enumerate(noses_a):
+                row = [None] * len(noses_b)
+                if nose_a is not None and cols:
+                    results = self.compare_noses_batch([(nose_a, noses_b[j]) for j in cols], model_type)
+                    for j, (similarity, _) in zip(cols, results):
+                        row[j] = similarity
+                yield i, row
+            return
+        
+        _, head = parts
+        rows = [i for i, nose in enumerate(noses_a) if nose is not None]
+        embeddings_a = [None] * len(noses_a)
+        for i, embedding in zip(rows, self.embed_noses([noses_a[i] for i in rows], model_type)):
+            embeddings_a[i] = embedding
+        embeddings_b = self.embed_noses([noses_b[j] for j in cols], model_type)
+        
+        cols = [j for j, embedding in zip(cols, embeddings_b) if embedding is not None]
+        right = np.stack([embedding for embedding in embeddings_b if embedding is not None]) if cols else None
+        
+        # 한 번의 헤드 호출에 들어갈 쌍 수를 제한하면서 여러 행을 묶어 평가
+        rows_per_block = max(1, Config.MATRIX_HEAD_BATCH // max(1, len(cols)))
+        for start in range(0, len(noses_a), rows_per_block):
+            block = range(start, min(start + rows_per_block, len(noses_a)))
+            valid = [i for i in block if embeddings_a[i] is not None] if cols else []
+            
+            scores = None
+            if valid:
+                left = np.repeat(np.stack([embeddings_a[i] for i in valid]), len(cols), axis=0)
+                with self.metrics.timer('compare', model=model_type):
+                    scores = head.predict([left, np.tile(right, (len(valid),) + (1,) * (right.ndim - 1))],
+                                          verbose=0).reshape(len(valid), len(cols))
+                self.metrics.inc('nose_model_requests_total', left.shape[0], model=f'siamese_{model_type}_head')
+            
+            block_rows = {i: r for r, i in enumerate(valid)}
+            for i in block:
+                row = [None] * len(noses_b)
+                if i in block_rows:
+                    for j, similarity in zip(cols, scores[block_rows[i]]):
+                        row[j] = float(similarity)
+                yield i, row
+    
+    def get_gallery(self, model_type):
+        """
+        모델 타입별 임베딩 갤러리 반환 (첫 사용 시 memmap 로드)
+        
+        특징을 실제로 추출하는 모델(resolve_model_type) 기준으로 구분합니다.
+        알 수 없는 모델 타입은 ValueError (요청 값이 갤러리 디렉토리 이름으로 쓰이므로)
+        """
+        if model_type not in SIAMESE_VARIANTS:
+            raise ValueError(f"Unknown model_type: {model_type} (expected one of {', '.join(SIAMESE_VARIANTS)})")
+        model_type = self.resolve_model_type(model_type)
+        if model_type is None:
+            raise RuntimeError("No Siamese model available")
+        
+        with self._gallery_lock:
+            gallery = self.galleries.get(model_type)
+            if gallery is None:
+                gallery = NoseGallery(Config.GALLERY_DIR, model_type)
+                self.galleries[model_type] = gallery
+            return gallery
+    
+    def render_metrics(self):
+        """Prometheus 텍스트 형식 메트릭 (모델 로드 시간 및 배치 대기열 포함)"""
+        if self.yolo_load_time is not None:
+            self.metrics.set('nose_model_load_seconds', self.yolo_load_time, model='yolo')
+        for model_type, load_time in self.siamese_registry.load_times.items():
+            self.metrics.set('nose_model_load_seconds', load_time, model=f'siamese_{model_type}')
+        for name, stats in self.batch_stats().items():
+            self.metrics.set('nose_batch_queue_depth', stats['queue_depth'], batcher=name)
+        self.metrics.set('nose_service_ready', int(self.is_ready()))
+        return self.metrics.render()
+    
+    def batch_stats(self):
+        """배치 스케줄러별 채움 통계"""
+        with self._batcher_lock:
+            batchers = dict(self.batchers)
+        return {name: batcher.stats() for name, batcher in batchers.items()}
 
 # AI 서비스 인스턴스 생성
 ai_service = DogNoseAIService()
 
+# 메트릭 수집에서 제외할 엔드포인트 (스크레이프/헬스 체크)
+METRICS_EXEMPT_ENDPOINTS = ('metrics', 'health_check', 'readiness_check')
+
+@app.before_request
+def track_request_start():
+    """엔드포인트별 처리 중 요청 수 증가"""
+    endpoint = request.endpoint
+    if endpoint is None or endpoint in METRICS_EXEMPT_ENDPOINTS:
+        return
+    g.metrics_endpoint = endpoint
+    ai_service.metrics.add('nose_requests_in_flight', 1, endpoint=endpoint)
+    ai_service.metrics.inc('nose_requests_total', endpoint=endpoint)
+
+@app.teardown_request
+def track_request_end(exc):
+    """엔드포인트별 처리 중 요청 수 감소 (스트리밍 응답은 전송 완료 후)"""
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is not None:
+        ai_service.metrics.add('nose_requests_in_flight', -1, endpoint=endpoint)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 메트릭 엔드포인트 (단계별 지연 시간 히스토그램, 처리 중 요청 수, 모델별 호출 수)"""
+    return Response(ai_service.render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """헬스 체크 엔드포인트"""
+    """헬스 체크 엔드포인트 (liveness: 프로세스가 응답하면 항상 200)"""
+    registry = ai_service.siamese_registry
     return jsonify({
         'status': 'healthy',
+        'ready': ai_service.is_ready(),
         'yolo_loaded': ai_service.yolo_model is not None,
-        'siamese_loaded': ai_service.siamese_model is not None,
+        'siamese_loaded': len(registry.loaded()) > 0,
         'device': str(ai_service.device),
-        'available_siamese_models': list(ai_service.available_siamese_models.keys()) if hasattr(ai_service, 'available_siamese_models') else [],
-        'current_siamese_model': getattr(ai_service, 'current_siamese_model', None),
-        'total_models_loaded': len(getattr(ai_service, 'available_siamese_models', {})) + (1 if ai_service.yolo_model else 0)
+        'available_siamese_models': registry.available(),
+        'loaded_siamese_models': registry.loaded(),
+        'current_siamese_model': ai_service.current_siamese_model,
+        'total_models_loaded': len(registry.loaded()) + (1 if ai_service.yolo_model else 0)
     })
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """준비 상태 엔드포인트 (readiness: 모델이 준비되지 않았으면 503)"""
+    registry = ai_service.siamese_registry
+    body = {
+        'ready': ai_service.is_ready(),
+        'loading': not ai_service.ready.is_set(),
+        'yolo_loaded': ai_service.yolo_model is not None,
+        'yolo_load_time_s': ai_service.yolo_load_time,
+        'current_siamese_model': ai_service.current_siamese_model,
+        'siamese_registry': registry.stats()
+    }
+    return jsonify(body), (200 if body['ready'] else 503)
+
+@app.route('/batch_stats', methods=['GET'])
+def batch_stats():
+    """마이크로 배치 설정 및 채움 통계 API"""
+    return jsonify({
+        'enabled': Config.BATCHING_ENABLED,
+        'settings': {
+            'max_batch_size': Config.BATCH_MAX_SIZE,
+            'max_wait_ms': Config.BATCH_MAX_WAIT_MS,
+            'max_queue_size': Config.BATCH_MAX_QUEUE,
+            'timeout_s': Config.BATCH_TIMEOUT_S
+        },
+        'batchers': ai_service.batch_stats()
+    })
+
+@app.route('/result_cache', methods=['GET', 'DELETE'])
+def result_cache():
+    """결과 캐시 통계 조회 (GET) / 전체 삭제 (DELETE) API"""
+    cache = ai_service.result_cache
+    if cache is None:
+        return jsonify({'enabled': False})
+    if request.method == 'DELETE':
+        cache.clear()
+        logger.info("Result cache cleared")
+    return jsonify(dict(enabled=True, crop_version=ai_service.crop_version(),
+                        model_versions=ai_service.model_versions, **cache.stats()))
+
+def requested_top_k():
+    """요청의 top_k 파라미터 (1 ~ NOSE_MAX_CANDIDATES)"""
+    try:
+        top_k = int(request.form.get('top_k') or request.args.get('top_k') or 1)
+    except ValueError:
+        top_k = 1
+    return min(max(top_k, 1), max(1, Config.NOSE_MAX_CANDIDATES))
+
+def crop_error_response(error, quality=None):
+    """크롭 실패 응답 (품질 게이트에서 거절된 경우 품질 평가 포함)"""
+    body = {'error': error}
+    if quality is not None:
+        body['quality'] = quality
+    return jsonify(body), 400
+
+def encode_candidates(candidates, features=None):
+    """코 후보 목록을 JSON 응답용으로 변환 (크롭은 Base64 JPEG)"""
+    encoded = []
+    for i, candidate in enumerate(candidates):
+        _, buffer = cv2.imencode('.jpg', candidate['crop'])
+        item = {
+            'rank': i,
+            'box': list(candidate['box']),
+            'confidence': round(candidate['confidence'], 4),
+            'quality': candidate.get('quality'),
+            'cropped_nose': base64.b64encode(buffer).decode('utf-8')
+        }
+        if features is not None:
+            feature, error = features[i]
+            item['features'] = feature.tolist() if feature is not None else None
+            if error:
+                item['error'] = error
+        encoded.append(item)
+    return encoded
+
 @app.route('/crop_nose', methods=['POST'])
 def crop_nose():
     """강아지 코 크롭 API"""
@@ -259,27 +1030,59 @@ def crop_nose():
         image_file = request.files['image']
         image_data = image_file.read()
         
-        # 이미지 전처리
-        image = ai_service.preprocess_image(image_data)
-        if image is None:
-            return jsonify({'error': 'Failed to process image'}), 400
+        # top_k > 1이면 여러 코 후보를 크롭하여 함께 반환
+        top_k = requested_top_k()
+        if top_k > 1:
+            # 이미지 전처리
+            image = ai_service.preprocess_image(image_data)
+            if image is None:
+                return jsonify({'error': 'Failed to process image'}), 400
+            
+            candidates, error = ai_service.detect_nose_candidates([image], top_k=top_k)[0]
+            if error:
+                return jsonify({'error': error}), 400
+            kept, error = ai_service.apply_quality_gate(candidates)
+            if error:
+                return crop_error_response(error, candidates[0].get('quality'))
+            candidates = kept
+            with ai_service.metrics.timer('encode_response'):
+                encoded = encode_candidates(candidates)
+                return jsonify({
+                    'success': True,
+                    'cropped_nose': encoded[0]['cropped_nose'],
+                    'size': candidates[0]['crop'].shape,
+                    'quality': candidates[0].get('quality'),
+                    'candidates': encoded
+                })
         
-        # 코 영역 크롭
-        cropped_nose, error = ai_service.crop_dog_nose(image)
+        # 이미지 전처리 + 코 영역 크롭 (같은 업로드는 결과 캐시 사용, 품질 기준 미달이면 거절)
+        cropped_nose, error, quality = ai_service.crop_nose_from_bytes(
+            image_data, ai_service.upload_digest(image_data))
         
         if error:
-            return jsonify({'error': error}), 400
+            return crop_error_response(error, quality)
         
-        # 결과 이미지를 Base64로 인코딩
-        _, buffer = cv2.imencode('.jpg', cropped_nose)
-        encoded_image = base64.b64encode(buffer).decode('utf-8')
-        
-        return jsonify({
-            'success': True,
-            'cropped_nose': encoded_image,
-            'size': cropped_nose.shape
-        })
+        with ai_service.metrics.timer('encode_response'):
+            _, buffer = cv2.imencode('.jpg', cropped_nose)
+            
+            # 요청된 형식이 바이너리면 JPEG 원시 바이트로 응답
+            fmt = negotiate_format(request)
+            if fmt != 'json':
+                return binary_response(fmt, {'success': True, 'size': cropped_nose.shape, 'quality': quality},
+                                       crop_jpeg=buffer)
+            
+            # 결과 이미지를 Base64로 인코딩
+            encoded_image = base64.b64encode(buffer).decode('utf-8')
+            
+            return jsonify({
+                'success': True,
+                'cropped_nose': encoded_image,
+                'size': cropped_nose.shape,
+                'quality': quality
+            })
         
+    except BatchQueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logger.error(f"Error in crop_nose: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -294,30 +1097,36 @@ def extract_features():
         
         image_file = request.files['image']
         image_data = image_file.read()
+        digest = ai_service.upload_digest(image_data)
         
-        # 이미지 전처리
-        image = ai_service.preprocess_image(image_data)
-        if image is None:
-            return jsonify({'error': 'Failed to process image'}), 400
-        
-        # 코 영역 크롭
-        cropped_nose, error = ai_service.crop_dog_nose(image)
+        # 이미지 전처리 + 코 영역 크롭 (품질 기준 미달이면 Siamese 추론 없이 거절)
+        cropped_nose, error, quality = ai_service.crop_nose_from_bytes(image_data, digest)
         
         if error:
-            return jsonify({'error': error}), 400
+            return crop_error_response(error, quality)
         
-        # 특징 추출
-        features, error = ai_service.extract_nose_features(cropped_nose)
+        # 특징 추출 (같은 업로드 + 같은 모델 버전이면 결과 캐시 사용)
+        features, error = ai_service.cached_nose_features(cropped_nose, digest=digest)
         
         if error:
             return jsonify({'error': error}), 400
         
-        return jsonify({
-            'success': True,
-            'features': features.tolist(),
-            'feature_size': len(features)
-        })
+        with ai_service.metrics.timer('encode_response'):
+            # 요청된 형식이 바이너리면 float32 원시 바이트로 응답
+            fmt = negotiate_format(request)
+            if fmt != 'json':
+                return binary_response(fmt, {'success': True, 'feature_size': len(features),
+                                             'quality': quality}, features=features)
+            
+            return jsonify({
+                'success': True,
+                'features': features.tolist(),
+                'feature_size': len(features),
+                'quality': quality
+            })
         
+    except BatchQueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logger.error(f"Error in extract_features: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -336,22 +1145,43 @@ def compare_noses():
         # 선택적 모델 지정
         model_type = request.form.get('model_type', 'original')
         
-        # 이미지 전처리
-        image1 = ai_service.preprocess_image(image1_data)
-        image2 = ai_service.preprocess_image(image2_data)
+        digest1 = ai_service.upload_digest(image1_data)
+        digest2 = ai_service.upload_digest(image2_data)
         
-        if image1 is None or image2 is None:
-            return jsonify({'error': 'Failed to process images'}), 400
+        # 이미지 전처리 + 코 영역 크롭
+        nose1, error1, quality1 = ai_service.crop_nose_from_bytes(image1_data, digest1)
+        nose2, error2, quality2 = ai_service.crop_nose_from_bytes(image2_data, digest2)
         
-        # 코 영역 크롭
-        nose1, error1 = ai_service.crop_dog_nose(image1)
-        nose2, error2 = ai_service.crop_dog_nose(image2)
+        if error1 == "Failed to process image" or error2 == "Failed to process image":
+            return jsonify({'error': 'Failed to process images'}), 400
         
         if error1 or error2:
-            return jsonify({'error': f'Crop failed: {error1 or error2}'}), 400
+            body = {'error': f'Crop failed: {error1 or error2}'}
+            if quality1 is not None or quality2 is not None:
+                body['quality'] = [quality1, quality2]
+            return jsonify(body), 400
+        
+        # 앙상블 모드: 모든 변형으로 한 번에 비교
+        if model_type == 'ensemble':
+            result, error = ai_service.cached_compare(nose1, nose2, 'ensemble', digest1, digest2)
+            if error:
+                return jsonify({'error': error}), 400
+            
+            similarity = result['similarity']
+            return jsonify({
+                'success': True,
+                'similarity': similarity,
+                'is_same_dog': similarity > 0.5,
+                'confidence': 'high' if abs(similarity - 0.5) > 0.3 else 'medium',
+                'per_variant': result['per_variant'],
+                'votes_same': result['votes_same'],
+                'variant_errors': result['errors'],
+                'quality': [quality1, quality2],
+                'model_used': 'ensemble'
+            })
         
         # 비문 비교 (선택된 모델 사용)
-        similarity, error = ai_service.compare_noses(nose1, nose2, model_type)
+        similarity, error = ai_service.cached_compare(nose1, nose2, model_type, digest1, digest2)
         
         if error:
             return jsonify({'error': error}), 400
@@ -364,9 +1194,12 @@ def compare_noses():
             'similarity': similarity,
             'is_same_dog': is_same_dog,
             'confidence': 'high' if abs(similarity - 0.5) > 0.3 else 'medium',
+            'quality': [quality1, quality2],
             'model_used': model_type
         })
         
+    except BatchQueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         logger.error(f"Error in compare_noses: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -384,38 +1217,270 @@ def process_full():
         # 선택적 모델 지정
         model_type = request.form.get('model_type', 'original')
         
-        # 이미지 전처리
-        image = ai_service.preprocess_image(image_data)
-        if image is None:
-            return jsonify({'error': 'Failed to process image'}), 400
+        # top_k > 1이면 여러 코 후보를 한 번의 배치로 임베딩하여 함께 반환
+        top_k = requested_top_k()
+        if top_k > 1:
+            # 이미지 전처리
+            image = ai_service.preprocess_image(image_data)
+            if image is None:
+                return jsonify({'error': 'Failed to process image'}), 400
+            
+            candidates, error = ai_service.detect_nose_candidates([image], top_k=top_k)[0]
+            if error:
+                return jsonify({'error': error}), 400
+            kept, error = ai_service.apply_quality_gate(candidates)
+            if error:
+                return crop_error_response(error, candidates[0].get('quality'))
+            candidates = kept
+            features = ai_service.extract_nose_features_batch([c['crop'] for c in candidates], model_type)
+            best_features, error = features[0]
+            if error:
+                return jsonify({'error': error}), 400
+            with ai_service.metrics.timer('encode_response'):
+                encoded = encode_candidates(candidates, features)
+                return jsonify({
+                    'success': True,
+                    'cropped_nose': encoded[0]['cropped_nose'],
+                    'features': best_features.tolist(),
+                    'crop_size': candidates[0]['crop'].shape,
+                    'quality': candidates[0].get('quality'),
+                    'feature_size': len(best_features),
+                    'model_used': model_type,
+                    'candidates': encoded
+                })
+        
+        # 이미지 전처리 + 코 영역 크롭 (품질 기준 미달이면 Siamese 추론 없이 거절)
+        digest = ai_service.upload_digest(image_data)
+        cropped_nose, error, quality = ai_service.crop_nose_from_bytes(image_data, digest)
+        if error:
+            return crop_error_response(error, quality)
+        
+        # 특징 추출 (선택된 모델 사용, 같은 업로드 + 같은 모델 버전이면 결과 캐시 사용)
+        features, error = ai_service.cached_nose_features(cropped_nose, model_type, digest)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        with ai_service.metrics.timer('encode_response'):
+            _, buffer = cv2.imencode('.jpg', cropped_nose)
+            
+            # 요청된 형식이 바이너리면 JPEG/float32 원시 바이트로 응답
+            fmt = negotiate_format(request)
+            if fmt != 'json':
+                return binary_response(fmt, {
+                    'success': True,
+                    'crop_size': cropped_nose.shape,
+                    'feature_size': len(features),
+                    'quality': quality,
+                    'model_used': model_type
+                }, features=features, crop_jpeg=buffer)
+            
+            # 크롭된 이미지를 Base64로 인코딩
+            encoded_image = base64.b64encode(buffer).decode('utf-8')
+            
+            return jsonify({
+                'success': True,
+                'cropped_nose': encoded_image,
+                'features': features.tolist(),
+                'crop_size': cropped_nose.shape,
+                'feature_size': len(features),
+                'quality': quality,
+                'model_used': model_type
+            })
+        
+    except BatchQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        logger.error(f"Error in process_full: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/enroll', methods=['POST'])
+def enroll():
+    """비문 등록 API (갤러리에 임베딩 추가)"""
+    try:
+        if 'image' not in request.files:
+            return jsonify({'error': 'No image provided'}), 400
+        
+        dog_id = request.form.get('dog_id')
+        if not dog_id:
+            return jsonify({'error': 'dog_id is required'}), 400
+        
+        model_type = request.form.get('model_type', 'original')
+        gallery = ai_service.get_gallery(model_type)
+        
+        # 이미지 전처리 + 코 영역 크롭
+        image_data = request.files['image'].read()
+        digest = ai_service.upload_digest(image_data)
+        cropped_nose, error, quality = ai_service.crop_nose_from_bytes(image_data, digest)
+        if error:
+            return crop_error_response(error, quality)
         
-        # 코 영역 크롭
-        cropped_nose, error = ai_service.crop_dog_nose(image)
+        # 특징 추출
+        features, error = ai_service.cached_nose_features(cropped_nose, model_type, digest)
         if error:
             return jsonify({'error': error}), 400
         
-        # 특징 추출 (선택된 모델 사용)
-        features, error = ai_service.extract_nose_features(cropped_nose, model_type)
+        index = gallery.enroll(dog_id, features)
+        
+        return jsonify({
+            'success': True,
+            'dog_id': dog_id,
+            'gallery_index': index,
+            'gallery_size': len(gallery),
+            'model_used': gallery.model_type
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except BatchQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        logger.error(f"Error in enroll: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/identify', methods=['POST'])
+def identify():
+    """1:N 비문 식별 API (갤러리 상위 k개 후보 반환)"""
+    try:
+        if 'image' not in request.files:
+            return jsonify({'error': 'No image provided'}), 400
+        
+        model_type = request.form.get('model_type', 'original')
+        top_k = int(request.form.get('top_k', Config.IDENTIFY_TOP_K))
+        if top_k < 1:
+            return jsonify({'error': 'top_k must be positive'}), 400
+        gallery = ai_service.get_gallery(model_type)
+        
+        # 이미지 전처리 + 코 영역 크롭
+        image_data = request.files['image'].read()
+        digest = ai_service.upload_digest(image_data)
+        cropped_nose, error, quality = ai_service.crop_nose_from_bytes(image_data, digest)
+        if error:
+            return crop_error_response(error, quality)
+        
+        # 특징 추출
+        features, error = ai_service.cached_nose_features(cropped_nose, model_type, digest)
         if error:
             return jsonify({'error': error}), 400
         
-        # 크롭된 이미지를 Base64로 인코딩
-        _, buffer = cv2.imencode('.jpg', cropped_nose)
-        encoded_image = base64.b64encode(buffer).decode('utf-8')
+        matches = gallery.identify(features, top_k)
         
         return jsonify({
             'success': True,
-            'cropped_nose': encoded_image,
-            'features': features.tolist(),
-            'crop_size': cropped_nose.shape,
-            'feature_size': len(features),
-            'model_used': model_type
+            'matches': matches,
+            'gallery_size': len(gallery),
+            'model_used': gallery.model_type
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except BatchQueueFull as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        logger.error(f"Error in process_full: {str(e)}")
+        logger.error(f"Error in identify: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/gallery', methods=['GET'])
+def gallery_info():
+    """갤러리 상태 조회 API"""
+    model_type = request.args.get('model_type', 'original')
+    try:
+        return jsonify(ai_service.get_gallery(model_type).stats())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+
+@app.route('/similarity_matrix', methods=['POST'])
+def similarity_matrix():
+    """N x M 비문 유사도 행렬 API (images_b가 없으면 images_a 자기 자신과 비교)"""
+    try:
+        files_a = request.files.getlist('images_a')
+        files_b = request.files.getlist('images_b')
+        if not files_a:
+            return jsonify({'error': 'images_a is required'}), 400
+        
+        model_type = request.form.get('model_type', 'original')
+        
+        names_a = [f.filename for f in files_a]
+        noses_a, errors_a, _ = ai_service.crop_noses_from_bytes([f.read() for f in files_a])
+        
+        if files_b:
+            names_b = [f.filename for f in files_b]
+            noses_b, errors_b, _ = ai_service.crop_noses_from_bytes([f.read() for f in files_b])
+        else:
+            names_b, noses_b, errors_b = names_a, noses_a, errors_a
+        
+        errors = {
+            'rows': {name: error for name, error in zip(names_a, errors_a) if error},
+            'columns': {name: error for name, error in zip(names_b, errors_b) if error}
+        }
+        
+        stream = request.form.get('stream', '').lower() in ('1', 'true', 'yes') or \
+            len(noses_a) * len(noses_b) > Config.MATRIX_STREAM_THRESHOLD
+        
+        if not stream:
+            matrix = [row for _, row in ai_service.similarity_rows(noses_a, noses_b, model_type)]
+            return jsonify({
+                'success': True,
+                'rows': names_a,
+                'columns': names_b,
+                'matrix': matrix,
+                'errors': errors,
+                'model_used': model_type
+            })
+        
+        def generate():
+            yield json.dumps({'type': 'header', 'rows': names_a, 'columns': names_b,
+                              'errors': errors, 'model_used': model_type}) + '\n'
+            try:
+                for i, row in ai_service.similarity_rows(noses_a, noses_b, model_type):
+                    yield json.dumps({'type': 'row', 'row': i, 'name': names_a[i],
+                                      'similarities': row}) + '\n'
+            except Exception as e:
+                logger.error(f"Error streaming similarity matrix: {str(e)}")
+                yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        logger.error(f"Error in similarity_matrix: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/process_batch', methods=['POST'])
+def process_batch():
+    """대량 크롭 + 특징 추출 API (여러 이미지 또는 zip/tar 아카이브, 이미지별 NDJSON 스트리밍)"""
+    files = request.files.getlist('images') + request.files.getlist('archive')
+    if not files:
+        return jsonify({'error': 'No images provided'}), 400
+    
+    model_type = request.form.get('model_type', 'original')
+    include_crop = request.form.get('include_crop', '').lower() in ('1', 'true', 'yes')
+    
+    def limited(named_images):
+        for count, item in enumerate(named_images):
+            if count >= Config.PROCESS_BATCH_MAX_IMAGES:
+                raise ValueError(f'Too many images (max {Config.PROCESS_BATCH_MAX_IMAGES})')
+            yield item
+    
+    def generate():
+        start = time.time()
+        total = succeeded = 0
+        yield json.dumps({'type': 'header', 'model_used': model_type}) + '\n'
+        try:
+            for result in ai_service.process_image_stream(limited(iter_uploaded_images(files)),
+                                                          model_type, include_crop):
+                total += 1
+                succeeded += int(result['success'])
+                yield json.dumps(dict(type='result', **result)) + '\n'
+        except Exception as e:
+            logger.error(f"Error streaming process_batch: {str(e)}")
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        yield json.dumps({'type': 'summary', 'total': total, 'succeeded': succeeded,
+                          'failed': total - succeeded,
+                          'elapsed_s': round(time.time() - start, 3)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/switch_model', methods=['POST'])
 def switch_model():
     """Siamese 모델 변경 API"""
@@ -426,17 +1491,17 @@ def switch_model():
         
         model_type = data['model_type']
         
-        if not hasattr(ai_service, 'available_siamese_models'):
+        available = ai_service.siamese_registry.available()
+        if not available:
             return jsonify({'error': 'No Siamese models available'}), 500
         
-        if model_type not in ai_service.available_siamese_models:
+        if model_type not in available:
             return jsonify({
                 'error': f'Model type "{model_type}" not available',
-                'available_models': list(ai_service.available_siamese_models.keys())
+                'available_models': available
             }), 400
         
-        # 모델 변경
-        ai_service.siamese_model = ai_service.available_siamese_models[model_type]
+        # 모델 변경 (로드는 첫 사용 시)
         ai_service.current_siamese_model = model_type
         
         logger.info(f"Switched to Siamese model: {model_type}")
@@ -444,7 +1509,7 @@ def switch_model():
         return jsonify({
             'success': True,
             'current_model': model_type,
-            'available_models': list(ai_service.available_siamese_models.keys())
+            'available_models': available
         })
         
     except Exception as e:
@@ -458,16 +1523,20 @@ def list_models():
         return jsonify({
             'yolo_available': ai_service.yolo_model is not None,
             'siamese_models': {
-                'available': list(ai_service.available_siamese_models.keys()) if hasattr(ai_service, 'available_siamese_models') else [],
-                'current': getattr(ai_service, 'current_siamese_model', None),
+                'available': ai_service.siamese_registry.available(),
+                'loaded': ai_service.siamese_registry.loaded(),
+                'current': ai_service.current_siamese_model,
                 'descriptions': {
                     'original': 'Original preprocessing (no edge detection)',
                     'canny': 'Canny edge detection preprocessing', 
                     'laplacian': 'Laplacian edge detection preprocessing',
-                    'sobel': 'Sobel edge detection preprocessing'
+                    'sobel': 'Sobel edge detection preprocessing',
+                    'ensemble': 'All available variants in parallel with fused score (compare_noses only)'
                 }
             },
-            'total_models': len(getattr(ai_service, 'available_siamese_models', {})) + (1 if ai_service.yolo_model else 0)
+            'registry': ai_service.siamese_registry.stats(),
+            'embedding_cache': ai_service.embedding_cache.stats(),
+            'total_models': len(ai_service.siamese_registry.available()) + (1 if ai_service.yolo_model else 0)
         })
         
     except Exception as e:
@@ -475,4 +1544,4 @@ def list_models():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True) 
\ No newline at end of file
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+운영용 ASGI 서빙 모드
+
+uvicorn 비동기 프런트엔드가 연결을 처리하고, Flask 앱은 고정 크기 추론 워커 풀에서 실행됩니다.
+워커 풀 앞에는 크기가 제한된 대기열이 있으며, 대기열이나 엔드포인트별 동시 처리 한도를 넘는 요청은
+모델을 거치지 않고 즉시 503 + Retry-After로 거절하여 트래픽 급증 시에도 지연 시간이 예측 가능하게 유지됩니다.
+
+실행:
+    python asgi.py
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+여러 프로세스로 실행할 때는 model_host.py를 먼저 띄우고 MODEL_HOST_MODE=remote, SERVE_PROCESSES=N으로 실행합니다.
+"""
+
+import json
+import asyncio
+import logging
+
+from a2wsgi import WSGIMiddleware
+
+from config import Config
+from app import app as flask_app
+
+logger = logging.getLogger(__name__)
+
+
+class LoadSheddingMiddleware:
+    # 부하와 관계없이 항상 응답해야 하는 경로 (헬스 체크 등)
+    EXEMPT_PATHS = ('/health', '/ready', '/serving_stats', '/metrics')
+
+    def __init__(self, app, workers, max_queue, endpoint_limits=None, retry_after=1):
+        """
+        Args:
+            app: 감쌀 ASGI 앱
+            workers: 추론 워커 수
+            max_queue: 워커를 기다릴 수 있는 최대 요청 수
+            endpoint_limits: 경로 -> 동시 처리 한도
+            retry_after: 503 응답의 Retry-After (초)
+        """
+        self.app = app
+        self.workers = int(workers)
+        self.max_queue = int(max_queue)
+        self.capacity = self.workers + self.max_queue
+        self.endpoint_limits = dict(endpoint_limits or {})
+        self.retry_after = int(retry_after)
+
+        # 이벤트 루프 단일 스레드에서만 변경되므로 잠금이 필요 없음
+        self.in_system = 0
+        self.in_flight = {path: 0 for path in self.endpoint_limits}
+        self.admitted = 0
+        self.shed = {'queue_full': 0, 'endpoint_limit': 0}
+        self._slots = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        path = scope['path']
+        if path == '/serving_stats':
+            return await self._send_json(send, 200, self.stats())
+        if path in self.EXEMPT_PATHS:
+            return await self.app(scope, receive, send)
+
+        if self.in_system >= self.capacity:
+            self.shed['queue_full'] += 1
+            return await self._reject(send, 'Server is busy, request queue is full')
+
+        limit = self.endpoint_limits.get(path)
+        if limit is not None and self.in_flight[path] >= limit:
+            self.shed['endpoint_limit'] += 1
+            return await self._reject(send, f'Too many concurrent requests for {path}')
+
+        self.in_system += 1
+        self.admitted += 1
+        if limit is not None:
+            self.in_flight[path] += 1
+        try:
+            # 워커 수만큼만 Flask 앱에 넘기고 나머지는 여기서 대기 (제한된 대기열)
+            async with self._worker_slots():
+                await self.app(scope, receive, send)
+        finally:
+            self.in_system -= 1
+            if limit is not None:
+                self.in_flight[path] -= 1
+
+    def _worker_slots(self):
+        # 세마포어는 uvicorn 이벤트 루프 안에서 생성 (Python 3.9 호환)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    async def _reject(self, send, message):
+        await self._send_json(send, 503, {'error': message},
+                              extra_headers=[(b'retry-after', str(self.retry_after).encode())])
+
+    async def _send_json(self, send, status, body, extra_headers=()):
+        payload = json.dumps(body).encode('utf-8')
+        headers = [(b'content-type', b'application/json'),
+                   (b'content-length', str(len(payload)).encode())] + list(extra_headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_system': self.in_system,
+            'queued': max(0, self.in_system - self.workers),
+            'endpoint_limits': self.endpoint_limits,
+            'endpoint_in_flight': dict(self.in_flight),
+            'admitted': self.admitted,
+            'shed': dict(self.shed),
+        }
+
+
+# 헬스 체크가 추론 요청 뒤에서 기다리지 않도록 WSGI 스레드 풀은 워커 수보다 약간 크게 설정
+app = LoadSheddingMiddleware(
+    WSGIMiddleware(flask_app, workers=Config.SERVE_WORKERS + len(LoadSheddingMiddleware.EXEMPT_PATHS)),
+    workers=Config.SERVE_WORKERS,
+    max_queue=Config.SERVE_QUEUE_SIZE,
+    endpoint_limits=Config.SERVE_ENDPOINT_LIMITS,
+    retry_after=Config.SERVE_RETRY_AFTER_S,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    # 여러 프로세스로 실행할 때는 MODEL_HOST_MODE=remote로 모델을 model_host.py 하나에만 올림
+    if Config.SERVE_PROCESSES > 1 and Config.MODEL_HOST_MODE != 'remote':
+        logger.warning("SERVE_PROCESSES > 1 without MODEL_HOST_MODE=remote loads every model in each process")
+
+    uvicorn.run('asgi:app' if Config.SERVE_PROCESSES > 1 else app,
+                host=Config.SERVE_HOST, port=Config.SERVE_PORT, workers=Config.SERVE_PROCESSES,
+                backlog=Config.SERVE_BACKLOG, timeout_keep_alive=5)
@@ -0,0 +1,85 @@
+"""
+Siamese 모델 서빙 백엔드
+
+ONNX Runtime 세션을 Keras Model.predict와 같은 방식으로 호출할 수 있도록 감싸
+서비스 코드가 백엔드 종류와 무관하게 동작하도록 합니다.
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+ONNX_PRECISIONS = ('fp32', 'int8')
+
+
+def onnx_model_paths(models_dir, model_type, precision='fp32'):
+    """모델 타입별 ONNX 파일 경로 (전체 그래프, 임베딩 타워, 점수 헤드, INT8은 .int8.onnx)"""
+    models_dir = Path(models_dir)
+    suffix = '.onnx' if precision == 'fp32' else f'.{precision}.onnx'
+    return {
+        'full': models_dir / f"siamese_{model_type}{suffix}",
+        'tower': models_dir / f"siamese_{model_type}_tower{suffix}",
+        'head': models_dir / f"siamese_{model_type}_head{suffix}",
+    }
+
+
+class OnnxModel:
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=0):
+        """
+        Args:
+            path: .onnx 파일 경로
+            intra_op_threads: 연산 내부 병렬 스레드 수 (0이면 ONNX Runtime 기본값)
+            inter_op_threads: 연산 간 병렬 스레드 수 (0이면 ONNX Runtime 기본값)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(intra_op_threads)
+        options.inter_op_num_threads = int(inter_op_threads)
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.path = Path(path)
+        self.session = ort.InferenceSession(str(path), sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.inputs = self.session.get_inputs()
+
+    def predict(self, inputs, verbose=0):
+        """Keras Model.predict와 같은 입력 형식(배열 또는 배열 리스트)으로 추론"""
+        if not isinstance(inputs, (list, tuple)):
+            inputs = [inputs]
+        if len(inputs) != len(self.input_names):
+            raise ValueError(f"{self.path.name} expects {len(self.input_names)} inputs, got {len(inputs)}")
+
+        feed = {name: np.ascontiguousarray(x, dtype=np.float32)
+                for name, x in zip(self.input_names, inputs)}
+        return self.session.run(None, feed)[0]
+
+
+def load_onnx_siamese(models_dir, model_type, intra_op_threads=0, inter_op_threads=0, precision='fp32'):
+    """
+    ONNX로 변환된 Siamese 모델 로드
+
+    Args:
+        precision: 'fp32' 또는 'int8' (model_converter.py --int8로 양자화한 모델)
+
+    Returns:
+        (전체 모델, (타워, 헤드) 또는 None) / 전체 모델 파일이 없으면 None
+    """
+    paths = onnx_model_paths(models_dir, model_type, precision)
+    if not paths['full'].exists():
+        return None
+
+    full = OnnxModel(paths['full'], intra_op_threads, inter_op_threads)
+
+    parts = None
+    if paths['tower'].exists() and paths['head'].exists():
+        parts = (OnnxModel(paths['tower'], intra_op_threads, inter_op_threads),
+                 OnnxModel(paths['head'], intra_op_threads, inter_op_threads))
+
+    return full, parts
@@ -243,6 +243,68 @@ class DogNoseAPITester:
             print(f"   ❌ 오류: {error_msg}")
             return {'success': False, 'error': error_msg, 'model_type': model_type}
 
+    def similarity_matrix_test(self, image_paths, model_type='original'):
+        """전체 이미지 조합 비교 테스트 (서버에서 이미지당 한 번만 임베딩)"""
+        print(f"🔍 유사도 행렬 테스트: {len(image_paths)}개 이미지 (모델: {model_type})")
+        
+        opened = [open(path, 'rb') for path in image_paths]
+        try:
+            start_time = time.time()
+            
+            files = [('images_a', (path.name, f)) for path, f in zip(image_paths, opened)]
+            data = {'model_type': model_type, 'stream': 'true'}
+            response = requests.post(f"{self.api_url}/similarity_matrix", files=files, data=data,
+                                     timeout=300, stream=True)
+            
+            if response.status_code != 200:
+                error_msg = response.text
+                print(f"   ❌ 실패: {response.status_code} - {error_msg}")
+                return {}
+            
+            # NDJSON 행 단위로 수신
+            matrix = {}
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                if message['type'] == 'row':
+                    matrix[message['row']] = message['similarities']
+                elif message['type'] == 'error':
+                    print(f"   ❌ 실패: {message['error']}")
+            
+            processing_time = time.time() - start_time
+            pair_count = max(1, len(image_paths) * (len(image_paths) - 1) // 2)
+            
+            results = {}
+            for i, j in itertools.combinations(range(len(image_paths)), 2):
+                img1, img2 = image_paths[i], image_paths[j]
+                similarity = matrix.get(i, [None] * len(image_paths))[j]
+                
+                if similarity is None:
+                    results[(img1, img2)] = {'success': False, 'error': 'Nose crop failed', 'model_type': model_type}
+                    continue
+                
+                results[(img1, img2)] = {
+                    'success': True,
+                    'image1': img1.name,
+                    'image2': img2.name,
+                    'model_type': model_type,
+                    'similarity': similarity,
+                    'is_same_dog': similarity > 0.5,
+                    'confidence': 'high' if abs(similarity - 0.5) > 0.3 else 'medium',
+                    'processing_time': round(processing_time / pair_count, 4)
+                }
+            
+            print(f"   ✅ 성공! {len(results)}개 조합, 처리 시간: {processing_time:.2f}초")
+            return results
+                
+        except Exception as e:
+            print(f"   ❌ 오류: {str(e)}")
+            return {}
+        finally:
+            for f in opened:
+                f.close()
+
     def run_batch_tests(self):
         """배치 테스트 실행"""
         print("🐕 강아지 비문 인식 API 배치 테스트 시작")
@@ -294,14 +356,15 @@ class DogNoseAPITester:
             
             comparison_results = {}
             
-            # 모든 이미지 조합에 대해 비교 테스트
-            for img1, img2 in itertools.combinations(test_images, 2):
-                comparison_key = f"{img1.name}_vs_{img2.name}"
-                comparison_results[comparison_key] = {}
+            # 모델별로 유사도 행렬을 한 번에 요청하여 모든 이미지 조합 비교
+            for model in SIAMESE_MODELS:
+                matrix_results = self.similarity_matrix_test(test_images, model)
                 
-                for model in SIAMESE_MODELS:
-                    compare_result = self.compare_noses_test(img1, img2, model)
-                    comparison_results[comparison_key][model] = compare_result
+                for img1, img2 in itertools.combinations(test_images, 2):
+                    comparison_key = f"{img1.name}_vs_{img2.name}"
+                    compare_result = matrix_results.get(
+                        (img1, img2), {'success': False, 'error': 'No result', 'model_type': model})
+                    comparison_results.setdefault(comparison_key, {})[model] = compare_result
             
             self.test_results['comparisons'] = comparison_results
         
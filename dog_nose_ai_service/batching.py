@@ -0,0 +1,118 @@
+"""
+동시 추론 요청을 모아 한 번의 배치 호출로 처리하는 마이크로 배치 스케줄러
+"""
+
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class BatchQueueFull(Exception):
+    """배치 대기열이 가득 찬 경우"""
+
+
+class MicroBatcher:
+    def __init__(self, name, batch_fn, max_batch_size=8, max_wait_ms=5.0, max_queue_size=64):
+        """
+        Args:
+            name: 스케줄러 이름 (통계/로그용)
+            batch_fn: 입력 리스트를 받아 같은 길이의 결과 리스트를 반환하는 함수
+            max_batch_size: 한 배치에 모을 최대 요청 수
+            max_wait_ms: 첫 요청 도착 후 추가 요청을 기다리는 최대 시간 (ms)
+            max_queue_size: 대기열 최대 길이 (초과 시 BatchQueueFull)
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue_size = max(1, int(max_queue_size))
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+        self._size_histogram = {}
+
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """요청 하나를 대기열에 넣고 배치 처리 결과를 기다림"""
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            raise BatchQueueFull(f"Batch queue '{self.name}' is full ({self.max_queue_size})")
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        """첫 요청을 기다린 뒤 시간 창 안에 도착한 요청들을 최대 크기까지 모음"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Batch function returned {len(results)} results for {len(items)} inputs")
+            except Exception as e:
+                logger.error(f"Error in batch '{self.name}': {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+
+            self._record(len(batch))
+
+    def _record(self, batch_size):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += batch_size
+            self._size_histogram[batch_size] = self._size_histogram.get(batch_size, 0) + 1
+
+    def stats(self):
+        """배치 채움 통계"""
+        with self._stats_lock:
+            avg_size = self._items / self._batches if self._batches else 0.0
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'max_queue_size': self.max_queue_size,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_queue_depth,
+                'batches': self._batches,
+                'items': self._items,
+                'avg_batch_size': round(avg_size, 3),
+                'avg_fill_ratio': round(avg_size / self.max_batch_size, 3),
+                'batch_size_histogram': {str(k): v for k, v in sorted(self._size_histogram.items())},
+            }
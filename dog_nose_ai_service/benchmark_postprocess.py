@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+YOLOv5 검출 후처리 벤치마크 (pandas DataFrame vs 텐서 직접 처리)
+
+기존 경로: results.pandas().xyxy -> DataFrame.idxmax -> 크롭
+새 경로:   results.xyxy 텐서 -> numpy argmax/argsort -> 여백/경계 클리핑 크롭
+
+사용법:
+    python benchmark_postprocess.py                          # 합성 검출 결과로 측정
+    python benchmark_postprocess.py --images ./test_images   # 실제 YOLOv5 결과로 측정
+"""
+
+import os
+import argparse
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from detection import detections_to_numpy, crop_candidates
+
+PANDAS_COLUMNS = ['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name']
+
+
+def pandas_postprocess(all_detections, images, names):
+    """기존 방식: YOLOv5 Detections.pandas()와 같은 DataFrame 생성 후 최고 신뢰도 크롭"""
+    import pandas as pd
+
+    frames = [pd.DataFrame([row[:5] + [int(row[5]), names[int(row[5])]] for row in d.tolist()],
+                           columns=PANDAS_COLUMNS) for d in all_detections]
+    crops = []
+    for image, detections in zip(images, frames):
+        if len(detections) == 0:
+            crops.append(None)
+            continue
+        best = detections.loc[detections['confidence'].idxmax()]
+        x1, y1, x2, y2 = int(best['xmin']), int(best['ymin']), int(best['xmax']), int(best['ymax'])
+        crops.append(cv2.resize(image[y1:y2, x1:x2], (96, 96)))
+    return crops
+
+
+def tensor_postprocess(all_detections, images, top_k=1, padding=0.0):
+    """새 방식: 검출 텐서를 numpy로 한 번 옮겨 상위 후보 크롭"""
+    crops = []
+    for image, detections in zip(images, all_detections):
+        crops.append(crop_candidates(image, detections_to_numpy(detections), top_k=top_k, padding=padding))
+    return crops
+
+
+def synthetic_inputs(batch_size, detections_per_image, image_size=1280, seed=0):
+    """실제 모델 없이 측정하기 위한 합성 이미지/검출 결과"""
+    rng = np.random.default_rng(seed)
+    images = [rng.integers(0, 255, (image_size, image_size, 3), dtype=np.uint8) for _ in range(batch_size)]
+    all_detections = []
+    for _ in range(batch_size):
+        xy = rng.uniform(0, image_size * 0.8, (detections_per_image, 2))
+        wh = rng.uniform(32, image_size * 0.2, (detections_per_image, 2))
+        conf = rng.uniform(0.25, 1.0, (detections_per_image, 1))
+        cls = np.zeros((detections_per_image, 1))
+        all_detections.append(np.hstack([xy, xy + wh, conf, cls]).astype(np.float32))
+    return images, all_detections
+
+
+def time_call(fn, repeat):
+    fn()  # 워밍업
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def run_benchmark(images, all_detections, names, repeat):
+    per_image = len(images)
+    result = {'images': per_image, 'repeat': repeat}
+
+    result['tensor_top1_ms'] = time_call(lambda: tensor_postprocess(all_detections, images), repeat)
+    result['tensor_top3_padded_ms'] = time_call(
+        lambda: tensor_postprocess(all_detections, images, top_k=3, padding=0.1), repeat)
+    try:
+        result['pandas_top1_ms'] = time_call(lambda: pandas_postprocess(all_detections, images, names), repeat)
+        result['saved_per_request_ms'] = (result['pandas_top1_ms'] - result['tensor_top1_ms']) / per_image
+    except ImportError:
+        result['pandas_top1_ms'] = None
+        result['saved_per_request_ms'] = None
+    return result
+
+
+def load_real_inputs(images_dir, weights, repo_dir):
+    """실제 YOLOv5 추론 결과 (검출 텐서는 CPU로 이동)"""
+    from config import Config
+    from model_registry import load_yolo_local
+
+    weights = weights or os.path.join(Config.MODELS_DIR, 'yolo_best.pt')
+    model = load_yolo_local(weights, repo_dir or Config.YOLOV5_REPO_DIR, 'cpu')
+    paths = sorted(p for p in Path(images_dir).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    images = [cv2.imread(str(p)) for p in paths]
+    images = [image for image in images if image is not None]
+    results = model(images)
+    return images, [d.cpu() for d in results.xyxy], results.names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YOLOv5 후처리 벤치마크 (pandas vs 텐서)')
+    parser.add_argument('--images', help='실제 YOLOv5로 측정할 이미지 디렉토리')
+    parser.add_argument('--weights', help='YOLOv5 가중치 경로 (기본값: MODELS_DIR/yolo_best.pt)')
+    parser.add_argument('--repo-dir', help='YOLOv5 코드 경로 (기본값: 설정의 YOLOV5_REPO_DIR)')
+    parser.add_argument('--batch-sizes', default='1,8', help='합성 측정 배치 크기 (쉼표 구분)')
+    parser.add_argument('--detections', type=int, default=5, help='합성 측정 이미지당 검출 수')
+    parser.add_argument('--repeat', type=int, default=50, help='반복 횟수')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    args = parser.parse_args()
+
+    reports = []
+    if args.images:
+        images, all_detections, names = load_real_inputs(args.images, args.weights, args.repo_dir)
+        reports.append(dict(source='yolov5', **run_benchmark(images, all_detections, names, args.repeat)))
+    else:
+        for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+            images, all_detections = synthetic_inputs(batch_size, args.detections)
+            reports.append(dict(source='synthetic', **run_benchmark(images, all_detections, {0: 'nose'},
+                                                                  args.repeat)))
+
+    print(f"{'source':<10} {'images':>6} {'pandas(ms)':>11} {'tensor(ms)':>11} "
+          f"{'top3+pad(ms)':>13} {'saved/req(ms)':>14}")
+    for r in reports:
+        pandas_ms = f"{r['pandas_top1_ms']:.3f}" if r['pandas_top1_ms'] is not None else 'n/a'
+        saved = f"{r['saved_per_request_ms']:.3f}" if r['saved_per_request_ms'] is not None else 'n/a'
+        print(f"{r['source']:<10} {r['images']:>6} {pandas_ms:>11} {r['tensor_top1_ms']:>11.3f} "
+              f"{r['tensor_top3_padded_ms']:>13.3f} {saved:>14}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        print(f"결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+대량 업로드 처리 (/process_batch)
+
+multipart로 올라온 여러 이미지 파일과 zip/tar 아카이브를 (이름, 바이트) 스트림으로 풀어
+전체 업로드를 메모리에 올리지 않고 청크 단위로 디코딩/검출/임베딩 파이프라인에 넘깁니다.
+"""
+
+import os
+import tarfile
+import zipfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_image_name(name):
+    """이미지 확장자를 가진 일반 파일인지 (숨김/macOS 메타데이터 파일 제외)"""
+    base = os.path.basename(name)
+    return bool(base) and not base.startswith('.') and '__MACOSX' not in name \
+        and base.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def archive_kind(filename):
+    """파일 이름으로 아카이브 형식 판별 ('zip' / 'tar' / None)"""
+    name = (filename or '').lower()
+    if name.endswith('.zip'):
+        return 'zip'
+    if name.endswith(TAR_EXTENSIONS):
+        return 'tar'
+    return None
+
+
+def _iter_zip(file_storage):
+    # zip은 중앙 디렉터리를 읽어야 하므로 seek 가능한 업로드 스트림(임시 파일)을 그대로 사용
+    with zipfile.ZipFile(file_storage.stream) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and is_image_name(info.filename):
+                yield info.filename, archive.read(info)
+
+
+def _iter_tar(file_storage):
+    # 스트리밍 모드로 앞에서부터 한 멤버씩 읽음 (압축 형식 자동 판별)
+    with tarfile.open(fileobj=file_storage.stream, mode='r|*') as archive:
+        for member in archive:
+            if member.isfile() and is_image_name(member.name):
+                yield member.name, archive.extractfile(member).read()
+
+
+def iter_uploaded_images(files):
+    """
+    업로드 파일 목록에서 (이름, 이미지 바이트)를 순서대로 생성
+
+    zip/tar 아카이브는 안의 이미지 파일로 펼치고, 읽을 수 없는 아카이브는 (이름, None)을 생성합니다.
+    """
+    for file_storage in files:
+        kind = archive_kind(file_storage.filename)
+        if kind is None:
+            yield file_storage.filename, file_storage.read()
+            continue
+
+        try:
+            members = _iter_zip(file_storage) if kind == 'zip' else _iter_tar(file_storage)
+            for name, data in members:
+                yield f"{file_storage.filename}/{name}", data
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            logger.error(f"Error reading archive {file_storage.filename}: {str(e)}")
+            yield file_storage.filename, None
+
+
+def chunked(iterable, size):
+    """iterable을 최대 size 크기의 리스트로 나누어 생성"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
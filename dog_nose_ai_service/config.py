@@ -0,0 +1,99 @@
+import os
+import json
+
+
+def _env_bool(name, default):
+    """환경 변수를 불리언으로 해석"""
+    return os.getenv(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Config:
+    # 모델 경로 설정
+    MODELS_DIR = os.getenv("MODELS_DIR", "./models")
+    # 저장소에 포함된 YOLOv5 코드 (hubconf.py 위치, torch.hub source='local'로 로드)
+    YOLOV5_REPO_DIR = os.getenv(
+        "YOLOV5_REPO_DIR", "../dognose_recognition_management_service-main/backend/dogback/yolov05")
+
+    # 모델 레지스트리 설정
+    BACKGROUND_MODEL_LOAD = _env_bool("BACKGROUND_MODEL_LOAD", True)        # 서버 시작과 모델 로드 분리
+    SIAMESE_MEMORY_BUDGET_MB = float(os.getenv("SIAMESE_MEMORY_BUDGET_MB", "0"))  # 0이면 제한 없음
+    # 시작 시 미리 로드할 Siamese 변형 (쉼표 구분, "default"는 기본 모델)
+    SIAMESE_PRELOAD = [m.strip() for m in os.getenv("SIAMESE_PRELOAD", "default").split(",") if m.strip()]
+
+    # 마이크로 배치 스케줄러 설정
+    BATCHING_ENABLED = _env_bool("BATCHING_ENABLED", True)
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))            # 한 배치에 모을 최대 요청 수
+    BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))    # 첫 요청 이후 대기 시간 (ms)
+    BATCH_MAX_QUEUE = int(os.getenv("BATCH_MAX_QUEUE", "64"))         # 대기열 최대 길이
+    BATCH_TIMEOUT_S = float(os.getenv("BATCH_TIMEOUT_S", "30"))       # 결과 대기 최대 시간 (초)
+
+    # 1:N 식별 갤러리 설정
+    GALLERY_DIR = os.getenv("GALLERY_DIR", "./gallery")
+    IDENTIFY_TOP_K = int(os.getenv("IDENTIFY_TOP_K", "5"))
+
+    # 임베딩 캐시 설정 (이미지 내용 해시 기준)
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+    # 결과 캐시 설정 (업로드 바이트 해시 + 모델/설정 버전 기준 크롭/특징/비교 결과)
+    RESULT_CACHE_ENABLED = _env_bool("RESULT_CACHE_ENABLED", True)
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2048"))          # 메모리에 보관할 최대 결과 수
+    RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "86400"))     # 결과 유효 시간 (0이면 만료 없음)
+    RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")                     # 디스크 저장 경로 (비우면 메모리만 사용)
+    RESULT_CACHE_DISK_MB = float(os.getenv("RESULT_CACHE_DISK_MB", "512"))   # 디스크 저장소 최대 크기
+
+    # 유사도 행렬 설정
+    MATRIX_HEAD_BATCH = int(os.getenv("MATRIX_HEAD_BATCH", "4096"))            # 헤드 한 번 호출당 최대 쌍 수
+    MATRIX_STREAM_THRESHOLD = int(os.getenv("MATRIX_STREAM_THRESHOLD", "2500"))  # 이 칸 수를 넘으면 NDJSON 스트리밍
+
+    # 코 검출 후처리 설정
+    NOSE_CROP_PADDING = float(os.getenv("NOSE_CROP_PADDING", "0.0"))  # 박스 너비/높이 대비 여백 비율 (0이면 기존 크롭)
+    NOSE_MAX_CANDIDATES = int(os.getenv("NOSE_MAX_CANDIDATES", "5"))   # top_k 요청 상한
+
+    # 코 크롭 품질 게이트 ("off": 평가 안 함, "flag": 점수만 반환, "reject": 기준 미달 크롭은 임베딩 전에 거절)
+    # 기존 엔드포인트가 받던 입력을 거절하지 않도록 기본은 flag, 거절은 운영자가 선택
+    QUALITY_GATE_MODE = os.getenv("QUALITY_GATE_MODE", "flag").strip().lower()
+    QUALITY_MIN_SHARPNESS = float(os.getenv("QUALITY_MIN_SHARPNESS", "15"))        # 라플라시안 분산
+    QUALITY_MIN_BRIGHTNESS = float(os.getenv("QUALITY_MIN_BRIGHTNESS", "20"))      # 평균 밝기 (0-255)
+    QUALITY_MAX_BRIGHTNESS = float(os.getenv("QUALITY_MAX_BRIGHTNESS", "235"))
+    QUALITY_MAX_CLIPPED_RATIO = float(os.getenv("QUALITY_MAX_CLIPPED_RATIO", "0.5"))  # 포화 픽셀 비율
+    QUALITY_MIN_BOX_SIDE = int(os.getenv("QUALITY_MIN_BOX_SIDE", "24"))            # 리사이즈 전 박스 짧은 변 (px)
+    QUALITY_MIN_CONFIDENCE = float(os.getenv("QUALITY_MIN_CONFIDENCE", "0.5"))     # 검출 신뢰도 (YOLOv5 conf 0.25보다 높아야 의미 있음)
+
+    # 대량 처리(/process_batch) 설정
+    PROCESS_BATCH_CHUNK = int(os.getenv("PROCESS_BATCH_CHUNK", "16"))            # 한 번에 검출/임베딩할 이미지 수
+    PROCESS_BATCH_MAX_IMAGES = int(os.getenv("PROCESS_BATCH_MAX_IMAGES", "10000"))  # 요청당 최대 이미지 수
+    DECODE_WORKERS = int(os.getenv("DECODE_WORKERS", "4"))                       # 이미지 병렬 디코딩 스레드 수
+
+    # 앙상블 모드 변형별 가중치 (JSON, 예: {"original": 2, "canny": 1})
+    ENSEMBLE_WEIGHTS = json.loads(os.getenv("ENSEMBLE_WEIGHTS", "{}"))
+
+    # Siamese 서빙 백엔드 설정 ("keras" 또는 "onnx")
+    SIAMESE_BACKEND = os.getenv("SIAMESE_BACKEND", "keras").strip().lower()
+    # ONNX 백엔드 정밀도 ("fp32" 또는 "int8", int8 파일이 없으면 fp32로 대체)
+    SIAMESE_PRECISION = os.getenv("SIAMESE_PRECISION", "fp32").strip().lower()
+    ORT_INTRA_OP_THREADS = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))  # 0이면 ONNX Runtime 기본값
+    ORT_INTER_OP_THREADS = int(os.getenv("ORT_INTER_OP_THREADS", "1"))
+
+    # 운영용 ASGI 서빙 설정 (asgi.py)
+    SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+    SERVE_PORT = int(os.getenv("SERVE_PORT", "5000"))
+    SERVE_BACKLOG = int(os.getenv("SERVE_BACKLOG", "2048"))
+    SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "4"))            # 추론 워커 수
+    SERVE_QUEUE_SIZE = int(os.getenv("SERVE_QUEUE_SIZE", "32"))     # 워커를 기다릴 수 있는 최대 요청 수
+    SERVE_RETRY_AFTER_S = int(os.getenv("SERVE_RETRY_AFTER_S", "1"))
+    # 엔드포인트별 동시 처리 한도 (JSON, 예: {"/compare_noses": 4})
+    SERVE_ENDPOINT_LIMITS = json.loads(os.getenv("SERVE_ENDPOINT_LIMITS", '{"/similarity_matrix": 1, "/process_batch": 1}'))
+
+    # 모델 호스트 설정 ("local": 워커가 모델을 직접 로드, "remote": model_host.py 프로세스에 추론 위임)
+    MODEL_HOST_MODE = os.getenv("MODEL_HOST_MODE", "local").strip().lower()
+    MODEL_HOST_ADDRESS = os.getenv("MODEL_HOST_ADDRESS", "/tmp/dog_nose_model_host.sock")
+    MODEL_HOST_AUTHKEY = os.getenv("MODEL_HOST_AUTHKEY", "")                    # 필수 (기본값 없음, 호스트/워커 공통)
+    MODEL_HOST_SHM_MB = float(os.getenv("MODEL_HOST_SHM_MB", "64"))             # 채널당 공유 메모리 크기
+    MODEL_HOST_CHANNELS = int(os.getenv("MODEL_HOST_CHANNELS", "8"))            # 워커당 최대 동시 호출 수
+    MODEL_HOST_WAIT_S = float(os.getenv("MODEL_HOST_WAIT_S", "300"))            # 호스트 준비 대기 시간
+    SERVE_PROCESSES = int(os.getenv("SERVE_PROCESSES", "1"))                    # uvicorn 워커 프로세스 수
+
+    # 이미지 디코딩 설정
+    # JPEG는 긴 변이 이 값 이상으로 유지되는 범위에서 1/2, 1/4, 1/8 축소 디코딩 (0이면 항상 원본 크기)
+    # 기본값은 YOLOv5 입력(640)의 2배로, 코 영역이 Siamese 입력(96x96)보다 충분히 크게 남도록 함
+    DECODE_MIN_SIDE = int(os.getenv("DECODE_MIN_SIDE", "1280"))
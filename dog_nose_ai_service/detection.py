@@ -0,0 +1,76 @@
+"""
+YOLOv5 검출 결과 후처리 (pandas 없이 텐서/numpy로 직접 처리)
+
+results.xyxy의 이미지별 (N, 6) 텐서 [xmin, ymin, xmax, ymax, confidence, class]에서
+신뢰도 상위 k개 후보를 고르고, 여백을 더한 뒤 이미지 경계 안으로 잘라낸 박스로 크롭합니다.
+"""
+
+import cv2
+import numpy as np
+
+# Siamese 모델 입력 크기
+CROP_SIZE = (96, 96)
+
+
+def detections_to_numpy(detections):
+    """검출 텐서(또는 배열)를 (N, 6) float32 numpy 배열로 변환"""
+    if hasattr(detections, 'detach'):
+        detections = detections.detach().cpu().numpy()
+    detections = np.asarray(detections, dtype=np.float32)
+    return detections.reshape(-1, 6) if detections.size else np.zeros((0, 6), dtype=np.float32)
+
+
+def top_k_detections(detections, top_k=1, min_confidence=0.0):
+    """신뢰도 내림차순 상위 top_k개 검출 (min_confidence 미만 제외)"""
+    if len(detections) == 0:
+        return detections
+    detections = detections[detections[:, 4] >= min_confidence]
+    if top_k == 1 and len(detections):
+        # 단일 후보는 정렬 없이 argmax
+        return detections[[int(np.argmax(detections[:, 4]))]]
+    order = np.argsort(-detections[:, 4], kind='stable')
+    return detections[order[:top_k]]
+
+
+def pad_and_clip_box(box, image_shape, padding=0.0):
+    """
+    박스 각 변에 너비/높이 x padding 만큼 여백을 더하고 이미지 경계 안으로 자름
+
+    Returns:
+        (x1, y1, x2, y2) 정수 좌표 / 잘라낸 뒤 넓이가 0이면 None
+    """
+    height, width = image_shape[:2]
+    x1, y1, x2, y2 = (float(v) for v in box[:4])
+    pad_x = (x2 - x1) * padding
+    pad_y = (y2 - y1) * padding
+
+    # 여백이 0이면 기존 크롭과 같은 좌표 (소수점 버림)
+    x1 = min(max(int(x1 - pad_x), 0), width)
+    y1 = min(max(int(y1 - pad_y), 0), height)
+    x2 = min(max(int(x2 + pad_x), 0), width)
+    y2 = min(max(int(y2 + pad_y), 0), height)
+
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+def crop_candidates(image, detections, top_k=1, padding=0.0, min_confidence=0.0, size=CROP_SIZE):
+    """
+    이미지 한 장의 검출 결과에서 상위 후보 크롭 생성
+
+    Returns:
+        [{'crop': 크롭 이미지, 'box': (x1, y1, x2, y2), 'confidence': 신뢰도}, ...] (신뢰도 내림차순)
+    """
+    candidates = []
+    for detection in top_k_detections(detections, top_k, min_confidence):
+        box = pad_and_clip_box(detection, image.shape, padding)
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        candidates.append({
+            'crop': cv2.resize(image[y1:y2, x1:x2], size),
+            'box': box,
+            'confidence': float(detection[4]),
+        })
+    return candidates
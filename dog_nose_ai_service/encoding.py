@@ -0,0 +1,86 @@
+"""
+응답 형식 협상 및 바이너리 인코딩
+
+JSON(기본값) 외에 클라이언트가 Accept 헤더 또는 format 파라미터로 요청하면
+- msgpack: 특징 벡터는 little-endian float32 원시 바이트, 크롭은 JPEG 원시 바이트
+- multipart/mixed: JSON 메타데이터 + float32 특징 벡터 + JPEG 파트
+로 응답하여 base64/float 리스트 직렬화 비용과 페이로드 크기를 줄입니다.
+"""
+
+import json
+import uuid
+
+import numpy as np
+from flask import Response
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+MULTIPART_MIMETYPE = 'multipart/mixed'
+FEATURES_DTYPE = '<f4'
+
+
+def negotiate_format(request):
+    """요청에서 응답 형식 결정 ('json' / 'msgpack' / 'multipart')"""
+    explicit = (request.args.get('format') or request.form.get('format') or '').strip().lower()
+    if explicit in ('json', 'msgpack', 'multipart'):
+        return explicit
+
+    best = request.accept_mimetypes.best_match(
+        ['application/json', MULTIPART_MIMETYPE] + list(MSGPACK_MIMETYPES), default='application/json')
+    if best in MSGPACK_MIMETYPES:
+        return 'msgpack'
+    if best == MULTIPART_MIMETYPE:
+        return 'multipart'
+    return 'json'
+
+
+def features_to_bytes(features):
+    """특징 벡터를 little-endian float32 원시 바이트로 변환"""
+    return np.asarray(features, dtype=FEATURES_DTYPE).tobytes()
+
+
+def _jsonable(metadata):
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in metadata.items()}
+
+
+def binary_response(fmt, metadata, features=None, crop_jpeg=None):
+    """
+    msgpack 또는 multipart 응답 생성
+
+    Args:
+        fmt: 'msgpack' 또는 'multipart'
+        metadata: 응답 메타데이터 (success, feature_size 등)
+        features: 특징 벡터 (선택)
+        crop_jpeg: JPEG로 인코딩된 크롭 이미지 버퍼 (선택)
+    """
+    metadata = _jsonable(metadata)
+    if features is not None:
+        metadata['features_dtype'] = FEATURES_DTYPE
+
+    if fmt == 'msgpack':
+        import msgpack
+
+        body = dict(metadata)
+        if features is not None:
+            body['features'] = features_to_bytes(features)
+        if crop_jpeg is not None:
+            body['cropped_nose'] = bytes(crop_jpeg)
+        return Response(msgpack.packb(body, use_bin_type=True), mimetype=MSGPACK_MIMETYPES[0])
+
+    boundary = uuid.uuid4().hex
+    parts = [('metadata', 'application/json', json.dumps(metadata).encode('utf-8'))]
+    if features is not None:
+        parts.append(('features', 'application/octet-stream', features_to_bytes(features)))
+    if crop_jpeg is not None:
+        parts.append(('cropped_nose', 'image/jpeg', bytes(crop_jpeg)))
+
+    chunks = []
+    for name, content_type, payload in parts:
+        chunks.append(f"--{boundary}\r\n"
+                      f"Content-Disposition: inline; name=\"{name}\"\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(payload)}\r\n\r\n".encode('ascii'))
+        chunks.append(payload)
+        chunks.append(b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode('ascii'))
+
+    return Response(b"".join(chunks), content_type=f"{MULTIPART_MIMETYPE}; boundary={boundary}")
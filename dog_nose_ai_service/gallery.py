@@ -0,0 +1,170 @@
+"""
+비문 임베딩 갤러리 (1:N 식별용)
+
+임베딩은 모델 타입별 디렉토리에 float32 원시 바이너리로 덧붙여 저장하고,
+재시작 시에는 np.memmap으로 바로 매핑하여 전체 파일을 읽지 않고 로드합니다.
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NoseGallery:
+    VECTORS_FILE = 'vectors.f32'
+    IDS_FILE = 'ids.jsonl'
+    META_FILE = 'meta.json'
+
+    def __init__(self, root_dir, model_type):
+        """
+        Args:
+            root_dir: 갤러리 루트 디렉토리
+            model_type: Siamese 모델 타입 (모델별로 임베딩 공간이 다르므로 분리 저장)
+        """
+        # 요청 값이 경로로 쓰이므로 디렉토리 이름 하나만 허용 (상위 경로로 벗어나지 않도록)
+        if not model_type or model_type in ('.', '..') or Path(model_type).name != model_type \
+                or os.sep in model_type or (os.altsep and os.altsep in model_type):
+            raise ValueError(f"Invalid gallery model_type: {model_type!r}")
+        self.model_type = model_type
+        self.path = Path(root_dir) / model_type
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.dim = None
+        self.ids = []
+        self._matrix = None
+
+        self._load()
+
+    def _load(self):
+        """메타데이터와 ID 목록을 읽고, 중단된 등록을 정리한 뒤 벡터 파일을 memmap으로 매핑"""
+        meta_path = self.path / self.META_FILE
+        if meta_path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.dim = json.load(f)['dim']
+
+        # 줄바꿈까지 온전히 기록된 ID 줄만 사용 (줄별 끝 위치를 함께 기록)
+        ids, ends = [], []
+        ids_path = self.path / self.IDS_FILE
+        if ids_path.exists():
+            with open(ids_path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        dog_id = json.loads(line)['dog_id']
+                    except (ValueError, KeyError):
+                        break
+                    offset += len(line)
+                    ids.append(dog_id)
+                    ends.append(offset)
+
+        self._repair(ids, ends)
+        self._remap()
+        logger.info(f"Gallery '{self.model_type}' loaded: {len(self.ids)} embeddings")
+
+    def _repair(self, ids, ends):
+        """
+        기록 도중 중단된 등록 정리
+
+        등록은 벡터 -> ID 순서로 덧붙이므로, 중단되면 짝이 없는 벡터나 일부만 기록된 행이 남습니다.
+        그대로 두면 다음 등록의 ID가 남은 벡터와 짝지어지므로, 두 파일을 완전한 행 기준 같은 행 수로 자릅니다.
+        """
+        vectors_path = self.path / self.VECTORS_FILE
+        ids_path = self.path / self.IDS_FILE
+        vector_bytes = os.path.getsize(vectors_path) if vectors_path.exists() else 0
+        rows = 0 if self.dim is None else min(vector_bytes // (self.dim * 4), len(ids))
+
+        if vectors_path.exists() and vector_bytes != rows * (self.dim or 0) * 4:
+            logger.warning(f"Gallery '{self.model_type}': truncating {self.VECTORS_FILE} "
+                           f"from {vector_bytes} bytes to {rows} rows")
+            with open(vectors_path, 'r+b') as f:
+                f.truncate(rows * (self.dim or 0) * 4)
+        ids_bytes = ends[rows - 1] if rows else 0
+        if ids_path.exists() and os.path.getsize(ids_path) != ids_bytes:
+            logger.warning(f"Gallery '{self.model_type}': truncating {self.IDS_FILE} to {rows} rows")
+            with open(ids_path, 'r+b') as f:
+                f.truncate(ids_bytes)
+        self.ids = ids[:rows]
+
+    def _remap(self):
+        vectors_path = self.path / self.VECTORS_FILE
+        if self.dim is None or not vectors_path.exists():
+            self._matrix = None
+            return
+
+        rows = len(self.ids)
+        if rows == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(vectors_path, dtype='<f4', mode='r', shape=(rows, self.dim))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def enroll(self, dog_id, features):
+        """임베딩 하나를 갤러리 끝에 추가"""
+        vector = np.asarray(features, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            raise ValueError("Cannot enroll a zero feature vector")
+        vector = vector / norm
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vector.shape[0])
+                with open(self.path / self.META_FILE, 'w', encoding='utf-8') as f:
+                    json.dump({'dim': self.dim, 'model_type': self.model_type}, f)
+            elif vector.shape[0] != self.dim:
+                raise ValueError(f"Feature size {vector.shape[0]} does not match gallery dim {self.dim}")
+
+            vectors_path, ids_path = self.path / self.VECTORS_FILE, self.path / self.IDS_FILE
+            sizes = [os.path.getsize(p) if p.exists() else 0 for p in (vectors_path, ids_path)]
+            try:
+                with open(vectors_path, 'ab') as f:
+                    f.write(vector.astype('<f4').tobytes())
+                with open(ids_path, 'ab') as f:
+                    f.write((json.dumps({'dog_id': dog_id, 'enrolled_at': time.time()}) + '\n').encode('utf-8'))
+            except Exception:
+                # 일부만 기록된 벡터/ID가 다음 등록과 짝지어지지 않도록 되돌림
+                for path, size in zip((vectors_path, ids_path), sizes):
+                    if path.exists():
+                        with open(path, 'r+b') as f:
+                            f.truncate(size)
+                raise
+
+            self.ids.append(dog_id)
+            self._remap()
+            return len(self.ids) - 1
+
+    def identify(self, features, top_k=5):
+        """코사인 유사도 기준 상위 k개 후보 반환"""
+        with self._lock:
+            matrix, ids = self._matrix, list(self.ids)
+
+        if matrix is None:
+            return []
+
+        query = np.asarray(features, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dim:
+            raise ValueError(f"Feature size {query.shape[0]} does not match gallery dim {self.dim}")
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        # 전체 갤러리에 대해 한 번의 행렬-벡터 곱으로 유사도 계산
+        scores = matrix @ query
+        k = min(int(top_k), scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [{'dog_id': ids[i], 'similarity': float(scores[i]), 'index': int(i)} for i in top]
+
+    def stats(self):
+        return {'model_type': self.model_type, 'size': len(self.ids), 'dim': self.dim}
@@ -0,0 +1,98 @@
+"""
+업로드 이미지 빠른 디코딩
+
+휴대폰 사진(12MP 이상)은 YOLOv5 입력(640) 대비 매우 크므로, JPEG는 libjpeg의 축소 디코딩
+(1/2, 1/4, 1/8)을 사용해 필요한 해상도로 바로 디코딩합니다. PIL -> RGB 변환 -> numpy -> BGR 변환으로
+이어지던 전체 해상도 복사 없이 cv2.imdecode 한 번으로 BGR 배열을 얻고, EXIF 방향은 직접 적용합니다.
+"""
+
+import io
+import logging
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+# 축소 배율 -> cv2 디코딩 플래그 (큰 배율부터 시도)
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
+
+
+def read_image_header(image_bytes):
+    """헤더만 읽어 (형식, (너비, 높이), EXIF 방향) 반환 (픽셀 디코딩 없음)"""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            orientation = 1
+            if image.format == 'JPEG':
+                orientation = image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+            return image.format, image.size, orientation
+    except Exception:
+        return None, None, 1
+
+
+def choose_decode_scale(size, min_side):
+    """긴 변이 min_side 이상으로 유지되는 가장 큰 축소 배율 (1, 2, 4, 8)"""
+    if size is None or min_side <= 0:
+        return 1
+    long_side = max(size)
+    for scale, _ in REDUCED_DECODE_FLAGS:
+        if long_side / scale >= min_side:
+            return scale
+    return 1
+
+
+def apply_exif_orientation(image, orientation):
+    """EXIF 방향 값(1-8)에 맞게 이미지 회전/반전"""
+    if orientation == 2:
+        return cv2.flip(image, 1)
+    if orientation == 3:
+        return cv2.rotate(image, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(image, 0)
+    if orientation == 5:
+        return cv2.transpose(image)
+    if orientation == 6:
+        return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.rotate(cv2.transpose(image), cv2.ROTATE_180)
+    if orientation == 8:
+        return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return image
+
+
+def decode_image(image_bytes, min_side=0):
+    """
+    이미지 바이트를 BGR numpy 배열로 디코딩
+
+    Args:
+        image_bytes: 업로드된 이미지 바이트
+        min_side: 디코딩 결과의 긴 변이 이 값 이상이 되도록 JPEG 축소 배율 선택 (0이면 원본 크기)
+
+    Returns:
+        (BGR 이미지, 적용된 축소 배율) / 디코딩 실패 시 (None, 1)
+    """
+    image_format, size, orientation = read_image_header(image_bytes)
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+
+    scale = choose_decode_scale(size, min_side) if image_format == 'JPEG' else 1
+    flags = dict(REDUCED_DECODE_FLAGS).get(scale, cv2.IMREAD_COLOR) | cv2.IMREAD_IGNORE_ORIENTATION
+
+    image = cv2.imdecode(buffer, flags)
+    if image is None:
+        # OpenCV가 지원하지 않는 형식은 PIL로 디코딩
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as pil_image:
+                image = cv2.cvtColor(np.asarray(pil_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+            scale = 1
+        except Exception as e:
+            logger.error(f"Error decoding image: {str(e)}")
+            return None, 1
+
+    return apply_exif_orientation(image, orientation), scale
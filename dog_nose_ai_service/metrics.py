@@ -0,0 +1,135 @@
+"""
+비문 파이프라인 단계별 지연 시간 메트릭 (Prometheus 텍스트 형식)
+
+측정은 perf_counter 두 번과 잠금 하나로 끝나도록 단순하게 유지하여
+수십~수백 ms 단위의 추론 대비 오버헤드가 무시할 수준이 되도록 합니다.
+"""
+
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# 지연 시간 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 파이프라인 단계
+STAGES = ('decode', 'detect', 'crop_resize', 'quality', 'siamese_preprocess', 'embed', 'compare', 'encode_response')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}   # (이름, 라벨) -> Histogram
+        self._counters = {}     # (이름, 라벨) -> 값
+        self._gauges = {}       # (이름, 라벨) -> 값
+        self._help = {}
+
+    def describe(self, name, metric_type, help_text):
+        self._help[name] = (metric_type, help_text)
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def add(self, name, amount, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """단계 실행 시간을 nose_stage_duration_seconds 히스토그램에 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('nose_stage_duration_seconds', time.perf_counter() - start, stage=stage, **labels)
+
+    def render(self):
+        """Prometheus 텍스트 노출 형식으로 직렬화"""
+        with self._lock:
+            histograms = {k: (list(h.counts), h.total, h.count, h.buckets) for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        lines = []
+        described = set()
+
+        def header(name, default_type):
+            if name in described:
+                return
+            described.add(name)
+            metric_type, help_text = self._help.get(name, (default_type, name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), value in sorted(gauges.items()):
+            header(name, 'gauge')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def create_service_metrics():
+    """비문 서비스에서 사용하는 메트릭 설명 등록"""
+    metrics = MetricsRegistry()
+    metrics.describe('nose_stage_duration_seconds', 'histogram',
+                     'Latency of each nose pipeline stage in seconds')
+    metrics.describe('nose_requests_in_flight', 'gauge', 'Requests currently being processed per endpoint')
+    metrics.describe('nose_requests_total', 'counter', 'Requests received per endpoint')
+    metrics.describe('nose_model_requests_total', 'counter', 'Inference calls per model')
+    metrics.describe('nose_model_load_seconds', 'gauge', 'Time taken to load each model in seconds')
+    metrics.describe('nose_quality_rejections_total', 'counter', 'Nose crops rejected by the quality gate')
+    metrics.describe('nose_result_cache_requests_total', 'counter',
+                     'Result cache lookups per kind and result (memory_hits/disk_hits/misses)')
+    metrics.describe('nose_batch_queue_depth', 'gauge', 'Items waiting in each micro-batch queue')
+    metrics.describe('nose_service_ready', 'gauge', 'Whether the service is ready to serve inference (1/0)')
+    return metrics
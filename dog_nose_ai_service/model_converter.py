@@ -5,16 +5,95 @@
 """
 
 import os
+import json
+import time
 import shutil
 import torch
+import numpy as np
 import tensorflow as tf
 from pathlib import Path
+from datetime import datetime
 import logging
+import itertools
+
+import cv2
+
+from siamese import split_siamese_model, preprocess_nose_image
+from backends import OnnxModel, onnx_model_paths
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _calibration_reader(feeds):
+    """입력 dict 리스트를 ONNX Runtime 정적 양자화 보정 데이터로 제공"""
+    from onnxruntime.quantization import CalibrationDataReader
+    
+    class _FeedReader(CalibrationDataReader):
+        def __init__(self):
+            self._feeds = iter(feeds)
+        
+        def get_next(self):
+            return next(self._feeds, None)
+    
+    return _FeedReader()
+
+def load_label_map(path):
+    """--labels JSON 파일 {"<images_dir 기준 상대 경로>": "<강아지 ID>"} 로드"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return {str(k): str(v) for k, v in json.load(f).items()}
+
+def crop_label(path, images_dir, labels=None):
+    """
+    평가 이미지의 강아지 ID 라벨
+
+    labels 맵이 있으면 맵의 값(images_dir 기준 상대 경로로 조회), 없으면 <강아지 ID>/ 하위 디렉토리 이름,
+    평평한 디렉토리의 이미지는 None. 파일 이름은 라벨로 쓰지 않습니다
+    (test_images의 n02088094_392.jpg처럼 앞부분이 강아지가 아니라 견종 ID인 경우가 있음).
+    """
+    if labels is not None:
+        return labels.get(path.relative_to(images_dir).as_posix())
+    if path.parent != images_dir:
+        return path.parent.name
+    return None
+
+def split_by_dog(crops, calibration_size, eval_size, seed=0):
+    """
+    크롭을 보정용/평가용으로 분리 (같은 강아지 사진은 한쪽에만, 보정은 전체의 절반 이하)
+
+    라벨이 없는 크롭은 한 장씩 별도 그룹으로 취급합니다.
+    """
+    groups = {}
+    for i, (label, _) in enumerate(crops):
+        groups.setdefault(label if label is not None else f"#{i}", []).append(i)
+    keys = list(groups)
+    np.random.default_rng(seed).shuffle(keys)
+
+    calibration_limit = min(calibration_size, len(crops) // 2)
+    calibration, evaluation = [], []
+    for key in keys:
+        if len(calibration) + len(groups[key]) <= calibration_limit:
+            calibration.extend(groups[key])
+        elif len(evaluation) < eval_size:
+            evaluation.extend(groups[key])
+    return [crops[i] for i in sorted(calibration)], [crops[i] for i in sorted(evaluation[:eval_size])]
+
+def sample_pairs(labels, count, seed=0):
+    """
+    보정용 이미지 쌍 최대 count개 (무작위 순서, 같은 강아지 쌍을 절반까지 섞음)
+
+    combinations 앞쪽만 쓰면 (0, j) 쌍만 나오므로 전체 쌍에서 무작위로 고릅니다.
+    """
+    pairs = list(itertools.combinations(range(len(labels)), 2))
+    order = np.random.default_rng(seed).permutation(len(pairs))
+    pairs = [pairs[k] for k in order]
+    same = [(i, j) for i, j in pairs if labels[i] is not None and labels[i] == labels[j]]
+    different = [(i, j) for i, j in pairs if not (labels[i] is not None and labels[i] == labels[j])]
+    n_same = min(len(same), count // 2)
+    n_different = min(len(different), count - n_same)
+    n_same = min(len(same), count - n_different)  # 다른 강아지 쌍이 모자라면 같은 강아지 쌍으로 채움
+    return same[:n_same] + different[:n_different]
+
 class ModelConverter:
     def __init__(self, source_project_path, target_models_path):
         """
@@ -181,6 +260,342 @@ class ModelConverter:
             logger.error(f"Error creating model info: {str(e)}")
             return False
     
+    def _export_keras_to_onnx(self, model, output_path, opset):
+        """Keras 모델 하나를 ONNX 파일로 변환"""
+        import tf2onnx
+        
+        input_signature = [
+            tf.TensorSpec((None,) + tuple(model_input.shape[1:]), tf.float32, name=f"input_{i}")
+            for i, model_input in enumerate(model.inputs)
+        ]
+        tf2onnx.convert.from_keras(model, input_signature=input_signature,
+                                   opset=opset, output_path=str(output_path))
+        logger.info(f"ONNX model exported: {output_path}")
+    
+    def export_onnx_models(self, opset=13):
+        """Siamese .h5 모델들을 ONNX로 변환 (전체 그래프 + 임베딩 타워/점수 헤드)"""
+        exported = {}
+        
+        for h5_file in sorted(self.target_path.glob("siamese_*.h5")):
+            model_type = h5_file.stem[len("siamese_"):]
+            try:
+                model = tf.keras.models.load_model(h5_file)
+                paths = onnx_model_paths(self.target_path, model_type)
+                
+                self._export_keras_to_onnx(model, paths['full'], opset)
+                
+                # 분리 가능한 모델은 임베딩 캐시 경로를 위해 타워/헤드도 변환
+                parts = split_siamese_model(model)
+                if parts is not None:
+                    tower, head = parts
+                    self._export_keras_to_onnx(tower, paths['tower'], opset)
+                    self._export_keras_to_onnx(head, paths['head'], opset)
+                
+                exported[model_type] = {'full': True, 'split': parts is not None}
+            except Exception as e:
+                logger.error(f"Error exporting '{model_type}' to ONNX: {str(e)}")
+                exported[model_type] = {'full': False, 'split': False, 'error': str(e)}
+        
+        return exported
+    
+    def _time_predict(self, predict, inputs, runs):
+        """추론 함수의 호출당 지연 시간 측정 (ms)"""
+        predict(inputs)  # 워밍업
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            predict(inputs)
+            timings.append((time.perf_counter() - start) * 1000.0)
+        timings = np.array(timings)
+        return {
+            'mean_ms': round(float(timings.mean()), 3),
+            'p50_ms': round(float(np.percentile(timings, 50)), 3),
+            'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        }
+    
+    def compare_onnx_backend(self, batch_sizes=(1, 8), runs=50, atol=1e-4, intra_op_threads=0):
+        """Keras와 ONNX Runtime 출력 일치 여부 및 지연 시간 비교 리포트 생성"""
+        report = {}
+        rng = np.random.default_rng(0)
+        
+        for h5_file in sorted(self.target_path.glob("siamese_*.h5")):
+            model_type = h5_file.stem[len("siamese_"):]
+            paths = onnx_model_paths(self.target_path, model_type)
+            if not paths['full'].exists():
+                continue
+            
+            try:
+                keras_model = tf.keras.models.load_model(h5_file)
+                onnx_model = OnnxModel(paths['full'], intra_op_threads=intra_op_threads)
+                
+                results = {}
+                for batch_size in batch_sizes:
+                    inputs = [rng.random((batch_size,) + tuple(i.shape[1:]), dtype=np.float32)
+                              for i in keras_model.inputs]
+                    
+                    # 출력 일치 확인
+                    keras_out = keras_model.predict(inputs, verbose=0)
+                    onnx_out = onnx_model.predict(inputs)
+                    max_abs_diff = float(np.max(np.abs(keras_out - onnx_out)))
+                    
+                    # 지연 시간 비교
+                    keras_timing = self._time_predict(lambda x: keras_model.predict(x, verbose=0), inputs, runs)
+                    onnx_timing = self._time_predict(onnx_model.predict, inputs, runs)
+                    
+                    results[str(batch_size)] = {
+                        'max_abs_diff': max_abs_diff,
+                        'parity': max_abs_diff <= atol,
+                        'keras': keras_timing,
+                        'onnx': onnx_timing,
+                        'speedup_p50': round(keras_timing['p50_ms'] / max(onnx_timing['p50_ms'], 1e-6), 2)
+                    }
+                    logger.info(f"[{model_type}] batch={batch_size} diff={max_abs_diff:.2e} "
+                                f"keras={keras_timing['p50_ms']}ms onnx={onnx_timing['p50_ms']}ms")
+                
+                report[model_type] = results
+            except Exception as e:
+                logger.error(f"Error comparing ONNX backend for '{model_type}': {str(e)}")
+                report[model_type] = {'error': str(e)}
+        
+        self._write_onnx_report(report, atol)
+        return report
+    
+    def _write_onnx_report(self, report, atol):
+        """ONNX 비교 결과를 JSON/Markdown으로 저장"""
+        with open(self.target_path / "onnx_report.json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        
+        report_file = self.target_path / "onnx_report.md"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write("# Siamese Keras vs ONNX Runtime 비교 리포트\n\n")
+            f.write(f"**생성 시간**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            f.write(f"**허용 오차**: {atol}\n\n")
+            f.write("| 모델 | 배치 | 최대 오차 | 일치 | Keras p50 (ms) | ONNX p50 (ms) | 속도 향상 |\n")
+            f.write("|------|------|-----------|------|----------------|---------------|-----------|\n")
+            
+            for model_type, results in report.items():
+                if 'error' in results:
+                    f.write(f"| {model_type} | - | - | ❌ {results['error']} | - | - | - |\n")
+                    continue
+                for batch_size, r in results.items():
+                    f.write(f"| {model_type} | {batch_size} | {r['max_abs_diff']:.2e} | "
+                            f"{'✅' if r['parity'] else '❌'} | {r['keras']['p50_ms']} | "
+                            f"{r['onnx']['p50_ms']} | {r['speedup_p50']}x |\n")
+        
+        logger.info(f"ONNX report created: {report_file}")
+    
+    def load_calibration_crops(self, images_dir, limit=64, labels=None):
+        """
+        보정/평가용 코 크롭 로드 (models/yolo_best.pt가 있으면 YOLOv5로 크롭, 없으면 전체 이미지 리사이즈)
+        
+        라벨은 crop_label 규칙(labels 맵 또는 <강아지 ID>/ 하위 디렉토리 이름)을 따릅니다.
+        
+        Returns:
+            [(라벨 또는 None, 96x96 BGR 크롭), ...]
+        """
+        images_dir = Path(images_dir)
+        paths = sorted(p for p in images_dir.rglob('*') if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))[:limit]
+        
+        detector = None
+        yolo_path = self.target_path / 'yolo_best.pt'
+        if yolo_path.exists():
+            try:
+                from config import Config
+                from model_registry import load_yolo_local
+                detector = load_yolo_local(yolo_path, Config.YOLOV5_REPO_DIR, 'cpu')
+            except Exception as e:
+                logger.warning(f"YOLOv5 unavailable for calibration crops, using full images: {str(e)}")
+        
+        crops = []
+        for path in paths:
+            image = cv2.imread(str(path))
+            if image is None:
+                continue
+            crop = image
+            if detector is not None:
+                detections = detector(image).xyxy[0].cpu().numpy()
+                if len(detections):
+                    x1, y1, x2, y2 = detections[int(np.argmax(detections[:, 4]))][:4].astype(int)
+                    if x2 > x1 and y2 > y1:
+                        crop = image[y1:y2, x1:x2]
+            crops.append((crop_label(path, images_dir, labels), cv2.resize(crop, (96, 96))))
+        
+        logger.info(f"Loaded {len(crops)} calibration crops from {images_dir}")
+        return crops
+    
+    def _siamese_batch(self, crops, model_type, input_shape):
+        """코 크롭들을 서빙과 같은 전처리로 변환해 모델 입력 모양으로 묶음"""
+        batch = np.concatenate([preprocess_nose_image(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), model_type)
+                                for _, crop in crops])
+        return batch.reshape((len(crops),) + tuple(int(d) for d in input_shape))
+    
+    def _input_shape(self, onnx_path):
+        """ONNX 모델 첫 입력의 배치 제외 모양"""
+        return OnnxModel(onnx_path).inputs[0].shape[1:]
+    
+    def load_split_crops(self, images_dir, calibration_size=64, eval_size=64, labels=None):
+        """images_dir의 코 크롭을 강아지 단위로 보정용/평가용으로 분리 (양자화와 평가가 같은 분리 사용)"""
+        crops = self.load_calibration_crops(images_dir, calibration_size + eval_size, labels)
+        calibration, evaluation = split_by_dog(crops, calibration_size, eval_size)
+        logger.info(f"Split {len(crops)} crops into {len(calibration)} calibration / {len(evaluation)} evaluation")
+        return calibration, evaluation
+    
+    def quantize_onnx_models(self, images_dir, calibration_size=64, per_channel=False, eval_size=64, labels=None):
+        """
+        FP32 ONNX Siamese 모델을 INT8로 정적 양자화 (보정 데이터는 images_dir 코 크롭 중 평가에 쓰지 않는 부분)
+        
+        보정 이미지가 없으면 가중치만 양자화하는 동적 양자화로 대체합니다.
+        이미지는 있는데 강아지 단위 분리 후 보정용이 하나도 없으면 양자화하지 않고 None을 반환합니다.
+        """
+        from onnxruntime.quantization import quantize_static, quantize_dynamic, QuantFormat, QuantType
+        
+        crops, evaluation = self.load_split_crops(images_dir, calibration_size, eval_size, labels)
+        if not crops and evaluation:
+            logger.error(f"No calibration crops left after splitting {images_dir} by dog "
+                         f"({len(evaluation)} evaluation crops); add more dogs or raise --calibration-size")
+            return None
+        quantized = {}
+        
+        for h5_file in sorted(self.target_path.glob("siamese_*.h5")):
+            model_type = h5_file.stem[len("siamese_"):]
+            fp32 = onnx_model_paths(self.target_path, model_type)
+            int8 = onnx_model_paths(self.target_path, model_type, 'int8')
+            if not fp32['full'].exists():
+                logger.warning(f"FP32 ONNX model for '{model_type}' not found, run --onnx first")
+                continue
+            
+            try:
+                feeds = {}
+                if crops:
+                    # 단일 입력(타워)은 크롭 하나씩, 두 입력(전체/헤드)은 크롭 쌍으로 보정
+                    x = self._siamese_batch(crops, model_type, self._input_shape(fp32['full']))
+                    pairs = sample_pairs([label for label, _ in crops], calibration_size) or [(0, 0)]
+                    feeds['full'] = [[x[i:i + 1], x[j:j + 1]] for i, j in pairs]
+                    if fp32['tower'].exists() and fp32['head'].exists():
+                        feeds['tower'] = [[x[i:i + 1]] for i in range(len(x))]
+                        embeddings = OnnxModel(fp32['tower']).predict(x)
+                        feeds['head'] = [[embeddings[i:i + 1], embeddings[j:j + 1]] for i, j in pairs]
+                
+                method = 'static' if crops else 'dynamic'
+                for part in ('full', 'tower', 'head'):
+                    if not fp32[part].exists():
+                        continue
+                    if method == 'static':
+                        names = OnnxModel(fp32[part]).input_names
+                        reader = _calibration_reader(
+                            [{name: value.astype(np.float32) for name, value in zip(names, feed)}
+                             for feed in feeds[part]])
+                        quantize_static(str(fp32[part]), str(int8[part]), reader,
+                                        quant_format=QuantFormat.QDQ, per_channel=per_channel,
+                                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+                    else:
+                        quantize_dynamic(str(fp32[part]), str(int8[part]), weight_type=QuantType.QInt8)
+                    logger.info(f"INT8 ({method}) model written: {int8[part]}")
+                
+                quantized[model_type] = {'method': method, 'calibration_samples': len(crops)}
+            except Exception as e:
+                logger.error(f"Error quantizing '{model_type}': {str(e)}")
+                quantized[model_type] = {'error': str(e)}
+        
+        return quantized
+    
+    def compare_int8_backend(self, images_dir, calibration_size=64, runs=50, threshold=0.5, eval_size=64, labels=None):
+        """
+        FP32 대비 INT8 유사도 점수 변화, 0.5 임계값 판정 정확도, 호출당 지연 시간 리포트 생성
+        
+        보정에 쓰지 않은 평가용 크롭의 모든 쌍으로 평가합니다.
+        정확도는 라벨(labels 맵 또는 <강아지 ID>/ 하위 디렉토리)이 있는 쌍으로만 계산하고, 없으면 None입니다.
+        """
+        _, crops = self.load_split_crops(images_dir, calibration_size, eval_size, labels)
+        report = {}
+        
+        for h5_file in sorted(self.target_path.glob("siamese_*.h5")):
+            model_type = h5_file.stem[len("siamese_"):]
+            fp32_path = onnx_model_paths(self.target_path, model_type)['full']
+            int8_path = onnx_model_paths(self.target_path, model_type, 'int8')['full']
+            if not int8_path.exists():
+                continue
+            
+            try:
+                fp32_model, int8_model = OnnxModel(fp32_path), OnnxModel(int8_path)
+                x = self._siamese_batch(crops, model_type, fp32_model.inputs[0].shape[1:])
+                pairs = list(itertools.combinations(range(len(x)), 2))
+                if not pairs:
+                    raise ValueError("At least two evaluation images are required")
+                left = x[[i for i, _ in pairs]]
+                right = x[[j for _, j in pairs]]
+                
+                fp32_scores = fp32_model.predict([left, right]).reshape(-1)
+                int8_scores = int8_model.predict([left, right]).reshape(-1)
+                drift = np.abs(fp32_scores - int8_scores)
+                fp32_same = fp32_scores > threshold
+                int8_same = int8_scores > threshold
+                
+                result = {
+                    'pairs': len(pairs),
+                    'score_drift_mean': round(float(drift.mean()), 5),
+                    'score_drift_max': round(float(drift.max()), 5),
+                    'decision_agreement': round(float(np.mean(fp32_same == int8_same)), 4),
+                    'fp32_accuracy': None,
+                    'int8_accuracy': None,
+                    'fp32': self._time_predict(fp32_model.predict, [left[:1], right[:1]], runs),
+                    'int8': self._time_predict(int8_model.predict, [left[:1], right[:1]], runs),
+                    'fp32_size_mb': round(fp32_path.stat().st_size / 1024 / 1024, 2),
+                    'int8_size_mb': round(int8_path.stat().st_size / 1024 / 1024, 2),
+                }
+                
+                # 라벨이 있는 쌍으로 같은/다른 강아지 판정 정확도 계산
+                labels = [label for label, _ in crops]
+                labeled = np.array([labels[i] is not None and labels[j] is not None for i, j in pairs])
+                result['labeled_pairs'] = int(labeled.sum())
+                result['same_dog_pairs'] = int(sum(1 for i, j in pairs if labels[i] is not None and labels[i] == labels[j]))
+                if labeled.any():
+                    truth = np.array([labels[i] == labels[j] for i, j in pairs])[labeled]
+                    result['fp32_accuracy'] = round(float(np.mean(fp32_same[labeled] == truth)), 4)
+                    result['int8_accuracy'] = round(float(np.mean(int8_same[labeled] == truth)), 4)
+                
+                result['speedup_p50'] = round(result['fp32']['p50_ms'] / max(result['int8']['p50_ms'], 1e-6), 2)
+                logger.info(f"[{model_type}] drift mean={result['score_drift_mean']} max={result['score_drift_max']} "
+                            f"fp32={result['fp32']['p50_ms']}ms int8={result['int8']['p50_ms']}ms")
+                report[model_type] = result
+            except Exception as e:
+                logger.error(f"Error comparing INT8 model for '{model_type}': {str(e)}")
+                report[model_type] = {'error': str(e)}
+        
+        self._write_int8_report(report, threshold)
+        return report
+    
+    def _write_int8_report(self, report, threshold):
+        """INT8 비교 결과를 JSON/Markdown으로 저장"""
+        with open(self.target_path / "int8_report.json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        
+        report_file = self.target_path / "int8_report.md"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write("# Siamese FP32 vs INT8 양자화 비교 리포트\n\n")
+            f.write(f"**생성 시간**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            f.write(f"**판정 임계값**: {threshold}\n\n")
+            f.write("| 모델 | 쌍 | 점수 변화 평균 | 점수 변화 최대 | 판정 일치율 | FP32 정확도 | INT8 정확도 | "
+                    "FP32 p50 (ms) | INT8 p50 (ms) | 속도 향상 | 크기 (MB) |\n")
+            f.write("|------|----|----------------|----------------|-------------|-------------|-------------|"
+                    "---------------|---------------|-----------|-----------|\n")
+            
+            for model_type, r in report.items():
+                if 'error' in r:
+                    f.write(f"| {model_type} | ❌ {r['error']} |" + " - |" * 9 + "\n")
+                    continue
+                fp32_acc = r['fp32_accuracy'] if r['fp32_accuracy'] is not None else '-'
+                int8_acc = r['int8_accuracy'] if r['int8_accuracy'] is not None else '-'
+                f.write(f"| {model_type} | {r['pairs']} | {r['score_drift_mean']} | {r['score_drift_max']} | "
+                        f"{r['decision_agreement']} | {fp32_acc} | {int8_acc} | {r['fp32']['p50_ms']} | "
+                        f"{r['int8']['p50_ms']} | {r['speedup_p50']}x | "
+                        f"{r['fp32_size_mb']} → {r['int8_size_mb']} |\n")
+            
+            f.write("\n정확도는 라벨이 있는 평가 쌍(`<강아지 ID>/` 하위 디렉토리 또는 `--labels` 맵)으로만 계산하며, "
+                    "라벨이 없으면 `-`(계산 불가)입니다. 평가 이미지는 보정에 쓰지 않은 강아지입니다.\n")
+        
+        logger.info(f"INT8 report created: {report_file}")
+    
     def convert_all(self):
         """전체 변환 프로세스 실행"""
         logger.info("Starting model conversion process...")
@@ -214,16 +629,60 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Convert models for Docker service')
-    parser.add_argument('--source', required=True, 
+    parser.add_argument('--source', 
                        help='Source project path (dognose_recognition_management_service-main)')
     parser.add_argument('--target', default='./models',
                        help='Target models directory (default: ./models)')
+    parser.add_argument('--onnx', action='store_true',
+                       help='Export Siamese models to ONNX and write parity/latency report')
+    parser.add_argument('--onnx-only', action='store_true',
+                       help='Only export models already in target directory to ONNX')
+    parser.add_argument('--opset', type=int, default=13,
+                       help='ONNX opset version (default: 13)')
+    parser.add_argument('--int8', action='store_true',
+                       help='Quantize ONNX Siamese models to INT8 and write drift/accuracy/latency report')
+    parser.add_argument('--calibration-dir', default='./test_images',
+                       help='Images for INT8 calibration and evaluation (default: ./test_images)')
+    parser.add_argument('--calibration-size', type=int, default=64,
+                       help='Maximum number of calibration images (default: 64)')
+    parser.add_argument('--eval-size', type=int, default=64,
+                       help='Maximum number of held-out evaluation images (default: 64)')
+    parser.add_argument('--labels',
+                       help='JSON map {"<path relative to --calibration-dir>": "<dog id>"} for flat image directories')
     
     args = parser.parse_args()
+    if not args.source and not args.onnx_only:
+        parser.error('--source is required unless --onnx-only is given')
+    
+    converter = ModelConverter(args.source or '.', args.target)
+    labels = load_label_map(args.labels) if args.labels else None
+    
+    def quantize_and_compare():
+        quantized = converter.quantize_onnx_models(args.calibration_dir, args.calibration_size,
+                                                   eval_size=args.eval_size, labels=labels)
+        if quantized is None:
+            return False
+        converter.compare_int8_backend(args.calibration_dir, args.calibration_size,
+                                       eval_size=args.eval_size, labels=labels)
+        return True
+    
+    if args.onnx_only:
+        exported = converter.export_onnx_models(args.opset)
+        report = converter.compare_onnx_backend()
+        parity = all('error' not in results and all(r['parity'] for r in results.values())
+                     for results in report.values())
+        if args.int8 and not quantize_and_compare():
+            return 1
+        return 0 if exported and all(e['full'] for e in exported.values()) and parity else 1
     
-    converter = ModelConverter(args.source, args.target)
     results = converter.convert_all()
     
+    if args.onnx or args.int8:
+        converter.export_onnx_models(args.opset)
+        converter.compare_onnx_backend()
+    if args.int8 and not quantize_and_compare():
+        return 1
+    
     return 0 if all(results['validation'].values()) else 1
 
 if __name__ == "__main__":
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+모델 호스트 프로세스 (다중 워커 배포용)
+
+모델 호스트 하나가 YOLOv5와 Siamese 모델을 모두 소유하고, HTTP 워커(MODEL_HOST_MODE=remote)는
+모델 없이 디코딩/전처리/캐시/응답만 담당합니다. 워커는 연결(채널)마다 공유 메모리 버퍼를 하나씩 만들고
+입력 텐서를 그 버퍼에 직접 쓰며, 호스트는 복사 없이 같은 버퍼에서 읽어 추론한 뒤 결과 텐서를
+같은 세그먼트의 응답 영역에 씁니다. 제어 메시지(작업 이름, 텐서 위치/모양)만 Unix 소켓으로 오갑니다.
+
+워커의 원격 모델은 Keras Model.predict / YOLOv5 호출과 같은 인터페이스를 가지므로
+배치, 임베딩 캐시, 품질 게이트 등 서비스 코드는 그대로 동작합니다.
+
+호스트는 연결 메시지를 pickle로 읽으므로 MODEL_HOST_AUTHKEY(호스트와 워커가 공유하는 비밀 키)가
+없으면 호스트도 워커 연결도 시작하지 않습니다 (추측 가능한 기본 키 없음).
+
+실행:
+    export MODEL_HOST_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    python model_host.py
+    MODEL_HOST_MODE=remote uvicorn asgi:app --workers 8
+"""
+
+import os
+import time
+import atexit
+import queue
+import logging
+import threading
+from collections import namedtuple
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def require_authkey(authkey):
+    """연결 인증 키를 bytes로 (비어 있으면 ValueError, 아무 로컬 프로세스나 호스트에 pickle을 보내지 못하도록)"""
+    if not authkey:
+        raise ValueError("MODEL_HOST_AUTHKEY is not set; generate a shared secret for the model host and its workers")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+# 공유 메모리 버퍼 안의 텐서 위치 (제어 메시지에는 텐서 대신 이 참조만 담김)
+ShmRef = namedtuple('ShmRef', ['offset', 'shape', 'dtype'])
+
+ALIGNMENT = 64
+
+
+class ModelHostError(Exception):
+    """모델 호스트 연결 실패 또는 호스트에서 발생한 오류"""
+    pass
+
+
+class SharedTensorBuffer:
+    def __init__(self, shm, start, size):
+        """
+        공유 메모리 세그먼트의 [start, start + size) 영역에 텐서를 순서대로 기록하는 버퍼
+
+        채널당 동시에 하나의 호출만 진행되므로 호출마다 reset()으로 처음부터 다시 씁니다.
+        """
+        self.shm = shm
+        self.start = start
+        self.size = size
+        self.offset = 0
+
+    def reset(self):
+        self.offset = 0
+
+    def pack(self, obj):
+        """obj 안의 numpy 배열을 버퍼에 복사하고 ShmRef로 치환 (공간이 부족하면 배열을 그대로 전송)"""
+        if isinstance(obj, np.ndarray):
+            array = np.ascontiguousarray(obj)
+            offset = -(-self.offset // ALIGNMENT) * ALIGNMENT
+            if offset + array.nbytes > self.size:
+                return array
+            target = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf,
+                                offset=self.start + offset)
+            target[...] = array
+            self.offset = offset + array.nbytes
+            return ShmRef(offset, array.shape, array.dtype.str)
+        if isinstance(obj, (list, tuple)) and not isinstance(obj, ShmRef):
+            return type(obj)(self.pack(item) for item in obj)
+        if isinstance(obj, dict):
+            return {key: self.pack(value) for key, value in obj.items()}
+        return obj
+
+    def unpack(self, obj, copy=True):
+        """ShmRef를 numpy 배열로 복원 (copy=False면 공유 메모리를 직접 가리키는 뷰)"""
+        if isinstance(obj, ShmRef):
+            view = np.ndarray(obj.shape, dtype=np.dtype(obj.dtype), buffer=self.shm.buf,
+                              offset=self.start + obj.offset)
+            return view.copy() if copy else view
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self.unpack(item, copy) for item in obj)
+        if isinstance(obj, dict):
+            return {key: self.unpack(value, copy) for key, value in obj.items()}
+        return obj
+
+
+def _split_segment(shm, size):
+    """세그먼트를 요청 영역과 응답 영역으로 절반씩 나눔"""
+    half = size // 2
+    return SharedTensorBuffer(shm, 0, half), SharedTensorBuffer(shm, half, size - half)
+
+
+class _Channel:
+    def __init__(self, address, authkey, shm_size):
+        """모델 호스트와의 연결 하나와 그 연결 전용 공유 메모리 세그먼트"""
+        self.conn = Client(address, authkey=authkey)
+        self.shm = shared_memory.SharedMemory(create=True, size=shm_size)
+        self.request, self.response = _split_segment(self.shm, shm_size)
+        try:
+            self.conn.send(('attach', self.shm.name, shm_size))
+            status, payload = self.conn.recv()
+            if status != 'ok':
+                raise ModelHostError(payload)
+        except Exception:
+            self.close()
+            raise
+
+    def call(self, op, args):
+        self.request.reset()
+        self.conn.send(('call', op, self.request.pack(args)))
+        status, payload = self.conn.recv()
+        if status != 'ok':
+            raise ModelHostError(payload)
+        # 응답 영역은 다음 호출에서 덮어쓰므로 복사
+        return self.response.unpack(payload, copy=True)
+
+    def close(self):
+        try:
+            self.conn.close()
+        finally:
+            self.shm.close()
+            self.shm.unlink()
+
+
+class ModelHostClient:
+    def __init__(self, address, authkey, shm_size_mb=64, max_channels=4):
+        """
+        Args:
+            address: 모델 호스트 Unix 소켓 경로
+            authkey: 연결 인증 키
+            shm_size_mb: 채널당 공유 메모리 크기 (요청/응답 절반씩)
+            max_channels: 워커 프로세스당 최대 동시 호출 수
+        """
+        self.address = address
+        self.authkey = require_authkey(authkey)
+        self.shm_size = int(shm_size_mb * 1024 * 1024)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, max_channels))
+        # 워커 종료 시 공유 메모리 세그먼트 해제
+        atexit.register(self.close)
+
+    def call(self, op, *args):
+        """모델 호스트에서 op 실행 (텐서 인자/결과는 공유 메모리로 전달)"""
+        with self._slots:
+            try:
+                channel = self._idle.get_nowait()
+            except queue.Empty:
+                try:
+                    channel = _Channel(self.address, self.authkey, self.shm_size)
+                except (OSError, EOFError) as e:
+                    raise ModelHostError(f"Cannot connect to model host at {self.address}: {str(e)}")
+
+            try:
+                result = channel.call(op, args)
+            except ModelHostError:
+                self._idle.put(channel)
+                raise
+            except (OSError, EOFError) as e:
+                # 호스트가 재시작되면 채널을 버리고 다음 호출에서 다시 연결
+                channel.close()
+                raise ModelHostError(f"Model host connection lost: {str(e)}")
+
+            self._idle.put(channel)
+            return result
+
+    def wait_until_ready(self, timeout):
+        """모델 호스트가 모델 로드를 마칠 때까지 대기 후 상태 반환"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                status = self.call('status')
+                if status['loaded'] or time.monotonic() >= deadline:
+                    return status
+            except ModelHostError as e:
+                if time.monotonic() >= deadline:
+                    raise
+                logger.info(f"Waiting for model host: {str(e)}")
+            time.sleep(0.5)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RemoteModel:
+    def __init__(self, client, model_type, part):
+        """모델 호스트의 Siamese 모델(또는 타워/헤드)을 Keras Model.predict처럼 호출하는 프록시"""
+        self.client = client
+        self.model_type = model_type
+        self.part = part
+
+    def predict(self, inputs, verbose=0):
+        return self.client.call('predict', self.model_type, self.part, inputs)
+
+
+class RemoteDetections:
+    def __init__(self, xyxy):
+        self.xyxy = xyxy
+
+
+class RemoteYolo:
+    def __init__(self, client):
+        """모델 호스트의 YOLOv5를 호출하는 프록시 (결과는 이미지별 (N, 6) 배열의 xyxy)"""
+        self.client = client
+
+    def __call__(self, images):
+        return RemoteDetections(self.client.call('detect', [np.asarray(image) for image in images]))
+
+
+class ModelHostServer:
+    def __init__(self, service, address, authkey):
+        """
+        Args:
+            service: 모델을 로드한 DogNoseAIService (MODEL_HOST_MODE=local)
+            address: 대기할 Unix 소켓 경로
+            authkey: 연결 인증 키
+        """
+        self.service = service
+        self.address = address
+        self.authkey = require_authkey(authkey)
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logger.info(f"Model host listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.error(f"Model host accept failed: {str(e)}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn):
+        shm = None
+        try:
+            message = conn.recv()
+            if message[0] != 'attach':
+                conn.send(('error', 'attach required'))
+                return
+            _, name, size = message
+            shm = shared_memory.SharedMemory(name=name)
+            # 세그먼트는 워커가 소유하므로 호스트의 resource_tracker가 해제하지 않도록 등록 해제
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+            request, response = _split_segment(shm, size)
+            conn.send(('ok', None))
+
+            while True:
+                _, op, args = conn.recv()
+                try:
+                    # 입력은 복사 없이 공유 메모리 뷰로 사용 (워커는 응답을 받을 때까지 대기)
+                    result = self.handle(op, request.unpack(args, copy=False))
+                    response.reset()
+                    conn.send(('ok', response.pack(result)))
+                except Exception as e:
+                    logger.error(f"Model host error in '{op}': {str(e)}")
+                    conn.send(('error', str(e)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            if shm is not None:
+                shm.close()
+
+    def handle(self, op, args):
+        service = self.service
+        if op == 'status':
+            return {
+                'loaded': service.ready.is_set(),
+                'ready': service.is_ready(),
+                'yolo_loaded': service.yolo_model is not None,
+                'yolo_version': service.yolo_version,
+                'available': service.siamese_registry.available(),
+                'default_model': service.current_siamese_model,
+            }
+        if op == 'load':
+            model_type, = args
+            entry = service.siamese_registry.get(model_type)
+            if entry is None:
+                return None
+            return {'split': entry.parts is not None, 'backend': entry.backend,
+                    'version': service.model_versions.get(model_type)}
+        if op == 'predict':
+            model_type, part, inputs = args
+            entry = service.siamese_registry.get(model_type)
+            if entry is None:
+                raise ModelHostError(f"Siamese model '{model_type}' not available")
+            model = entry.model if part == 'model' else entry.parts[0 if part == 'tower' else 1]
+            return np.asarray(model.predict(inputs, verbose=0))
+        if op == 'detect':
+            images, = args
+            if service.yolo_model is None:
+                raise ModelHostError("YOLOv5 model not loaded")
+            results = service.yolo_model(list(images))
+            service.metrics.inc('nose_model_requests_total', len(images), model='yolo')
+            return [d.detach().cpu().numpy() if hasattr(d, 'detach') else np.asarray(d)
+                    for d in results.xyxy]
+        raise ModelHostError(f"Unknown model host operation: {op}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    # 호스트 프로세스는 항상 모델을 직접 로드
+    os.environ['MODEL_HOST_MODE'] = 'local'
+    os.environ['BACKGROUND_MODEL_LOAD'] = 'true'
+
+    from config import Config
+    # 모델을 로드하기 전에 키부터 확인
+    if not Config.MODEL_HOST_AUTHKEY:
+        logger.error("MODEL_HOST_AUTHKEY is not set; refusing to start the model host")
+        raise SystemExit(1)
+    from app import ai_service
+    # ShmRef 등이 워커와 같은 모듈 경로(model_host)로 pickle 되도록 모듈로 다시 import
+    import model_host
+
+    model_host.ModelHostServer(ai_service, Config.MODEL_HOST_ADDRESS,
+                               Config.MODEL_HOST_AUTHKEY).serve_forever()
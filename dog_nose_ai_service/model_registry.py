@@ -0,0 +1,170 @@
+"""
+비문 서비스 모델 레지스트리
+
+- YOLOv5: 저장소에 포함된 yolov05 코드로 네트워크 없이 로드
+- Siamese: 변형별로 첫 사용 시 로드하고, 메모리 예산을 넘으면 가장 오래 사용되지 않은 변형부터 해제
+"""
+
+import os
+import gc
+import time
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def load_yolo_local(weights_path, repo_dir, device):
+    """
+    로컬 yolov05 코드(hubconf.py)로 YOLOv5 가중치 로드
+
+    torch.hub의 source='local'은 GitHub 저장소를 받지 않고 repo_dir를 그대로 import 합니다.
+    """
+    repo_dir = Path(repo_dir)
+    if not (repo_dir / 'hubconf.py').exists():
+        raise FileNotFoundError(f"YOLOv5 code not found at {repo_dir} (hubconf.py missing)")
+
+    # 누락된 패키지를 pip로 설치하려는 동작(네트워크 접근) 방지
+    os.environ['YOLOv5_AUTOINSTALL'] = 'False'
+
+    # PyTorch는 모델을 직접 로드할 때만 import (원격 모델 호스트 모드 워커는 불필요)
+    import torch
+
+    return torch.hub.load(str(repo_dir), 'custom', path=str(weights_path),
+                          source='local', device=device)
+
+
+def estimate_model_bytes(model, parts=None):
+    """모델이 차지하는 메모리 추정 (Keras: 파라미터 수 x 4, ONNX: 파일 크기)"""
+    if hasattr(model, 'count_params'):
+        # 타워/헤드는 같은 가중치를 공유하므로 전체 모델만 계산
+        return int(model.count_params()) * 4
+
+    total = 0
+    for m in [model] + list(parts or []):
+        path = getattr(m, 'path', None)
+        if path is not None and Path(path).exists():
+            total += Path(path).stat().st_size
+    return total
+
+
+class LoadedModel:
+    def __init__(self, model, parts, backend, nbytes, load_time):
+        self.model = model
+        self.parts = parts
+        self.backend = backend
+        self.nbytes = nbytes
+        self.load_time = load_time
+
+
+class SiameseModelRegistry:
+    def __init__(self, loader, model_paths, memory_budget_mb=0):
+        """
+        Args:
+            loader: (model_type, model_path)를 받아 (model, parts, backend) 또는 None을 반환하는 함수
+            model_paths: 모델 타입 -> 기본 모델 파일 경로
+            memory_budget_mb: 동시에 올려둘 Siamese 모델의 메모리 예산 (0이면 제한 없음)
+        """
+        self.loader = loader
+        self.model_paths = dict(model_paths)
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+
+        self._entries = OrderedDict()  # LRU 순서 (마지막이 가장 최근)
+        self._lock = threading.Lock()
+        self._load_locks = {model_type: threading.Lock() for model_type in self.model_paths}
+        self._available_checks = {}
+        self.load_times = {}
+        self.load_errors = {}
+        self.evictions = 0
+
+    def register_availability_check(self, model_type, check):
+        """모델 파일 존재 여부 확인 함수 등록 (예: ONNX 파일 확인)"""
+        self._available_checks[model_type] = check
+
+    def available(self):
+        """로드하지 않고 디스크에서 사용 가능한 변형 목록"""
+        result = []
+        for model_type, path in self.model_paths.items():
+            check = self._available_checks.get(model_type)
+            if os.path.exists(path) or (check is not None and check()):
+                result.append(model_type)
+        return result
+
+    def loaded(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, model_type):
+        """변형 하나 반환 (필요하면 로드하고 예산을 넘는 오래된 변형 해제)"""
+        if model_type not in self.model_paths:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(model_type)
+            if entry is not None:
+                self._entries.move_to_end(model_type)
+                return entry
+
+        # 같은 변형을 여러 요청이 동시에 로드하지 않도록 변형별 잠금
+        with self._load_locks[model_type]:
+            with self._lock:
+                entry = self._entries.get(model_type)
+                if entry is not None:
+                    self._entries.move_to_end(model_type)
+                    return entry
+
+            start = time.perf_counter()
+            try:
+                loaded = self.loader(model_type, self.model_paths[model_type])
+            except Exception as e:
+                logger.error(f"Failed to load Siamese model '{model_type}': {str(e)}")
+                self.load_errors[model_type] = str(e)
+                return None
+            if loaded is None:
+                return None
+
+            model, parts, backend = loaded
+            load_time = time.perf_counter() - start
+            entry = LoadedModel(model, parts, backend, estimate_model_bytes(model, parts), load_time)
+            self.load_times[model_type] = round(load_time, 3)
+            self.load_errors.pop(model_type, None)
+            logger.info(f"Siamese model '{model_type}' loaded on demand ({backend}, "
+                        f"{entry.nbytes / 1024 / 1024:.1f}MB, {load_time:.2f}s)")
+
+            with self._lock:
+                self._entries[model_type] = entry
+                self._evict_over_budget(keep=model_type)
+            return entry
+
+    def _evict_over_budget(self, keep):
+        """메모리 예산을 넘으면 가장 오래 사용되지 않은 변형부터 해제 (잠금 보유 상태에서 호출)"""
+        if self.memory_budget <= 0:
+            return
+
+        evicted = False
+        while sum(e.nbytes for e in self._entries.values()) > self.memory_budget:
+            victim = next((k for k in self._entries if k != keep), None)
+            if victim is None:
+                break
+            del self._entries[victim]
+            self.evictions += 1
+            evicted = True
+            logger.info(f"Siamese model '{victim}' evicted (memory budget {self.memory_budget / 1024 / 1024:.0f}MB)")
+
+        if evicted:
+            gc.collect()
+
+    def stats(self):
+        with self._lock:
+            entries = dict(self._entries)
+        return {
+            'memory_budget_mb': round(self.memory_budget / 1024 / 1024, 1),
+            'memory_used_mb': round(sum(e.nbytes for e in entries.values()) / 1024 / 1024, 1),
+            'loaded': {k: {'backend': e.backend, 'split': e.parts is not None,
+                           'size_mb': round(e.nbytes / 1024 / 1024, 1)} for k, e in entries.items()},
+            'load_times_s': dict(self.load_times),
+            'load_errors': dict(self.load_errors),
+            'evictions': self.evictions,
+        }
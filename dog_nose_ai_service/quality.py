@@ -0,0 +1,111 @@
+"""
+코 크롭 품질 평가 (Siamese 추론 전 단계)
+
+흐림(라플라시안 분산), 노출(평균 밝기/포화 픽셀 비율), 원본 박스 크기, 검출 신뢰도로
+크롭 품질을 점수화합니다. 96x96 그레이스케일 한 장에 대한 연산만 사용하므로
+디코딩/검출 대비 비용은 무시할 수준입니다.
+"""
+
+import cv2
+import numpy as np
+
+QUALITY_MODES = ('off', 'flag', 'reject')
+
+
+class QualityThresholds:
+    def __init__(self, min_sharpness=15.0, min_brightness=20.0, max_brightness=235.0,
+                 max_clipped_ratio=0.5, min_box_side=24, min_confidence=0.5):
+        """
+        Args:
+            min_sharpness: 라플라시안 분산 최소값 (낮을수록 흐림)
+            min_brightness / max_brightness: 평균 밝기 허용 범위 (0-255)
+            max_clipped_ratio: 검게/하얗게 포화된 픽셀 비율 최대값
+            min_box_side: 리사이즈 전 코 박스의 짧은 변 최소 픽셀 수
+            min_confidence: YOLOv5 검출 신뢰도 최소값 (검출 자체의 conf 임계값 0.25보다 높아야 걸러지는 크롭이 생김)
+        """
+        self.min_sharpness = float(min_sharpness)
+        self.min_brightness = float(min_brightness)
+        self.max_brightness = float(max_brightness)
+        self.max_clipped_ratio = float(max_clipped_ratio)
+        self.min_box_side = int(min_box_side)
+        self.min_confidence = float(min_confidence)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(min_sharpness=config.QUALITY_MIN_SHARPNESS,
+                   min_brightness=config.QUALITY_MIN_BRIGHTNESS,
+                   max_brightness=config.QUALITY_MAX_BRIGHTNESS,
+                   max_clipped_ratio=config.QUALITY_MAX_CLIPPED_RATIO,
+                   min_box_side=config.QUALITY_MIN_BOX_SIDE,
+                   min_confidence=config.QUALITY_MIN_CONFIDENCE)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def _ratio_score(value, threshold):
+    """임계값에서 0.5, 임계값의 2배 이상이면 1.0이 되는 점수"""
+    if threshold <= 0:
+        return 1.0
+    return float(min(1.0, value / (2.0 * threshold)))
+
+
+def assess_nose_quality(crop, box=None, confidence=None, thresholds=None):
+    """
+    코 크롭 품질 평가
+
+    Args:
+        crop: 리사이즈된 코 크롭 (BGR 또는 그레이스케일)
+        box: 리사이즈 전 박스 (x1, y1, x2, y2)
+        confidence: 검출 신뢰도
+        thresholds: QualityThresholds
+
+    Returns:
+        {'score': 0~1, 'passed': bool, 'reasons': [...], 'metrics': {...}}
+    """
+    thresholds = thresholds or QualityThresholds()
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    brightness = float(gray.mean())
+    clipped_ratio = float(np.count_nonzero((gray <= 5) | (gray >= 250))) / gray.size
+    box_side = min(box[2] - box[0], box[3] - box[1]) if box is not None else None
+
+    reasons = []
+    if sharpness < thresholds.min_sharpness:
+        reasons.append('blurry')
+    if brightness < thresholds.min_brightness:
+        reasons.append('underexposed')
+    elif brightness > thresholds.max_brightness:
+        reasons.append('overexposed')
+    if clipped_ratio > thresholds.max_clipped_ratio:
+        reasons.append('clipped')
+    if box_side is not None and box_side < thresholds.min_box_side:
+        reasons.append('too_small')
+    if confidence is not None and confidence < thresholds.min_confidence:
+        reasons.append('low_confidence')
+
+    # 항목별 0~1 점수의 평균 (노출은 허용 범위 중앙에서 1.0)
+    center = (thresholds.min_brightness + thresholds.max_brightness) / 2.0
+    half_range = max(1.0, (thresholds.max_brightness - thresholds.min_brightness) / 2.0)
+    components = [
+        _ratio_score(sharpness, thresholds.min_sharpness),
+        max(0.0, 1.0 - abs(brightness - center) / (2.0 * half_range)) * (1.0 - clipped_ratio),
+    ]
+    if box_side is not None:
+        components.append(_ratio_score(box_side, thresholds.min_box_side))
+    if confidence is not None:
+        components.append(float(confidence))
+
+    return {
+        'score': round(float(np.mean(components)), 4),
+        'passed': not reasons,
+        'reasons': reasons,
+        'metrics': {
+            'sharpness': round(sharpness, 2),
+            'brightness': round(brightness, 2),
+            'clipped_ratio': round(clipped_ratio, 4),
+            'box_side': box_side,
+            'confidence': round(float(confidence), 4) if confidence is not None else None,
+        },
+    }
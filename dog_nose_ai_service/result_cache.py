@@ -0,0 +1,217 @@
+"""
+업로드 이미지 결과 캐시 (메모리 LRU + 선택적 디스크 저장소)
+
+같은 사진을 다시 보내는 요청(재시도, 등록 이미지 재확인 등)은 디코딩/YOLOv5/Siamese 추론을 다시 하지 않고
+이전 결과를 돌려줍니다. 키는 업로드 바이트 해시 + 결과 종류 + 모델 변형 + 모델 버전이므로
+모델 파일이나 크롭 설정이 바뀌면 이전 결과는 자동으로 조회되지 않습니다.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_KINDS = ('crop', 'features', 'compare')
+
+
+def upload_digest(image_bytes):
+    """업로드 바이트 내용 해시 (blake2b 128비트)"""
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+
+def file_fingerprint(*paths, extra=''):
+    """모델 파일 경로/크기/수정 시각과 설정 문자열로 만든 버전 문자열 (없는 파일은 무시)"""
+    digest = hashlib.blake2b(extra.encode(), digest_size=8)
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}".encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_items=2048, ttl_s=86400, disk_dir=None, disk_max_mb=512, metrics=None):
+        """
+        Args:
+            max_items: 메모리에 보관할 최대 결과 수 (LRU 방식으로 제거)
+            ttl_s: 결과 유효 시간 (초, 0이면 만료 없음)
+            disk_dir: 디스크 저장 경로 (None이면 메모리만 사용)
+            disk_max_mb: 디스크 저장소 최대 크기 (초과 시 오래된 파일부터 삭제)
+            metrics: 조회 결과를 기록할 MetricsRegistry (선택)
+        """
+        self.max_items = max(0, int(max_items))
+        self.ttl = float(ttl_s)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = int(disk_max_mb * 1024 * 1024)
+        self.metrics = metrics
+
+        self._entries = OrderedDict()  # 키 -> (만료 시각, 값)
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        self.counts = {kind: {'memory_hits': 0, 'disk_hits': 0, 'misses': 0} for kind in CACHE_KINDS}
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.rglob('*.pkl'))
+
+    @staticmethod
+    def make_key(kind, *parts):
+        return hashlib.blake2b('|'.join([kind] + [str(p) for p in parts]).encode(), digest_size=16).hexdigest()
+
+    def _record(self, kind, result):
+        with self._lock:
+            self.counts.setdefault(kind, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0})[result] += 1
+        if self.metrics is not None:
+            self.metrics.inc('nose_result_cache_requests_total', kind=kind, result=result)
+
+    def get(self, kind, key):
+        """캐시 조회 (메모리 -> 디스크 순서, 디스크에서 찾으면 메모리로 올림), 없으면 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    hit = True
+                else:
+                    del self._entries[key]
+                    hit = False
+            else:
+                hit = False
+        if hit:
+            self._record(kind, 'memory_hits')
+            return value
+
+        value = self._disk_get(key, now)
+        if value is not None:
+            self._memory_put(key, value, now)
+            self._record(kind, 'disk_hits')
+            return value
+
+        self._record(kind, 'misses')
+        return None
+
+    def put(self, kind, key, value):
+        now = time.time()
+        self._memory_put(key, value, now)
+        self._disk_put(key, value)
+
+    def _memory_put(self, key, value, now):
+        if self.max_items == 0:
+            return
+        expires_at = now + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return self.disk_dir / key[:2] / f"{key}.pkl"
+
+    def _disk_get(self, key, now):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            if self.ttl > 0 and path.stat().st_mtime + self.ttl <= now:
+                self._disk_remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable result cache file {path}: {str(e)}")
+            self._disk_remove(path)
+            return None
+
+    def _disk_put(self, key, value):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            with self._disk_lock:
+                # 덮어쓰는 파일의 크기는 빼고 새 크기만 더함 (교체와 함께 잠금 안에서)
+                try:
+                    previous = path.stat().st_size
+                except OSError:
+                    previous = 0
+                os.replace(tmp_path, path)
+                self._disk_bytes += len(payload) - previous
+                over_budget = self.disk_max_bytes > 0 and self._disk_bytes > self.disk_max_bytes
+            if over_budget:
+                self._prune_disk()
+        except Exception as e:
+            logger.warning(f"Error writing result cache file {path}: {str(e)}")
+
+    def _disk_remove(self, path):
+        with self._disk_lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                self._disk_bytes -= size
+            except OSError:
+                pass
+
+    def _prune_disk(self):
+        """디스크 예산의 90% 이하가 될 때까지 오래된 파일부터 삭제"""
+        with self._disk_lock:
+            files = sorted(((p.stat().st_mtime, p.stat().st_size, p) for p in self.disk_dir.rglob('*.pkl')),
+                           key=lambda item: item[0])
+            total = sum(size for _, size, _ in files)
+            target = int(self.disk_max_bytes * 0.9)
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+            self._disk_bytes = total
+
+    def clear(self):
+        """메모리/디스크 결과 모두 삭제"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir is not None:
+            with self._disk_lock:
+                for path in self.disk_dir.rglob('*.pkl'):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            counts = {kind: dict(c) for kind, c in self.counts.items()}
+            size = len(self._entries)
+        for c in counts.values():
+            total = c['memory_hits'] + c['disk_hits'] + c['misses']
+            c['hit_rate'] = round((c['memory_hits'] + c['disk_hits']) / total, 3) if total else 0.0
+        return {
+            'memory_size': size,
+            'memory_max_items': self.max_items,
+            'ttl_s': self.ttl,
+            'disk_dir': str(self.disk_dir) if self.disk_dir is not None else None,
+            'disk_used_mb': round(self._disk_bytes / 1024 / 1024, 2),
+            'disk_max_mb': round(self.disk_max_bytes / 1024 / 1024, 1),
+            'kinds': counts,
+        }
@@ -0,0 +1,148 @@
+"""
+Siamese 모델 분리 및 임베딩 캐시
+
+학습된 Siamese 모델(.h5)은 두 입력이 같은 임베딩 타워를 공유하고,
+그 출력을 거리/점수 헤드가 받아 유사도를 계산하는 구조입니다.
+로드 시점에 타워와 헤드를 분리해 두면 이미 본 이미지는 타워를 다시 거치지 않고
+캐시된 임베딩으로 헤드만 평가할 수 있습니다.
+"""
+
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def preprocess_nose_image(gray_image, model_type='original'):
+    """
+    그레이스케일 코 크롭을 Siamese 모델 입력으로 변환 (서빙과 양자화 보정에서 공통 사용)
+
+    Returns:
+        (1, H, W) float32 배열 (0-1 정규화)
+    """
+    # 모델 타입에 따른 전처리 적용
+    if model_type == 'canny':
+        # Canny 에지 검출
+        processed_image = cv2.Canny(gray_image, 50, 150)
+    elif model_type == 'laplacian':
+        # Laplacian 에지 검출
+        processed_image = cv2.Laplacian(gray_image, cv2.CV_64F)
+        processed_image = np.absolute(processed_image)
+        processed_image = np.uint8(processed_image)
+    elif model_type == 'sobel':
+        # Sobel 에지 검출
+        sobelx = cv2.Sobel(gray_image, cv2.CV_64F, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray_image, cv2.CV_64F, 0, 1, ksize=3)
+        processed_image = np.sqrt(sobelx**2 + sobely**2)
+        processed_image = np.uint8(processed_image)
+    else:  # original
+        # 원본 그레이스케일 이미지 사용
+        processed_image = gray_image
+
+    # 가우시안 블러 적용 (노이즈 제거)
+    processed_image = cv2.GaussianBlur(processed_image, (3, 3), 0)
+
+    # 정규화 (0-255 -> 0-1)
+    normalized = processed_image.astype(np.float32) / 255.0
+
+    # 차원 추가 (batch dimension)
+    return np.expand_dims(normalized, axis=0)
+
+
+def find_embedding_tower(model):
+    """두 입력에 공유되어 호출된 하위 모델(임베딩 타워) 찾기"""
+    import tensorflow as tf
+
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.Model) and len(layer.inbound_nodes) >= 2:
+            return layer
+    return None
+
+
+def split_siamese_model(model):
+    """
+    Siamese 모델을 (임베딩 타워, 점수 헤드)로 분리
+
+    Returns:
+        (tower, head) 또는 분리할 수 없는 구조면 None
+    """
+    import tensorflow as tf
+
+    try:
+        if len(model.inputs) != 2:
+            return None
+
+        tower = find_embedding_tower(model)
+        if tower is None:
+            return None
+
+        # 외부 그래프에서 타워가 두 입력에 대해 만든 출력 텐서를 헤드의 입력으로 사용
+        emb_a = tower.get_output_at(0)
+        emb_b = tower.get_output_at(1)
+        graph_head = tf.keras.Model(inputs=[emb_a, emb_b], outputs=model.output)
+
+        # 임베딩 배열을 바로 넣을 수 있도록 독립된 Input으로 다시 감쌈
+        input_a = tf.keras.Input(shape=emb_a.shape[1:], name='embedding_a')
+        input_b = tf.keras.Input(shape=emb_b.shape[1:], name='embedding_b')
+        head = tf.keras.Model(inputs=[input_a, input_b], outputs=graph_head([input_a, input_b]))
+
+        return tower, head
+
+    except Exception as e:
+        logger.warning(f"Could not split Siamese model into tower/head: {str(e)}")
+        return None
+
+
+def image_content_hash(image):
+    """이미지 배열 내용 기반 캐시 키"""
+    digest = hashlib.sha1(image.tobytes())
+    digest.update(str(image.shape).encode())
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, max_size=4096):
+        """
+        Args:
+            max_size: 보관할 최대 임베딩 수 (LRU 방식으로 제거)
+        """
+        self.max_size = max(0, int(max_size))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+NoseGallery 저장/복구 테스트 (서버 없이 실행)
+
+    python -m pytest test_gallery.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from gallery import NoseGallery
+
+
+def unit(seed, dim=8):
+    vector = np.random.default_rng(seed).random(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_rejects_model_type_outside_root(tmp_path):
+    root = tmp_path / 'galleries'
+    for model_type in ('../escaped', '../../tmp/escaped', '..', '', 'a/b'):
+        with pytest.raises(ValueError):
+            NoseGallery(root, model_type)
+    assert not (tmp_path / 'escaped').exists()
+
+
+def test_reload_keeps_ids_and_vectors_paired(tmp_path):
+    gallery = NoseGallery(tmp_path, 'original')
+    gallery.enroll('A', unit(0))
+    gallery.enroll('B', unit(1))
+
+    reloaded = NoseGallery(tmp_path, 'original')
+    assert reloaded.identify(unit(1), 1)[0]['dog_id'] == 'B'
+
+
+def test_torn_enroll_vector_without_id(tmp_path):
+    gallery = NoseGallery(tmp_path, 'original')
+    gallery.enroll('A', unit(0))
+    # 벡터만 기록되고 ID는 기록되지 않은 채 중단
+    with open(tmp_path / 'original' / NoseGallery.VECTORS_FILE, 'ab') as f:
+        f.write(unit(2).astype('<f4').tobytes())
+
+    recovered = NoseGallery(tmp_path, 'original')
+    assert len(recovered) == 1
+    recovered.enroll('C', unit(3))
+
+    assert recovered.identify(unit(3), 1)[0] == pytest.approx({'dog_id': 'C', 'similarity': 1.0, 'index': 1})
+    assert recovered.identify(unit(0), 1)[0]['dog_id'] == 'A'
+    assert NoseGallery(tmp_path, 'original').identify(unit(3), 1)[0]['dog_id'] == 'C'
+
+
+def test_partial_vector_row_and_torn_id_line(tmp_path):
+    gallery = NoseGallery(tmp_path, 'original')
+    gallery.enroll('A', unit(0))
+    gallery.enroll('B', unit(1))
+    # 벡터 행 일부와 줄바꿈 없는 ID 줄이 남은 채 중단
+    with open(tmp_path / 'original' / NoseGallery.VECTORS_FILE, 'ab') as f:
+        f.write(unit(2).astype('<f4').tobytes()[:5])
+    with open(tmp_path / 'original' / NoseGallery.IDS_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'dog_id': 'X'})[:6])
+
+    recovered = NoseGallery(tmp_path, 'original')
+    assert recovered.ids == ['A', 'B']
+    recovered.enroll('C', unit(3))
+
+    for seed, dog_id in ((0, 'A'), (1, 'B'), (3, 'C')):
+        match = NoseGallery(tmp_path, 'original').identify(unit(seed), 1)[0]
+        assert match['dog_id'] == dog_id
+        assert match['similarity'] == pytest.approx(1.0, abs=1e-5)
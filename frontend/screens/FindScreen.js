@@ -109,15 +109,9 @@ export default function FindScreen() {
       const matchResult = await matchResponse.json();
       setSearchResults(matchResult);
 
-      // 2. 매칭된 강아지들의 상세 정보 가져오기
-      if (matchResult.matches && matchResult.matches.length > 0) {
-        const dogDetailsResponse = await fetch(`${API_BASE_URL}/admin/list`);
-        const allDogs = await dogDetailsResponse.json();
-        
-        const matchedDogsData = allDogs.filter(dog => 
-          matchResult.matches.includes(dog.uid)
-        );
-        setMatchedDogs(matchedDogsData);
+      // 2. 매칭 후보에 상세 정보(종, 이미지 URL)가 함께 옴 (거리 순)
+      if (matchResult.candidates && matchResult.candidates.length > 0) {
+        setMatchedDogs(matchResult.candidates);
       } else {
         setMatchedDogs([]);
         Alert.alert('검색 결과', '일치하는 반려견을 찾을 수 없습니다.');
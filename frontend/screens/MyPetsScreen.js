@@ -34,9 +34,17 @@ export default function MyPetsScreen({ navigation }) {
   const loadDogs = async () => {
     setIsLoading(true);
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/list`);
-      const data = await response.json();
-      setDogs(data);
+      // 커서 페이지를 끝까지 이어서 조회
+      const allDogs = [];
+      let cursor = null;
+      do {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`${API_BASE_URL}/admin/list${query}`);
+        const page = await response.json();
+        allDogs.push(...page.items);
+        cursor = page.next_cursor;
+      } while (cursor);
+      setDogs(allDogs);
     } catch (error) {
       console.error('Load dogs error:', error);
       Alert.alert('오류', '반려견 목록을 불러오는 중 오류가 발생했습니다.');
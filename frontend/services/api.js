@@ -62,16 +62,30 @@ class ApiService {
     }
   }
 
+  // 반려견 목록 한 페이지 (cursor: 이전 페이지의 next_cursor)
+  static async listDogs(cursor = null, limit = 100) {
+    const params = `limit=${limit}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+    const response = await fetch(`${API_BASE_URL}/admin/list?${params}`);
+    const result = await response.json();
+
+    if (!response.ok) {
+      throw new Error('반려견 목록을 불러오는 중 오류가 발생했습니다.');
+    }
+
+    return result;
+  }
+
   static async getAllDogs() {
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/list`);
-      const result = await response.json();
-      
-      if (!response.ok) {
-        throw new Error('반려견 목록을 불러오는 중 오류가 발생했습니다.');
-      }
+      const dogs = [];
+      let cursor = null;
+      do {
+        const page = await ApiService.listDogs(cursor);
+        dogs.push(...page.items);
+        cursor = page.next_cursor;
+      } while (cursor);
 
-      return result;
+      return dogs;
     } catch (error) {
       console.error('Get all dogs error:', error);
       throw error;
@@ -99,7 +113,7 @@ class ApiService {
   // 서버 연결 테스트
   static async testConnection() {
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/list`);
+      const response = await fetch(`${API_BASE_URL}/admin/list?limit=1`);
       return response.ok;
     } catch (error) {
       console.error('Connection test failed:', error);